@@ -4,10 +4,14 @@ from tkinter import filedialog
 from tkinter import colorchooser
 from tkinter import messagebox
 from math import ceil
+import numpy as np
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from apomenu import *
-from apoimage import getimage
-from apoprofile import plot_profile, close_profiles
+from apoimage import getimage, ANALYSIS_FEATURES
+from apojobs import JobRunner
+from apoprofile import ProfileViewer, close_profiles
+from apoviewport import TileViewport
 
 
 class AppGui:
@@ -23,6 +27,8 @@ class AppGui:
     MathOpWindow = namedtuple("MathOpWindow", ["window", "images", "numbers", "resultname", "checkboxvar", "applybut", "cancelbut"])
     # Settings window for neighbourhood operations
     NeighbourhoodOpWindow = namedtuple("NeighbourhoodOpWindow", ["window", "maskrbuts", "maskcode", "bordertypecode", "bordertypeparam"])
+    # Progress indicator of the operation running for the tab, shown in the tab topbar
+    JobProgress = namedtuple("JobProgress", ["frame", "label", "bar", "cancelbut"])
     # Prefix for non-disk paths
     internal_path_prefix = "<APO>" 
 
@@ -36,6 +42,8 @@ class AppGui:
         self.menubar = prep_menu(self)
         self.tabmanager = ttk.Notebook(self.root)
         self.tabs = []
+        # Image operations are run on worker threads, so the main loop is not blocked
+        self.jobs = JobRunner(self.root)
 
         self.root.geometry(self.__init_geometry())
         self.root.config(menu=self.menubar)
@@ -50,6 +58,7 @@ class AppGui:
 
         def close():
             close_profiles()
+            self.jobs.shutdown()
             self.root.quit()
             self.root.destroy()
         self.root.protocol("WM_DELETE_WINDOW", close)
@@ -103,6 +112,18 @@ class AppGui:
         topbar_pathlabel = Label(imgframe.topbar, text=image_path)
         topbar_pathlabel.grid(row=0, column=0)
 
+        topbar_progressframe = Frame(imgframe.topbar)
+        topbar_progressframe.grid(row=0, column=1, sticky=E)
+        topbar_progresslabel = Label(topbar_progressframe, padx=10)
+        topbar_progresslabel.grid(row=0, column=0)
+        topbar_progressbar = ttk.Progressbar(topbar_progressframe, mode="indeterminate", length=100)
+        topbar_progressbar.grid(row=0, column=1)
+        topbar_cancelbutton = Button(topbar_progressframe, text="Cancel", takefocus=False)
+        topbar_cancelbutton.config(bg="#dddddd", fg="black", font=("", 8), padx=10, pady=0)
+        topbar_cancelbutton.grid(row=0, column=2, padx=10)
+        topbar_progressframe.grid_remove()
+        topbar_progress = AppGui.JobProgress(topbar_progressframe, topbar_progresslabel, topbar_progressbar, topbar_cancelbutton)
+
         topbar_scalelabel = Label(imgframe.topbar, text="100%", padx=20)
         topbar_scalelabel.grid(row=0, column=2)
 
@@ -121,7 +142,7 @@ class AppGui:
         topbar_closebutton.config(command=self.__close_tab)
         topbar_closebutton.grid(row=0, column=5)
 
-        rettab = Tab(self, imgframe.mainframe, imgframe.canvas, image_path, image_label, image, topbar_scalelabel)
+        rettab = Tab(self, imgframe.mainframe, imgframe.canvas, image_path, image_label, image, topbar_scalelabel, topbar_progress)
         self.tabs.append(rettab)
         return rettab
 
@@ -131,8 +152,13 @@ class AppGui:
             tab = self.__get_selected_tab()
         if tab.window is not None:
             tab.window.close()
-        tab.image.close()
-        tab.displayed_image.close()
+        if tab.job is not None:
+            # The image can still be used by the worker thread, so it is closed when the operation ends
+            tab.cancel_job()
+            tab.job.add_finish_callback(tab.image.close)
+        else:
+            tab.image.close()
+        tab.viewport.clear()
         self.tabs.remove(tab)
         self.tabmanager.forget(tab.name)
 
@@ -145,6 +171,13 @@ class AppGui:
                 break
         return tab
 
+    # Checks whether an operation is running for any of the tabs and shows the message if it is.
+    def __is_any_tab_busy(self, tabs):
+        if any(tab.job is not None for tab in tabs):
+            messagebox.showinfo(title="Operation in progress", message="Wait until the operation on the image is finished or cancel it!")
+            return True
+        return False
+
     # Returns a unique label for the image with the given path.
     def __get_imagelabel(self, path):
         opened_files = [tb.label for tb in self.tabs]
@@ -170,6 +203,36 @@ class AppGui:
         return path
 
 
+    #//////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+    # Background Jobs
+    #//////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+    def __run_job(self, tabs, title, function, on_done):
+        '''
+        Runs the image operation on a worker thread, so the application stays responsive while the operation is computed. 
+        The progress is shown in the tabs with the images used by the operation and the operation can be cancelled there. 
+        Only one operation at a time can run for the tab.
+
+        Args:
+            tabs (list[Tab]): Tabs with the images used by the operation.
+            title (str): Operation name shown in the tabs.
+            function (function()): Operation to run. It must not use tkinter.
+            on_done (function(result)): Function called with the result of the operation. It is not called if the operation 
+            has been cancelled.
+
+        Returns:
+            bool: True if the operation has been started, False if other operation is running for any of the tabs.
+        '''
+        if self.__is_any_tab_busy(tabs):
+            return False
+        def on_error(error):
+            messagebox.showerror(title="Operation failed", message=f"{title} failed: {error}")
+        job = self.jobs.submit(function, on_done, on_error)
+        for tab in tabs:
+            tab.start_job(job, title)
+        return True
+
+
     #//////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
     # Image Window 
     #//////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
@@ -181,7 +244,7 @@ class AppGui:
 
         image_window = Toplevel(self.root)
         image_window.title(tab.path)
-        image_window.wimage = tab.image.resize(1)
+        image_window.wimage = tab.image
         image_window.assoc_but = button
         image_window.close = lambda: self.__close_window(tab)
         image_window.protocol("WM_DELETE_WINDOW", image_window.close)
@@ -192,6 +255,7 @@ class AppGui:
         imgframe = self.__create_image_frame(image_window)
         imgframe.mainframe.pack(expand=1, fill=BOTH)
         image_window.canvas = imgframe.canvas
+        image_window.viewport = TileViewport(imgframe.canvas)
 
         scale_frame = Frame(imgframe.topbar, pady=10)
         scale_frame.grid(row=0, column=1)
@@ -223,12 +287,12 @@ class AppGui:
         minus_button.config(command=zoom_out)
         minus_button.grid(row=0, column=0)
 
-        self.__draw_image_on_canvas(image_window.canvas, image_window.wimage)
+        image_window.viewport.set_image(image_window.wimage)
 
     # Closes the window with the image and releases its resources.
     def __close_window(self, tab):
         tab.window.assoc_but.config(state=ACTIVE)
-        tab.window.wimage.close()
+        tab.window.viewport.clear()
         tab.window.destroy()
         tab.window = None
 
@@ -427,11 +491,13 @@ class AppGui:
         Displays the open file dialog and opens a file.
         '''
         file_types = (("All files", "*.*"), 
-                    ("All images", "*.jpg;*.jpeg;*.jpe;*.png;*.tif;*.tiff;*.bmp;"), 
+                    ("All images", "*.jpg;*.jpeg;*.jpe;*.png;*.tif;*.tiff;*.bmp;*.npy;*.raw;"), 
                     ("JPEG Images", "*.jpg;*.jpeg;*.jpe"),
                     ("PNG Images", "*.png"),
                     ("TIFF Images", "*.tif;*.tiff"),
-                    ("BMP Images", "*.bmp"))
+                    ("BMP Images", "*.bmp"),
+                    ("NumPy Arrays", "*.npy"),
+                    ("Raw Images", "*.raw"))
         filepath = filedialog.askopenfilename(filetypes=file_types)
         if filepath == "":
             return
@@ -450,6 +516,7 @@ class AppGui:
         Saves the selected file on disk.
         '''
         tab = self.__get_selected_tab()
+        if self.__is_any_tab_busy([tab]): return
         if tab.is_file_saved_on_disk:
             if messagebox.askyesno(title="Save file", message="Are you sure you want to save a file?"):
                 tab.image.save(tab.image.filename)
@@ -462,9 +529,10 @@ class AppGui:
         Displays the 'save as' file dialog and saves the file on disk.
         '''
         tab = self.__get_selected_tab()
+        if self.__is_any_tab_busy([tab]): return
         filename = filedialog.asksaveasfilename(defaultextension=".png", 
                         filetypes= (("PNG Image", ".png"), ("JPEG Image", ".jpg"), 
-                                    ("TIFF Image", ".tiff"), ("BMP Image", ".bmp")))
+                                    ("TIFF Image", ".tiff"), ("BMP Image", ".bmp"), ("NumPy Array", ".npy")))
         if not filename:
             return
         tab.image.save(filename)
@@ -494,8 +562,8 @@ class AppGui:
             targetmode (str): The string which represents image type.
         '''
         tab = self.__get_selected_tab()
-        ret_image = tab.image.convert(targetmode)
-        tab.redraw_image(ret_image)
+        image = tab.image
+        self.__run_job([tab], "Conversion", lambda: image.convert(targetmode), tab.redraw_image)
 
     
     def invert_img(self):
@@ -503,8 +571,8 @@ class AppGui:
         Inverts the selected image.
         '''
         tab = self.__get_selected_tab()
-        ret_image = tab.image.negate()
-        tab.redraw_image(ret_image)
+        image = tab.image
+        self.__run_job([tab], "Negation", image.negate, tab.redraw_image)
 
 
     def zoom_inout(self, factor, window=None):
@@ -518,13 +586,11 @@ class AppGui:
         '''
         if not window:
             tab = self.__get_selected_tab()
-            tab.displayed_image = tab.image.resize(factor)
             tab.image_scalefactor = factor
             tab.draw_image()
             tab.scalelabel.config(text=f"{int(factor*100)}%")
         else:
-            resized_image = window.wimage.resize(factor)
-            self.__draw_image_on_canvas(window.canvas, resized_image)
+            window.viewport.set_image(window.wimage, factor)
 
 
     #//////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
@@ -539,7 +605,8 @@ class AppGui:
         def draw_func(canvas, content_space, threshold):
             st_x, ed_y, ed_x, st_y = content_space
             return self.draw_function(canvas, (st_x, st_y), (threshold, st_y), (threshold, ed_y), (ed_x, ed_y))
-        self.__thresholding(tab, "Binary thresholding", ["Threshold"], draw_func, tab.image.treshold_binary)
+        self.__thresholding(tab, "Binary thresholding", ["Threshold"], draw_func, 
+                            lambda image, threshold: image.treshold_binary(threshold))
 
 
     def threshold_grayscale(self):
@@ -550,7 +617,8 @@ class AppGui:
         def draw_func(canvas, content_space, threshold):
             st_x, ed_y, ed_x, st_y = content_space
             return self.draw_function(canvas, (st_x, st_y), (threshold, st_y), (threshold, st_y-threshold+st_x), (ed_x, ed_y))
-        self.__thresholding(tab, "Thresholding with grayscale", ["Threshold"], draw_func, tab.image.treshold_grayscale)
+        self.__thresholding(tab, "Thresholding with grayscale", ["Threshold"], draw_func, 
+                            lambda image, threshold: image.treshold_grayscale(threshold))
 
 
     def threshold_two(self):
@@ -567,15 +635,17 @@ class AppGui:
             if check_thresholds(tshd1, tshd2):
                 st_x, ed_y, ed_x, st_y = content_space
                 return self.draw_function(canvas, (st_x, st_y), (tshd1, st_y), (tshd1, ed_y), (tshd2, ed_y), (tshd2, st_y), (ed_x, st_y))
-        def threshold_func(tshd1, tshd2):
-            if check_thresholds(tshd1, tshd2):
-                return tab.image.treshold_two(tshd1, tshd2)
-        self.__thresholding(tab, "Thresholding with two thresholds", ["First Threshold", "Second Threshold"], draw_func, threshold_func)
+        def threshold_func(image, tshd1, tshd2):
+            if tshd1 < tshd2:
+                return image.treshold_two(tshd1, tshd2)
+        self.__thresholding(tab, "Thresholding with two thresholds", ["First Threshold", "Second Threshold"], draw_func, 
+                            threshold_func, check_thresholds)
 
 
-    def __thresholding(self, tab, title_pref, scales, draw_func, threshold_func):
+    def __thresholding(self, tab, title_pref, scales, draw_func, threshold_func, values_check_func=None):
         '''
-        Displays a thresholding window for the given tab. 
+        Displays a thresholding window for the given tab. The window shows a live preview of the result computed from 
+        the downsampled image. Only the Apply button processes the full-size image.
 
         Args:
             tab (Tab): The tab with the image which will be processed.
@@ -588,7 +658,11 @@ class AppGui:
                 contpoins: a tuple with the points of rectangle that defines the drawing area. 
                 It should be in the form (str_x, end_y, end_x, str_y)
                 *args: any number of threshold y values.
-            threshold_func (function(*args)) : Threshold function that takes threshold values as parameters
+            threshold_func (function(image, *args)): Threshold function applied to the given image. It takes the image and 
+            threshold values as parameters. It is used for the preview and on a worker thread, so it should return None 
+            without showing messages for invalid values.
+            values_check_func (function(*args)): Function that takes threshold values as parameters and returns True if they 
+            are valid. It can show a message for invalid values. All values are valid if it is None.
         '''
         title = f"{title_pref} - {tab.label}"
         sett_window = self.__create_apply_check_img_window(title, addcanvas=True, numberofframes=len(scales))
@@ -606,6 +680,7 @@ class AppGui:
             scale_fr = self.__create_scale_entry(sett_window.frames[index], 200, tab.image.Lmin, tab.image.Lmax, 
                                                 initval=str(init_val), label=scalelabel)
             scale_fr.frame.grid(row=0, column=0)
+            scale_fr.frame.chgval_decor = lambda: schedule_preview()
             scale_objs.append(scale_fr.scale)
 
         treshold_func_lines = []
@@ -618,12 +693,39 @@ class AppGui:
                 treshold_func_lines = dr_f_ret
 
         def apply_func():
-            ret_image = threshold_func(*[sc.get() for sc in scale_objs])
-            if ret_image:
-                tab.redraw_image(ret_image)
+            values = [sc.get() for sc in scale_objs]
+            if values_check_func is not None and not values_check_func(*values): return
+            image = tab.image
+            if self.__run_job([tab], title_pref, lambda: threshold_func(image, *values), tab.redraw_image):
                 sett_window.window.close()
 
+        # Preview of the result. The operation is turned into a LUT and applied to the downsampled image, so the preview 
+        # is updated on every move of a scale. Updates are delayed to the next frame, so rapid moves are redrawn once.
+        preview_frame = self.__create_image_frame(sett_window.window)
+        preview_frame.mainframe.grid(row=0, column=1)
+        preview_frame.mainframe.config(padx=10)
+        max_pwidth, max_pheight, frame_delay = 500, 500, 16
+        img_width, img_height = tab.image.size
+        preview_factor = min(1, max_pwidth / img_width, max_pheight / img_height)
+        proxy_image = tab.image.resize(preview_factor) if preview_factor < 1 else tab.image
+        preview_pending = None
+
+        def draw_preview():
+            nonlocal preview_pending
+            preview_pending = None
+            if not preview_frame.canvas.winfo_exists():
+                return
+            lut = proxy_image.point_operation_lut(lambda image: threshold_func(image, *[sc.get() for sc in scale_objs]))
+            if lut is not None:
+                self.__draw_image_on_canvas(preview_frame.canvas, proxy_image.apply_lut(lut))
+
+        def schedule_preview():
+            nonlocal preview_pending
+            if preview_pending is None:
+                preview_pending = sett_window.window.after(frame_delay, draw_preview)
+
         check_func()
+        draw_preview()
         sett_window.applybut.config(command=apply_func)
         sett_window.checkbut.config(command=check_func)
 
@@ -753,7 +855,6 @@ class AppGui:
             rbut.config(command=lambda: setSubOptsFuncs(threshold_adapt_opt_funcs))
 
         # Image computing and redrawing visualization image
-        ret_image = None
         resize_factor = 1
         max_vwidth, max_vheight = 700, 600
 
@@ -767,28 +868,69 @@ class AppGui:
         otsu_thsh, otsu_image = tab.image.segmentation_threshold("otsu")
         glauto_thsh_label.config(text=f"Threshold: {str(otsu_thsh)}")
 
-        def get_segmented_img():
-            nonlocal ret_image, otsu_image
-            opt_code = threshold_code.get()
+        # The visualization is computed from the image downsampled to the visualization size
+        proxy_image = tab.image.resize(resize_factor) if resize_factor != 1 else tab.image
+        proxy_otsu_image = otsu_image.resize(resize_factor) if resize_factor != 1 else otsu_image
+
+        def get_parameters():
+            return (threshold_code.get(), threshold_manual_code.get(), glman_thsh_main.scale.get(), 
+                    glman_thsh_snd.scale.get(), threshold_adapt_code.get())
+
+        def get_segmented_img(image, otsu_result, parameters, out=None):
+            opt_code, subopt_code, tshd1, tshd2, adapt_code = parameters
+            ret_image = None
             if opt_code == 0:
-                subopt_code = threshold_manual_code.get()
                 if subopt_code == 0:
-                    ret_image = tab.image.segmentation_threshold("bin", glman_thsh_main.scale.get())[1]
+                    ret_image = image.segmentation_threshold("bin", tshd1)[1]
                 elif subopt_code == 1:
-                    ret_image = tab.image.segmentation_threshold("gray", glman_thsh_main.scale.get())[1]
+                    ret_image = image.segmentation_threshold("gray", tshd1)[1]
                 elif subopt_code == 2:
-                    ret_image = tab.image.segmentation_threshold("2th", glman_thsh_main.scale.get(), glman_thsh_snd.scale.get())[1]
+                    ret_image = image.segmentation_threshold("2th", tshd1, tshd2, out=out)[1]
             elif opt_code == 1:
-                ret_image = otsu_image
+                ret_image = otsu_result
             elif opt_code == 2:
-                ret_image = tab.image.segmentation_threshold("adapt", adaptivemode=threshold_adapt_code.get())[1]
+                ret_image = image.segmentation_threshold("adapt", adaptivemode=adapt_code)[1]
             return ret_image
 
+        # The visualization is computed by a background worker, so the window stays responsive. Only one computation 
+        # runs at a time. Events coming during the computation only replace the waiting parameters, and the result of 
+        # the computation is dropped if newer parameters are waiting, so only the latest parameters are drawn. The result 
+        # of thresholding with two thresholds is written to one buffer, as the previous result is drawn before the next 
+        # computation starts.
+        preview_executor = ThreadPoolExecutor(max_workers=1)
+        preview_buffer = np.empty(proxy_image.size[::-1], dtype=np.uint8)
+        preview_job = None
+        preview_parameters = None
+        poll_delay = 20
+
         def redraw_image(event=None):
-            visul_image = get_segmented_img()
-            if resize_factor != 1:
-                visul_image = visul_image.resize(resize_factor)
-            self.__draw_image_on_canvas(visualization_frame.canvas, visul_image)
+            nonlocal preview_parameters
+            preview_parameters = get_parameters()
+            if preview_job is None:
+                start_preview_job()
+
+        def start_preview_job():
+            nonlocal preview_job, preview_parameters
+            parameters, preview_parameters = preview_parameters, None
+            preview_job = preview_executor.submit(get_segmented_img, proxy_image, proxy_otsu_image, parameters, preview_buffer)
+            sett_window.window.after(poll_delay, poll_preview_job)
+
+        def poll_preview_job():
+            nonlocal preview_job
+            if not visualization_frame.canvas.winfo_exists():
+                return
+            if not preview_job.done():
+                sett_window.window.after(poll_delay, poll_preview_job)
+                return
+            finished_job, preview_job = preview_job, None
+            if preview_parameters is not None:
+                start_preview_job()
+            elif finished_job.exception() is not None:
+                messagebox.showerror(title="Preview failed", message=f"Segmentation failed: {finished_job.exception()}")
+            elif finished_job.result() is not None:
+                self.__draw_image_on_canvas(visualization_frame.canvas, finished_job.result())
+
+        visualization_frame.canvas.bind("<Destroy>", lambda e: preview_executor.shutdown(wait=False, cancel_futures=True))
 
         redraw_image()
 
@@ -808,9 +950,9 @@ class AppGui:
         glman_thsh_snd.entry.bind("<FocusOut>", redraw_image, add="+")
 
         def apply_func():
-            get_segmented_img()
-            tab.redraw_image(ret_image)
-            sett_window.window.close()
+            image, parameters = tab.image, get_parameters()
+            if self.__run_job([tab], "Segmentation", lambda: get_segmented_img(image, otsu_image, parameters), tab.redraw_image):
+                sett_window.window.close()
         sett_window.applybut.config(command=apply_func)
         
 
@@ -827,9 +969,9 @@ class AppGui:
             validation_ret = self.__validate_math_int(window, "add int")
             if validation_ret is None: return
             tab, number = validation_ret
-            ret_image = tab.image.add_int(number, window.checkboxvar.get())
-            tab.redraw_image(ret_image)
-            window.window.close()
+            image, cutoff = tab.image, window.checkboxvar.get()
+            if self.__run_job([tab], "Addition", lambda: image.add_int(number, cutoff), tab.redraw_image):
+                window.window.close()
         window.applybut.config(command=apply_func)
 
 
@@ -842,9 +984,9 @@ class AppGui:
             validation_ret = self.__validate_math_int(window, "multiply int")
             if validation_ret is None: return
             tab, number = validation_ret
-            ret_image = tab.image.multiply_int(number, window.checkboxvar.get())
-            tab.redraw_image(ret_image)
-            window.window.close()
+            image, cutoff = tab.image, window.checkboxvar.get()
+            if self.__run_job([tab], "Multiplication", lambda: image.multiply_int(number, cutoff), tab.redraw_image):
+                window.window.close()
         window.applybut.config(command=apply_func)
 
 
@@ -860,9 +1002,9 @@ class AppGui:
             if number == 0:
                 messagebox.showinfo(title="Invalid number", message="Number cannot be zero!")
                 return
-            ret_image = tab.image.divide_int(number, window.checkboxvar.get())
-            tab.redraw_image(ret_image)
-            window.window.close()
+            image, cutoff = tab.image, window.checkboxvar.get()
+            if self.__run_job([tab], "Division", lambda: image.divide_int(number, cutoff), tab.redraw_image):
+                window.window.close()
         window.applybut.config(command=apply_func)
 
 
@@ -877,10 +1019,10 @@ class AppGui:
             filepath = self.__validate_math_resultname(window.resultname.get())
             if filepath is None: return
             tab1, tab2 = tabs
-            ret_image = tab1.image.add_images(tab2.image, window.checkboxvar.get())
-            ret_image.filename = filepath
-            self.__open_tab(ret_image)
-            window.window.close()
+            image1, image2, cutoff = tab1.image, tab2.image, window.checkboxvar.get()
+            if self.__run_job(tabs, "Addition", lambda: image1.add_images(image2, cutoff), 
+                              lambda ret_image: self.__open_math_result(ret_image, filepath)):
+                window.window.close()
         window.applybut.config(command=apply_func)
 
 
@@ -895,10 +1037,10 @@ class AppGui:
             filepath = self.__validate_math_resultname(window.resultname.get())
             if filepath is None: return
             tab1, tab2 = tabs
-            ret_image = tab1.image.subtract_images(tab2.image)
-            ret_image.filename = filepath
-            self.__open_tab(ret_image)
-            window.window.close()
+            image1, image2 = tab1.image, tab2.image
+            if self.__run_job(tabs, "Subtraction", lambda: image1.subtract_images(image2), 
+                              lambda ret_image: self.__open_math_result(ret_image, filepath)):
+                window.window.close()
         window.applybut.config(command=apply_func)
 
 
@@ -911,9 +1053,8 @@ class AppGui:
             validation_ret = self.__validate_math_operation(window.images[0].get(), "logic not")
             if validation_ret is None: return
             tab = validation_ret
-            ret_image = tab.image.logic_not()
-            tab.redraw_image(ret_image)
-            window.window.close()
+            if self.__run_job([tab], "Logical NOT", tab.image.logic_not, tab.redraw_image):
+                window.window.close()
         window.applybut.config(command=apply_func)
 
 
@@ -928,10 +1069,10 @@ class AppGui:
             filepath = self.__validate_math_resultname(window.resultname.get())
             if filepath is None: return
             tab1, tab2 = tabs
-            ret_image = tab1.image.logic_and(tab2.image)
-            ret_image.filename = filepath
-            self.__open_tab(ret_image)
-            window.window.close()
+            image1, image2 = tab1.image, tab2.image
+            if self.__run_job(tabs, "Logical AND", lambda: image1.logic_and(image2), 
+                              lambda ret_image: self.__open_math_result(ret_image, filepath)):
+                window.window.close()
         window.applybut.config(command=apply_func)
 
 
@@ -946,10 +1087,10 @@ class AppGui:
             filepath = self.__validate_math_resultname(window.resultname.get())
             if filepath is None: return
             tab1, tab2 = tabs
-            ret_image = tab1.image.logic_or(tab2.image)
-            ret_image.filename = filepath
-            self.__open_tab(ret_image)
-            window.window.close()
+            image1, image2 = tab1.image, tab2.image
+            if self.__run_job(tabs, "Logical OR", lambda: image1.logic_or(image2), 
+                              lambda ret_image: self.__open_math_result(ret_image, filepath)):
+                window.window.close()
         window.applybut.config(command=apply_func)
 
 
@@ -964,12 +1105,17 @@ class AppGui:
             filepath = self.__validate_math_resultname(window.resultname.get())
             if filepath is None: return
             tab1, tab2 = tabs
-            ret_image = tab1.image.logic_xor(tab2.image)
-            ret_image.filename = filepath
-            self.__open_tab(ret_image)
-            window.window.close()
+            image1, image2 = tab1.image, tab2.image
+            if self.__run_job(tabs, "Logical XOR", lambda: image1.logic_xor(image2), 
+                              lambda ret_image: self.__open_math_result(ret_image, filepath)):
+                window.window.close()
         window.applybut.config(command=apply_func)
     
+    # Opens the result of math operation performed on images in new tab
+    def __open_math_result(self, image, filepath):
+        image.filename = filepath
+        self.__open_tab(image)
+
     # Validates the chosen file name for result image
     def __validate_math_resultname(self, filename):
         if filename == "":
@@ -1110,15 +1256,16 @@ class AppGui:
             mask_index = ngbd_window.maskcode.get()
             bordertype = ngbd_window.bordertypecode.get()
             bordertype_pvalue = ngbd_window.bordertypeparam.scale.get()
+            image = tab.image
             if mask_index == 0:
-                ret_image = tab.image.smooth_avarage(bordertype, bordertype_pvalue)
+                smooth_func = lambda: image.smooth_avarage(bordertype, bordertype_pvalue)
             elif mask_index == 1:
                 param_k = entry_scale.scale.get()
-                ret_image = tab.image.smooth_weighted_avarage(param_k, bordertype, bordertype_pvalue)
+                smooth_func = lambda: image.smooth_weighted_avarage(param_k, bordertype, bordertype_pvalue)
             elif mask_index == 2:
-                ret_image = tab.image.smooth_gaussian(bordertype, bordertype_pvalue)
-            tab.redraw_image(ret_image)
-            ngbd_window.window.window.close()
+                smooth_func = lambda: image.smooth_gaussian(bordertype, bordertype_pvalue)
+            if self.__run_job([tab], "Smoothing", smooth_func, tab.redraw_image):
+                ngbd_window.window.window.close()
         ngbd_window.window.applybut.config(command=apply_func)
 
 
@@ -1136,9 +1283,10 @@ class AppGui:
             mask_index = ngbd_window.maskcode.get()
             bordertype = ngbd_window.bordertypecode.get()
             bordertype_pvalue = ngbd_window.bordertypeparam.scale.get()
-            ret_image = tab.image.sharpen_laplacian(mask_index, bordertype, bordertype_pvalue)
-            tab.redraw_image(ret_image)
-            ngbd_window.window.window.close()
+            image = tab.image
+            if self.__run_job([tab], "Sharpening", lambda: image.sharpen_laplacian(mask_index, bordertype, bordertype_pvalue), 
+                              tab.redraw_image):
+                ngbd_window.window.window.close()
         ngbd_window.window.applybut.config(command=apply_func)  
 
     
@@ -1168,9 +1316,10 @@ class AppGui:
             mask_size = (ngbd_window.maskcode.get() * 2) + 3
             bordertype = ngbd_window.bordertypecode.get()
             bordertype_pvalue = ngbd_window.bordertypeparam.scale.get()
-            ret_image = tab.image.median_blur(mask_size, bordertype, bordertype_pvalue)
-            tab.redraw_image(ret_image)
-            ngbd_window.window.window.close()
+            image = tab.image
+            if self.__run_job([tab], "Median blur", lambda: image.median_blur(mask_size, bordertype, bordertype_pvalue), 
+                              tab.redraw_image):
+                ngbd_window.window.window.close()
         ngbd_window.window.applybut.config(command=apply_func) 
 
 
@@ -1186,9 +1335,10 @@ class AppGui:
             mask_code = masks[ngbd_window.maskcode.get()].strip()
             bordertype = ngbd_window.bordertypecode.get()
             bordertype_pvalue = ngbd_window.bordertypeparam.scale.get()
-            ret_image = tab.image.edgedetection_Sobel_mask(mask_code, bordertype, bordertype_pvalue)
-            tab.redraw_image(ret_image)
-            ngbd_window.window.window.close()
+            image = tab.image
+            if self.__run_job([tab], "Edge detection", lambda: image.edgedetection_Sobel_mask(mask_code, bordertype, bordertype_pvalue), 
+                              tab.redraw_image):
+                ngbd_window.window.window.close()
         ngbd_window.window.applybut.config(command=apply_func)
 
 
@@ -1228,19 +1378,20 @@ class AppGui:
             operator_index = ngbd_window.maskcode.get()
             bordertype = ngbd_window.bordertypecode.get()
             bordertype_pvalue = ngbd_window.bordertypeparam.scale.get()
+            image = tab.image
             if operator_index == 0:
-                ret_image = tab.image.edgedetection_Sobel_operator(bordertype, bordertype_pvalue)
+                edge_func = lambda: image.edgedetection_Sobel_operator(bordertype, bordertype_pvalue)
             elif operator_index == 1:
-                ret_image = tab.image.edgedetection_Prewitt_operator(bordertype, bordertype_pvalue)
+                edge_func = lambda: image.edgedetection_Prewitt_operator(bordertype, bordertype_pvalue)
             elif operator_index == 2:
                 tshd1, tshd2 = treshold1_scale.scale.get(), treshold2_scale.scale.get()
                 if tshd1 < tshd2:
-                    ret_image = tab.image.edgedetection_Canny_operator(tshd1, tshd2, bordertype, bordertype_pvalue)
+                    edge_func = lambda: image.edgedetection_Canny_operator(tshd1, tshd2, bordertype, bordertype_pvalue)
                 else:
                     messagebox.showinfo(title="Invalid values", message="Fisrt threshold must be less than second threshold")
                     return
-            tab.redraw_image(ret_image)
-            ngbd_window.window.window.close()
+            if self.__run_job([tab], "Edge detection", edge_func, tab.redraw_image):
+                ngbd_window.window.window.close()
         ngbd_window.window.applybut.config(command=apply_func)
 
 
@@ -1295,9 +1446,9 @@ class AppGui:
             mask_code = morph_window.maskcode.get()
             bordertype = morph_window.bordertypecode.get()
             bordertype_pvalue = morph_window.bordertypeparam.scale.get()
-            ret_image = morph_function(mask_code, bordertype, bordertype_pvalue)
-            tab.redraw_image(ret_image)
-            morph_window.window.window.close()
+            if self.__run_job([tab], title_pref, lambda: morph_function(mask_code, bordertype, bordertype_pvalue), 
+                              tab.redraw_image):
+                morph_window.window.window.close()
         morph_window.window.applybut.config(command=apply_func)
 
 
@@ -1408,8 +1559,7 @@ class AppGui:
         tab = self.__get_selected_tab()
         sett_window = self.__create_apply_check_img_window("Image analysis", addcanvas=False, numberofframes=2)
 
-        features_names = ["Area", "Circuit", "Shape factor W1", "Shape factor W2", "Shape factor W3", "Shape factor W9", 
-                                "Solidity (W10)", "Equivalent Diameter (W11)", "Moment M1", "Moment M2", "Moment M3"]
+        features_names = ANALYSIS_FEATURES
         features_variables = [BooleanVar() for x in range(len(features_names))]
 
         features_label = Label(sett_window.frames[0], text="Features")
@@ -1444,14 +1594,18 @@ class AppGui:
             if not filename:
                 messagebox.showinfo(title="No result file name", message="Enter the name for result file!")
                 return
-            analysis_data_lines = tab.image.analyze(*features_selected)
-            headers_line_list = [f_name for i, f_name in enumerate(features_names) if features_selected[i]]
-            headers_line = ",".join(headers_line_list) + "\n"
-            resultfile = open(filename, "w")
-            resultfile.writelines([headers_line] + analysis_data_lines)
-            resultfile.close()
-            sett_window.window.close()
-            messagebox.showinfo(title="Analysis has been done", message="Analysis file has been created!")
+            image, resultfilename = tab.image, filename
+            def analyze_func():
+                analysis_data_lines = image.analyze(*features_selected)
+                headers_line_list = [f_name for i, f_name in enumerate(features_names) if features_selected[i]]
+                headers_line = ",".join(headers_line_list) + "\n"
+                resultfile = open(resultfilename, "w")
+                resultfile.writelines([headers_line] + analysis_data_lines)
+                resultfile.close()
+            def show_done(result):
+                messagebox.showinfo(title="Analysis has been done", message="Analysis file has been created!")
+            if self.__run_job([tab], "Analysis", analyze_func, show_done):
+                sett_window.window.close()
 
         checkall()
         sett_window.checkbut.config(text="Check All")
@@ -1471,7 +1625,6 @@ class AppGui:
         tab = self.__get_selected_tab()
         histogram = tab.image.histogram()
         Lmax = tab.image.Lmax
-        ret_image = None
 
         title = f"Linear stretching - {tab.label}"
         sett_window = self.__create_apply_check_img_window(title, addcanvas=True, numberofframes=2)
@@ -1514,31 +1667,21 @@ class AppGui:
         lowrng_scale.frame.grid(row=1, column=0, sticky=W, pady=5)
         uprng_scale.frame.grid(row=2, column=0, sticky=W, pady=5)
 
-        def stretch_func():
-            nonlocal ret_image
+        # Returns the stretching function for the selected options or None if the options are invalid
+        def get_stretch_func():
+            image = tab.image
             if stretchoption.get():
-                ret_image = tab.image.hist_linear_stretch(cutoff=checkbtnvalue.get())
-            else:
-                lowrange = lowrng_scale.scale.get()
-                uprange = uprng_scale.scale.get()
-                if lowrange >= uprange:
-                    messagebox.showinfo(title="Invalid values", message="Lower range must be less than upper range")
-                    return
-                ret_image = tab.image.hist_linear_stretch(rangevalues=(lowrange, uprange))
-        
-        def check_func():
-            stretch_func()
-            ret_histogram = ret_image.histogram()
-            self.draw_histogram_changes_sketch(histogram, ret_histogram, sett_window.canvas, (xpad, ypad, cnv_width+xpad, cnv_height+ypad))
-
-        def apply_func():
-            if ret_image is None:
-                stretch_func()
-            tab.redraw_image(ret_image)
-            sett_window.window.close()
+                cutoff = checkbtnvalue.get()
+                return lambda: image.hist_linear_stretch(cutoff=cutoff)
+            lowrange = lowrng_scale.scale.get()
+            uprange = uprng_scale.scale.get()
+            if lowrange >= uprange:
+                messagebox.showinfo(title="Invalid values", message="Lower range must be less than upper range")
+                return None
+            return lambda: image.hist_linear_stretch(rangevalues=(lowrange, uprange))
 
-        sett_window.applybut.config(command=apply_func)
-        sett_window.checkbut.config(command=check_func)
+        self.__histogram_stretching(tab, "Linear stretching", sett_window, histogram, (xpad, ypad, cnv_width+xpad, cnv_height+ypad), 
+                                    get_stretch_func)
 
 
     def hist_gamma_stretch(self):
@@ -1547,7 +1690,6 @@ class AppGui:
         '''
         tab = self.__get_selected_tab()
         histogram = tab.image.histogram()
-        ret_image = None
 
         title = f"Gamma stretching - {tab.label}"
         sett_window = self.__create_apply_check_img_window(title, addcanvas=True, numberofframes=1)
@@ -1567,20 +1709,54 @@ class AppGui:
         gamma_scale.frame.chgval_decor = blockbutts_func
         gamma_scale.frame.grid(row=0, column=0, sticky=W)
 
-        def stretch_func():
-            nonlocal ret_image
-            ret_image = tab.image.hist_gamma_stretch(gamma_scale.scale.get())
-        
+        def get_stretch_func():
+            image, gamma = tab.image, gamma_scale.scale.get()
+            return lambda: image.hist_gamma_stretch(gamma)
+
+        self.__histogram_stretching(tab, "Gamma stretching", sett_window, histogram, (xpad, ypad, cnv_width+xpad, cnv_height+ypad), 
+                                    get_stretch_func)
+
+
+    def __histogram_stretching(self, tab, title, sett_window, histogram, content_space, get_stretch_func):
+        '''
+        Connects the Check and Apply buttons of the histogram stretching window. Check computes the result and shows its 
+        histogram, Apply replaces the image with the checked result or computes it if it has not been checked. Both are 
+        computed on a worker thread.
+
+        Args:
+            tab (Tab): The tab with the image which will be processed.
+            title (str): Operation name shown in the tab.
+            sett_window (ApplyCheckWindow): The histogram stretching window.
+            histogram (Array): Histogram of the image.
+            content_space (tuple): Drawing area of the histograms in the form (str_x, str_y, end_x, end_y).
+            get_stretch_func (function()): Function that returns the stretching function for the selected options or None 
+            if the options are invalid. The stretching function must not use tkinter.
+        '''
+        ret_image = None
+
         def check_func():
-            stretch_func()
-            ret_histogram = ret_image.histogram()
-            self.draw_histogram_changes_sketch(histogram, ret_histogram, sett_window.canvas, (xpad, ypad, cnv_width+xpad, cnv_height+ypad))
+            stretch_func = get_stretch_func()
+            if stretch_func is None: return
+            def compute_func():
+                image = stretch_func()
+                return (image, image.histogram())
+            def draw_func(result):
+                nonlocal ret_image
+                ret_image, ret_histogram = result
+                if sett_window.canvas.winfo_exists():
+                    self.draw_histogram_changes_sketch(histogram, ret_histogram, sett_window.canvas, content_space)
+            self.__run_job([tab], title, compute_func, draw_func)
 
         def apply_func():
-            if ret_image is None:
-                stretch_func()
-            tab.redraw_image(ret_image)
-            sett_window.window.close()
+            if ret_image is not None:
+                if self.__is_any_tab_busy([tab]): return
+                tab.redraw_image(ret_image)
+                sett_window.window.close()
+                return
+            stretch_func = get_stretch_func()
+            if stretch_func is None: return
+            if self.__run_job([tab], title, stretch_func, tab.redraw_image):
+                sett_window.window.close()
 
         sett_window.applybut.config(command=apply_func)
         sett_window.checkbut.config(command=check_func)
@@ -1591,18 +1767,34 @@ class AppGui:
         Displays the window for histogram equalization for the selected image.
         '''
         tab = self.__get_selected_tab()
-        ret_image = tab.image.hist_equalization()
-        histogram = tab.image.histogram()
-        ret_img_histogram = ret_image.histogram()
+        if self.__is_any_tab_busy([tab]): return
+        image = tab.image
+        histogram = image.histogram()
+        ret_image = None
 
         title = f"Equalization - {tab.label}"
         sett_window = self.__create_apply_img_window(title, addcanvas=True, numberofframes=0)
 
         cnv_width, cnv_height, xpad, ypad = len(histogram), 200, 5, 5
         sett_window.canvas.config(height=cnv_height+ypad*2, width=cnv_width+xpad*2, highlightthickness=0)
-        self.draw_histogram_changes_sketch(histogram, ret_img_histogram, sett_window.canvas, (xpad, ypad, cnv_width+xpad, cnv_height+ypad))
+        self.draw_histogram_changes_sketch([0]*image.M, histogram, sett_window.canvas, (xpad, ypad, cnv_width+xpad, cnv_height+ypad))
+
+        # The result is computed on a worker thread when the window opens and it can be applied when it is ready
+        def compute_func():
+            image_equalized = image.hist_equalization()
+            return (image_equalized, image_equalized.histogram())
+        def draw_func(result):
+            nonlocal ret_image
+            ret_image, ret_img_histogram = result
+            if sett_window.canvas.winfo_exists():
+                self.draw_histogram_changes_sketch(histogram, ret_img_histogram, sett_window.canvas, 
+                                                (xpad, ypad, cnv_width+xpad, cnv_height+ypad))
+                sett_window.applybut.config(state=ACTIVE)
+        sett_window.applybut.config(state=DISABLED)
+        self.__run_job([tab], "Equalization", compute_func, draw_func)
 
         def apply_func():
+            if self.__is_any_tab_busy([tab]): return
             tab.redraw_image(ret_image)
             sett_window.window.close()
         sett_window.applybut.config(command=apply_func)
@@ -1665,7 +1857,7 @@ class AppGui:
         #Obtains the tab with the image and prepares the skeleton of the settings window
         tab = self.__get_selected_tab()
         window_title = f"Profile - {tab.label}"
-        sett_window = self.__create_apply_img_window(window_title, numberofframes=3)
+        sett_window = self.__create_apply_img_window(window_title, numberofframes=4)
 
         #Width and height of the image
         image_width, image_height = tab.image.size 
@@ -1705,6 +1897,13 @@ class AppGui:
         addpt_but.grid(row=2, column=0, columnspan=2, padx=10)
         delpt_but = Button(sett_window.frames[2], text="Delete", width=10, state=DISABLED)
         delpt_but.grid(row=2, column=2, columnspan=2, padx=10)
+        #Creates and adjusts the GUI elements for the sampling options section
+        bilinear_var = BooleanVar()
+        bilinear_checkbox = Checkbutton(sett_window.frames[3], text="Bilinear interpolation", variable=bilinear_var)
+        bilinear_checkbox.grid(row=0, column=0, sticky=W)
+        ln_width_scale = self.__create_scale_entry(sett_window.frames[3], 150, 1, 15, resolution=1, labinterval=7, initval="1", 
+                                                label="Line width")
+        ln_width_scale.frame.grid(row=1, column=0, sticky=W)
 
         #Creates and prepares the skeleton of the image window
         image_window = Toplevel(sett_window.window)
@@ -1718,7 +1917,7 @@ class AppGui:
         imgwin_coord_label.grid(row=0, column=0)
 
         #The settings window size
-        sett_width, sett_height = 270, 320
+        sett_width, sett_height = 270, 450
         #The image window size
         imgfr_width, imgfr_height = 500, 500
         #Sets the position of the settings window and the image window on the screen
@@ -1827,31 +2026,45 @@ class AppGui:
         img_frame.canvas.bind("<Button-1>", add_point_event)
         delpt_but.config(command=delete_point)
 
+        #Graph window and the image canvas of the plotted profile. Next plots reuse them, so the points can be adjusted 
+        # and the profile plotted again without creating a new figure
+        profile_viewer = None
+        profile_img_cnv = None
+
         #Function that plotting the profile graph
         def plot():
+            nonlocal profile_viewer, profile_img_cnv
             #Plotting can only be done if there are at least two points (one line)
             if len(profile_points) >= 2:
                 #Prepares window with the profile lines drawn on the image
-                img_window = Toplevel(self.root)
-                img_window.title(window_title)
-                img_area = self.__create_image_frame(img_window)
-                img_area.mainframe.pack(expand=1, fill=BOTH)
-                img_cnv = img_area.canvas
-                self.__draw_image_on_canvas(img_cnv, tab.image)
+                if profile_img_cnv is None or not profile_img_cnv.winfo_exists():
+                    img_window = Toplevel(self.root)
+                    img_window.title(window_title)
+                    img_area = self.__create_image_frame(img_window)
+                    img_area.mainframe.pack(expand=1, fill=BOTH)
+                    profile_img_cnv = img_area.canvas
+                    self.__draw_image_on_canvas(profile_img_cnv, tab.image)
+                img_cnv = profile_img_cnv
+                img_cnv.delete("profile")
                 pnt_x, pnt_y = profile_points[0]
                 pnt_y = image_height - pnt_y - 1
-                prev_pnt = img_cnv.create_oval(pnt_x-pt_size, pnt_y-pt_size, pnt_x+pt_size, pnt_y+pt_size, fill=line_color)
+                prev_pnt = img_cnv.create_oval(pnt_x-pt_size, pnt_y-pt_size, pnt_x+pt_size, pnt_y+pt_size, fill=line_color, 
+                                                tags="profile")
                 for pnt_x, pnt_y in profile_points[1:]:
                     pnt_y = image_height - pnt_y - 1
                     prev_x, prev_y = img_cnv.coords(prev_pnt)[:2]
-                    img_cnv.create_line(prev_x+pt_size, prev_y+pt_size, pnt_x, pnt_y, fill=line_color, width=ln_size)
-                    prev_pnt = img_cnv.create_oval(pnt_x-pt_size, pnt_y-pt_size, pnt_x+pt_size, pnt_y+pt_size, fill=line_color)
+                    img_cnv.create_line(prev_x+pt_size, prev_y+pt_size, pnt_x, pnt_y, fill=line_color, width=ln_size, 
+                                        tags="profile")
+                    prev_pnt = img_cnv.create_oval(pnt_x-pt_size, pnt_y-pt_size, pnt_x+pt_size, pnt_y+pt_size, fill=line_color, 
+                                                    tags="profile")
                 #Prepares window for the profile graph
-                plot_window = Toplevel(self.root)
-                plot_window.title(window_title)
-                #Calls the function for plotting profile graph
-                plot_profile(profile_points, tab.image, plot_window)
-                sett_window.window.close()
+                if profile_viewer is None or profile_viewer.closed:
+                    plot_window = Toplevel(self.root)
+                    plot_window.title(window_title)
+                    profile_viewer = ProfileViewer(plot_window)
+                #Plots the profile in place of the previous one
+                interpolation = "bilinear" if bilinear_var.get() else "nearest"
+                profile_viewer.plot(profile_points, tab.image, interpolation, ln_width_scale.scale.get())
             else:
                messagebox.showinfo(title="Too few points", message="Not enough points have been given") 
         #Assigns plotting function to the corresponding button
@@ -1886,34 +2099,40 @@ class AppGui:
         label_curr_value.grid(row=1, column=0)
         label_curr_count.grid(row=1, column=1)
 
+        # Counts are taken from the cached histogram of the image
+        extremes = tab.image.histogram_extremes()
+        def show_stats(index):
+            hist_min, hist_max = extremes[index]
+            label_min.config(text=f"min: {hist_min}")
+            label_max.config(text=f"max: {hist_max}")
+
         if len(tab.image.channels) == 1:
             hist_window.grid_rowconfigure(0, weight=1)
             hist_window.grid_columnconfigure(0, weight=1)
             hist_canvas = self.__generate_histogram_image(hist_window, histogram)
             hist_canvas.grid(row=0, column=0) 
-            hist_max = max(histogram)
-            hist_min = min(histogram)
-            label_min.config(text=f"min: {hist_min}")
-            label_max.config(text=f"max: {hist_max}")
+            show_stats(0)
         else:
             hist_window.grid_rowconfigure(1, weight=1)
             hist_window.grid_columnconfigure(0, weight=1)
             topbar = Frame(hist_window, pady=15)
             topbar.grid(row=0, column=0)
-            canvases = []
-            stats = []
+            # Canvases of the channels are generated when the channel is selected for the first time
+            canvases = [None] * len(histogram)
+            hist_colors = tab.image.guicolor_repr
 
             radiobut_index_prev = 0
             radiobut_index = IntVar()
             def change_hist():
-                nonlocal radiobut_index_prev, radiobut_index, label_min, label_max
-                canvases[radiobut_index_prev].grid_forget()
-                canvases[radiobut_index.get()].grid(row=1, column=0)
-                new_min = stats[radiobut_index.get()]["min"]
-                new_max = stats[radiobut_index.get()]["max"]
-                label_min.config(text=f"min: {new_min}")
-                label_max.config(text=f"max: {new_max}")
-                radiobut_index_prev = radiobut_index.get()
+                nonlocal radiobut_index_prev
+                index = radiobut_index.get()
+                if canvases[radiobut_index_prev] is not None:
+                    canvases[radiobut_index_prev].grid_forget()
+                if canvases[index] is None:
+                    canvases[index] = self.__generate_histogram_image(hist_window, histogram[index], hist_colors[index])
+                canvases[index].grid(row=1, column=0)
+                show_stats(index)
+                radiobut_index_prev = index
 
             for index, hist_channel_name in enumerate(tab.image.channels):
                 rbut = Radiobutton(topbar, text=hist_channel_name, variable=radiobut_index, value=index, command=change_hist, padx=20)
@@ -1921,20 +2140,7 @@ class AppGui:
                 if(index == 0):
                     rbut.select()
 
-            hist_colors = tab.image.guicolor_repr
-            for index, hist_channel in enumerate(histogram):
-                canvases.append(self.__generate_histogram_image(hist_window, hist_channel, hist_colors[index]))
-                hist_max = max(hist_channel)
-                hist_min = min(hist_channel)
-                stats.append({})
-                stats[index]["min"] = hist_min
-                stats[index]["max"] = hist_max
-
-            canvases[0].grid(row=1, column=0)
-            start_min = stats[0]["min"]
-            start_max = stats[0]["max"]
-            label_min.config(text=f"min: {start_min}")
-            label_max.config(text=f"max: {start_max}")
+            change_hist()
             
 
     def __generate_histogram_image(self, parentwindow, histogram, color="black"):
@@ -2034,7 +2240,8 @@ class AppGui:
 
     def __draw_histogram(self, histogram, canvas, coordinates, ln_height_unit, ln_width=1, color="black"):
         '''
-        Draws the histogram bars.
+        Draws the histogram bars. All bars are drawn as one polygon outlining the histogram, so the histogram is a single 
+        canvas item regardless of the number of pixel values.
 
         Args:
             histogram (list[int]): List representing image histogram (one channel).
@@ -2044,14 +2251,22 @@ class AppGui:
             ln_height_unit (float): Line height unit. It tells how many pixels a unit of value in the histogram should have.
             ln_width (int): The width of the histogram bar in pixels.
             color (str): String representing the color of the histogram bars.
+
+        Returns:
+            int: Identifier of the polygon on the canvas.
         '''
-        start_x, start_y, end_x, end_y = coordinates + (None, None)
-        start_x += ceil(ln_width // 2) - 1
-        for hist_value in histogram:
-            end_x = start_x
-            end_y = start_y - round(ln_height_unit * hist_value)
-            canvas.create_line(start_x, start_y, end_x, end_y, fill=color, width=ln_width)
-            start_x += ln_width   
+        start_x, start_y = coordinates
+        # Bars cover the same pixels as the bars drawn as lines of the given width, starting one pixel before start_x
+        bars_left = start_x - 1 + np.arange(len(histogram)) * ln_width
+        bars_top = start_y - np.round(ln_height_unit * np.asarray(histogram, dtype=np.float64))
+        # Every bar adds its top left and top right corner to the outline
+        outline = np.empty((len(histogram), 4))
+        outline[:, 0] = bars_left
+        outline[:, 1] = bars_top
+        outline[:, 2] = bars_left + ln_width
+        outline[:, 3] = bars_top
+        points = [start_x - 1, start_y] + outline.ravel().tolist() + [start_x - 1 + len(histogram) * ln_width, start_y]
+        return canvas.create_polygon(points, fill=color, outline="")
 
 
 
@@ -2059,16 +2274,20 @@ class Tab:
     '''
     A class that represents a tab with a top bar and a scrollable image area.
     '''
-    def __init__(self, app, frame, canvas, path, label, image, scalelabel):
+    def __init__(self, app, frame, canvas, path, label, image, scalelabel, progress):
         self.app = app
         self.frame = frame
         self.canvas = canvas
         self.scalelabel = scalelabel
+        self.progress = progress
+        # Operation running on a worker thread for the image
+        self.job = None
         self.path = path
         self.label = label
         self.image = image
         self.image_scalefactor = 1
-        self.displayed_image = self.image.resize(self.image_scalefactor)
+        # Only the visible tiles of the image are resampled and converted for Tk
+        self.viewport = TileViewport(canvas)
         self.window = None
         self.draw_image()
         if self.image.filename.startswith(app.internal_path_prefix):
@@ -2080,24 +2299,39 @@ class Tab:
         self.name = name
     
     def draw_image(self):
-        width, height = self.displayed_image.size
-        img_converted = self.displayed_image.getphotoimage()
-        self.canvas.delete("all")
-        self.canvas.config(height=height, width=width)
-        self.canvas.create_image((0,0), image=img_converted, anchor=NW)
-        self.canvas.photo_copy = img_converted
-        self.canvas.event_generate("<Configure>")
+        self.viewport.set_image(self.image, self.image_scalefactor)
     
     def redraw_image(self, image):
         if self.image.mode != image.mode:
             adjust_menu(self.app.menubar, image.mode)
+        if image is not self.image:
+            self.image.invalidate_cache()
         self.image = image
-        self.displayed_image = self.image.resize(self.image_scalefactor)
         if self.window is not None:
             self.window.close()
             self.window = None
         self.draw_image()
 
+    def start_job(self, job, title):
+        self.job = job
+        self.progress.label.config(text=f"{title}...")
+        self.progress.cancelbut.config(state=ACTIVE, command=self.cancel_job)
+        self.progress.bar.start(20)
+        self.progress.frame.grid()
+        job.add_finish_callback(self.__finish_job)
+
+    def cancel_job(self):
+        if self.job is not None and not self.job.cancelled:
+            self.job.cancel()
+            # The operation cannot be interrupted, so the tab stays busy until the worker thread finishes it
+            self.progress.label.config(text="Cancelling...")
+            self.progress.cancelbut.config(state=DISABLED)
+
+    def __finish_job(self):
+        self.job = None
+        self.progress.bar.stop()
+        self.progress.frame.grid_remove()
+
 
 if __name__ == "__main__":
     AppGui()
@@ -0,0 +1,338 @@
+import argparse
+import ast
+import csv
+import glob
+import os
+import sys
+from collections import namedtuple
+from functools import partial
+from apoimage import getimage, ImageBase, ANALYSIS_FEATURES
+from apoparallel import imap_ordered
+from aposample import sample_profiles, load_polylines, write_profiles
+
+
+# Extensions of the image files searched for in directories
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".jpe", ".png", ".tif", ".tiff", ".bmp", ".npy", ".raw")
+
+# Image methods that can be used as pipeline operations
+OPERATIONS = ("convert", "resize", "negate",
+            "treshold_binary", "treshold_grayscale", "treshold_two", "segmentation_threshold",
+            "add_int", "multiply_int", "divide_int", "logic_not",
+            "hist_linear_stretch", "hist_gamma_stretch", "hist_equalization",
+            "smooth_avarage", "smooth_weighted_avarage", "smooth_gaussian", "median_blur", "sharpen_laplacian",
+            "edgedetection_Sobel_mask", "edgedetection_Sobel_operator", "edgedetection_Prewitt_operator",
+            "edgedetection_Canny_operator",
+            "morph_erode", "morph_dilate", "morph_open", "morph_close",
+            "analyze")
+
+# Profiles sampled from the result image of every file: polylines, interpolation, line width and output file extension
+ProfileJob = namedtuple("ProfileJob", "polylines interpolation width extension")
+
+
+def parse_operation(opstring):
+    '''
+    Parses the operation given as a call expression, e.g. "median_blur(5, reflect)" or "hist_linear_stretch(cutoff=True)".
+    Arguments must be Python literals. Bare names are treated as strings, so "convert(GS)" equals "convert('GS')".
+
+    Args:
+        opstring (str): Operation string. The parentheses can be omitted for operations without arguments.
+
+    Returns:
+        tuple(str, list, dict): Operation name, positional arguments and keyword arguments.
+    '''
+    try:
+        expression = ast.parse(opstring.strip(), mode="eval").body
+    except SyntaxError:
+        raise ValueError(f"Invalid operation: {opstring}")
+    if isinstance(expression, ast.Name):
+        expression = ast.Call(func=expression, args=[], keywords=[])
+    if not isinstance(expression, ast.Call) or not isinstance(expression.func, ast.Name):
+        raise ValueError(f"Invalid operation: {opstring}")
+
+    name = expression.func.id
+    if name not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {name}")
+
+    def literal(node):
+        if isinstance(node, ast.Name):
+            return node.id
+        try:
+            return ast.literal_eval(node)
+        except ValueError:
+            raise ValueError(f"Invalid argument in operation: {opstring}")
+    args = [literal(arg) for arg in expression.args]
+    kwargs = {keyword.arg: literal(keyword.value) for keyword in expression.keywords}
+    return (name, args, kwargs)
+
+
+def load_pipeline(path):
+    '''
+    Reads the operations from the pipeline file. The file should contain one operation per line. Empty lines and lines
+    starting with # are skipped.
+
+    Args:
+        path (str): Pipeline file path.
+
+    Returns:
+        list[tuple(str, list, dict)]: List of parsed operations.
+    '''
+    with open(path) as pipeline_file:
+        lines = [line.strip() for line in pipeline_file]
+    return [parse_operation(line) for line in lines if line and not line.startswith("#")]
+
+
+def iter_image_paths(sources, recursive=False):
+    '''
+    Generates image paths from the given sources. A source can be an image file, a directory or a glob pattern.
+    Paths are generated lazily, so the sources can contain any number of files.
+
+    Args:
+        sources (list[str]): List of sources.
+        recursive (bool): A flag for searching the directories recursively.
+
+    Yields:
+        tuple(str, str): Image path and the path relative to the source. The relative path is used to build the output path.
+    '''
+    for source in sources:
+        if os.path.isdir(source):
+            for dirpath, dirnames, filenames in os.walk(source):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(IMAGE_EXTENSIONS):
+                        path = os.path.join(dirpath, filename)
+                        yield (path, os.path.relpath(path, source))
+                if not recursive:
+                    break
+        elif glob.has_magic(source):
+            # The part of the pattern before the first wildcard is the base of the relative paths
+            base_parts = []
+            for part in source.replace("\\", "/").split("/"):
+                if glob.has_magic(part):
+                    break
+                base_parts.append(part)
+            base = "/".join(base_parts) or "."
+            for path in glob.iglob(source, recursive=True):
+                if os.path.isfile(path):
+                    yield (path, os.path.relpath(path, base))
+        else:
+            yield (source, os.path.basename(source))
+
+
+def apply_operations(image, operations):
+    '''
+    Applies the sequence of operations to the image.
+
+    Args:
+        image (ImageRGB/ImageGrayscale): Source image.
+        operations (list[tuple(str, list, dict)]): List of parsed operations.
+
+    Returns:
+        tuple(ImageRGB/ImageGrayscale, list[str]): Result image and the analysis lines formatted in csv style. The list of
+        analysis lines is None if the pipeline does not contain the analyze operation.
+    '''
+    analysis_lines = None
+    for name, args, kwargs in operations:
+        if not hasattr(image, name):
+            raise ValueError(f"Operation {name} is not supported for image mode {image.mode}")
+        if name == "analyze":
+            if not args and not kwargs:
+                args = [True] * len(ANALYSIS_FEATURES)
+            features_selected = list(args) + [False] * (len(ANALYSIS_FEATURES) - len(args))
+            header_line = ",".join([f_name for i, f_name in enumerate(ANALYSIS_FEATURES) if features_selected[i]]) + "\n"
+            analysis_lines = [header_line] + image.analyze(*features_selected)
+            continue
+        # Conversion to the mode of the image leaves the image unchanged, so pipelines can mix image modes
+        if name == "convert" and args and args[0] == image.mode:
+            continue
+        result = getattr(image, name)(*args, **kwargs)
+        # Segmentation returns the threshold value together with the image
+        if isinstance(result, tuple):
+            result = result[-1]
+        if not isinstance(result, ImageBase):
+            raise ValueError(f"Operation {name} is not supported for image mode {image.mode}")
+        image = result
+    return (image, analysis_lines)
+
+
+def get_output_path(relpath, outdir, suffix="", extension=None):
+    '''
+    Builds the output path for the image.
+
+    Args:
+        relpath (str): Image path relative to the source.
+        outdir (str): Output directory.
+        suffix (str): Suffix added to the file name.
+        extension (str): Output file extension. The extension of the source file is kept if it is None.
+
+    Returns:
+        str: Output path.
+    '''
+    root, source_extension = os.path.splitext(relpath)
+    if extension is None:
+        extension = source_extension
+    elif not extension.startswith("."):
+        extension = "." + extension
+    return os.path.join(outdir, root + suffix + extension)
+
+
+def process_file(path, relpath, operations, outdir, suffix="", extension=None, profiles=None):
+    '''
+    Opens the image, applies the operations and writes the results. The result image is written if the pipeline changes
+    the image, the analysis results are written as a csv file next to it and the profiles of the result image are written
+    as a csv or npy file with the _profiles suffix.
+
+    Args:
+        path (str): Image file path.
+        relpath (str): Image path relative to the source.
+        operations (list[tuple(str, list, dict)]): List of parsed operations.
+        outdir (str): Output directory.
+        suffix (str): Suffix added to the output file names.
+        extension (str): Output image file extension. The extension of the source file is kept if it is None.
+        profiles (ProfileJob): Profiles to sample from the result image. No profiles are written if it is None.
+
+    Returns:
+        list[str]: List of written files.
+    '''
+    image = getimage(path)
+    if image is None:
+        raise ValueError("File does not exist or has unsupported format")
+    ret_image, analysis_lines = apply_operations(image, operations)
+
+    written = []
+    image_path = get_output_path(relpath, outdir, suffix, extension)
+    if os.path.abspath(image_path) == os.path.abspath(path):
+        raise ValueError("Output file would overwrite the source file")
+    os.makedirs(os.path.dirname(image_path) or ".", exist_ok=True)
+    if ret_image is not image:
+        ret_image.save(image_path)
+        written.append(image_path)
+    if analysis_lines is not None:
+        csv_path = get_output_path(relpath, outdir, suffix, ".csv")
+        with open(csv_path, "w") as resultfile:
+            resultfile.writelines(analysis_lines)
+        written.append(csv_path)
+    if profiles is not None:
+        profiles_path = get_output_path(relpath, outdir, suffix + "_profiles", profiles.extension)
+        write_profiles(profiles_path, sample_profiles(ret_image, profiles.polylines, profiles.interpolation, profiles.width),
+                        ["Value"] if len(ret_image.channels) == 1 else ret_image.channels)
+        written.append(profiles_path)
+    image.close()
+    ret_image.close()
+    return written
+
+
+def process_job(job, operations, outdir, suffix="", extension=None, profiles=None):
+    '''
+    Processes the image file given as a job generated by iter_image_paths(). See process_file() for the details.
+
+    Args:
+        job (tuple(str, str)): Image path and the path relative to the source.
+        operations (list[tuple(str, list, dict)]): List of parsed operations.
+        outdir (str): Output directory.
+        suffix (str): Suffix added to the output file names.
+        extension (str): Output image file extension. The extension of the source file is kept if it is None.
+        profiles (ProfileJob): Profiles to sample from the result image.
+
+    Returns:
+        list[str]: List of written files.
+    '''
+    path, relpath = job
+    return process_file(path, relpath, operations, outdir, suffix, extension, profiles)
+
+
+def write_error_report(filename, failures):
+    '''
+    Writes the report of failed files as a csv file with the path and the error message of every failed file.
+
+    Args:
+        filename (str): Report file name.
+        failures (list[tuple(str, Exception)]): List of failed paths and their errors.
+    '''
+    with open(filename, "w", newline="") as reportfile:
+        writer = csv.writer(reportfile)
+        writer.writerow(["Path", "Error"])
+        for path, error in failures:
+            writer.writerow([path, f"{type(error).__name__}: {error}"])
+
+
+def build_parser():
+    '''
+    Creates the command line argument parser.
+
+    Returns:
+        ArgumentParser: Argument parser.
+    '''
+    parser = argparse.ArgumentParser(description="Applies a sequence of image operations to image files without the GUI.",
+                                    epilog="Operations are written as calls of image methods, e.g. -op \"convert(GS)\" "
+                                    "-op \"median_blur(5, reflect)\" -op \"treshold_binary(127)\" -op analyze. "
+                                    f"Available operations: {', '.join(OPERATIONS)}.")
+    parser.add_argument("sources", nargs="+", help="image files, directories or glob patterns")
+    parser.add_argument("-op", "--operation", dest="operations", action="append", default=[],
+                        help="operation to apply; can be given many times and is applied in order")
+    parser.add_argument("-p", "--pipeline", help="file with operations, one per line; applied before -op operations")
+    parser.add_argument("--profiles", help="file with profile polylines, one per line as x1 y1 x2 y2 ...; the profiles "
+                        "of the result image are written to <name>_profiles.csv or .npy")
+    parser.add_argument("--profile-format", choices=("csv", "npy"), default="csv", help="profiles file format (default: csv)")
+    parser.add_argument("--profile-interpolation", choices=("nearest", "bilinear"), default="nearest",
+                        help="interpolation of the profile values (default: nearest)")
+    parser.add_argument("--profile-width", type=int, default=1,
+                        help="profile line width in pixels; values are averaged across the line (default: 1)")
+    parser.add_argument("-o", "--outdir", required=True, help="output directory")
+    parser.add_argument("-s", "--suffix", default="", help="suffix added to the output file names")
+    parser.add_argument("-f", "--format", dest="extension", help="output image format extension, e.g. png")
+    parser.add_argument("-r", "--recursive", action="store_true", help="search the directories recursively")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of worker processes; 0 uses all CPUs (default: 1)")
+    parser.add_argument("--max-inflight", type=int,
+                        help="maximum number of files processed or waiting for output at once (default: 2 * workers)")
+    parser.add_argument("-e", "--errors", help="csv file for the report of failed files")
+    return parser
+
+
+def main(argv=None):
+    '''
+    Runs the batch processing from the command line.
+
+    Args:
+        argv (list[str]): Command line arguments. sys.argv is used if it is None.
+
+    Returns:
+        int: Exit code. It is 1 if any file has failed.
+    '''
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        operations = load_pipeline(args.pipeline) if args.pipeline else []
+        operations += [parse_operation(opstring) for opstring in args.operations]
+        polylines = load_polylines(args.profiles) if args.profiles else None
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    if not operations and not polylines:
+        parser.error("no operations given")
+    if args.profile_width < 1:
+        parser.error("profile width must be at least 1")
+    profiles = None
+    if polylines:
+        profiles = ProfileJob(polylines, args.profile_interpolation, args.profile_width, args.profile_format)
+
+    if args.workers < 0:
+        parser.error("number of workers cannot be negative")
+
+    job_function = partial(process_job, operations=operations, outdir=args.outdir, suffix=args.suffix,
+                            extension=args.extension, profiles=profiles)
+    jobs = iter_image_paths(args.sources, args.recursive)
+    failures = []
+    # Results are reported in the order of the source files, regardless of the order in which the workers finish
+    for (path, relpath), written, error in imap_ordered(job_function, jobs, args.workers, args.max_inflight):
+        if error is not None:
+            failures.append((path, error))
+            print(f"{path}: error: {error}", file=sys.stderr)
+        else:
+            print(f"{path} -> {', '.join(written)}")
+    if args.errors:
+        write_error_report(args.errors, failures)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,27 @@
 import numpy as np
 import cv2 as cv
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Images with fewer pixels are processed in one call, because splitting them into stripes costs more than it saves
+TILING_MIN_PIXELS = 2**20
+
+
+class RowBand:
+    '''
+    A class that represents a band of rows of an image which is not loaded into memory. The neighbourhood operations of
+    this module can be given a band instead of an image array. They read only the rows of the band and the rows around
+    it that the operation needs, and return the rows of the result for the band.
+    '''
+    def __init__(self, read_rows, height, start, stop):
+        # Function returning the array of the image rows from start to stop (exclusive)
+        self.read_rows = read_rows
+        # Image height
+        self.height = height
+        # First row of the band
+        self.start = start
+        # Row following the last row of the band
+        self.stop = stop
 
 
 def smooth_avarage(image, bordertype_code, border_param=0):
@@ -7,16 +29,14 @@ def smooth_avarage(image, bordertype_code, border_param=0):
     Performs an averaging smoothing operation on the image.
 
     Args:
-        image (Array): Array representing image.
+        image (Array/RowBand): Array representing image or a band of rows of the image.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
     
     Returns:
         Array: Image array.
     '''
-    image = _prepare_border(image, bordertype_code, 1, border_param)
-    ret_image = cv.blur(image, (3,3))
-    ret_image = _remove_border(ret_image, bordertype_code, 1, border_param)
+    ret_image = _filter_extended(image, lambda frame: cv.blur(frame, (3,3)), 1, 1, bordertype_code, border_param)
     return ret_image
 
 
@@ -25,7 +45,7 @@ def smooth_weighted_avarage(image, param_k, bordertype_code, border_param=0):
     Performs a weighted averaging smoothing operation on the image.
 
     Args:
-        image (Array): Array representing image.
+        image (Array/RowBand): Array representing image or a band of rows of the image.
         param_k (int): Parameter k for smoothing mask.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
@@ -43,7 +63,7 @@ def smooth_gaussian(image, bordertype_code, border_param=0):
     Performs a gaussian smoothing operation on the image.
 
     Args:
-        image (Array): Array representing image.
+        image (Array/RowBand): Array representing image or a band of rows of the image.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
     
@@ -60,7 +80,7 @@ def median_blur(image, mask_size, bordertype_code, border_param=0):
     Performs a median blur operation on the image.
 
     Args:
-        image (Array): Array representing image.
+        image (Array/RowBand): Array representing image or a band of rows of the image.
         mask_size (int): Size of the squared median mask.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
@@ -68,9 +88,9 @@ def median_blur(image, mask_size, bordertype_code, border_param=0):
     Returns:
         Array: Image array.
     '''
-    image = _prepare_border(image, bordertype_code, mask_size // 2, border_param)
-    ret_image = cv.medianBlur(image, mask_size)
-    ret_image = _remove_border(ret_image, bordertype_code, mask_size // 2, border_param)
+    radius = mask_size // 2
+    ret_image = _filter_extended(image, lambda frame: cv.medianBlur(frame, mask_size), radius, radius, 
+                                bordertype_code, border_param)
     return ret_image
 
 
@@ -79,7 +99,7 @@ def sharpen_laplacian(image, mask_index, bordertype_code, border_param=0):
     Performs a laplacian sharpening operation on the image.
 
     Args:
-        image (Array): Array representing image.
+        image (Array/RowBand): Array representing image or a band of rows of the image.
         mask_index (int): Index of the mask in the list of available masks.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
@@ -100,7 +120,7 @@ def edgedetection_Sobel_mask(image, mask_code, bordertype_code, border_param=0):
     Performs a edge detection operation according to Sobel's mask on the image.
 
     Args:
-        image (Array): Array representing image.
+        image (Array/RowBand): Array representing image or a band of rows of the image.
         mask_code (str): String representing the direction of the Sobel's mask.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
@@ -126,16 +146,15 @@ def edgedetection_Sobel_operator(image, bordertype_code, border_param=0):
     Performs a edge detection operation using the Sobel's operator on the image.
 
     Args:
-        image (Array): Array representing image.
+        image (Array/RowBand): Array representing image or a band of rows of the image.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
     
     Returns:
         Array: Image array.
     '''
-    image = _prepare_border(image, bordertype_code, 1, border_param)
-    ret_image = cv.Sobel(image, ddepth=-1, dx=1, dy=1)
-    ret_image = _remove_border(ret_image, bordertype_code, 1, border_param)
+    ret_image = _filter_extended(image, lambda frame: cv.Sobel(frame, ddepth=-1, dx=1, dy=1), 1, 1, 
+                                bordertype_code, border_param)
     return ret_image
 
 
@@ -144,7 +163,7 @@ def edgedetection_Prewitt_operator(image, bordertype_code, border_param=0):
     Performs a edge detection operation using the Prewitt's operator on the image.
 
     Args:
-        image (Array): Array representing image.
+        image (Array/RowBand): Array representing image or a band of rows of the image.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
     
@@ -154,15 +173,14 @@ def edgedetection_Prewitt_operator(image, bordertype_code, border_param=0):
     maskX = np.array([[1,0,-1],[1,0,-1],[1,0,-1]])
     maskY = np.array([[1,1,1],[0,0,0],[-1,-1,-1]])
 
-    ret_image = np.zeros_like(image)
-    height, width = np.shape(ret_image)
-
-    gradientX = _filter2d_extended(image, maskX, bordertype_code, border_param)
-    gradientY = _filter2d_extended(image, maskY, bordertype_code, border_param)
+    def gradient_magnitude(frame):
+        # Gradients are computed as floats, so negative responses are not clipped before computing the magnitude
+        gradientX = cv.filter2D(frame, ddepth=cv.CV_32F, kernel=maskX)
+        gradientY = cv.filter2D(frame, ddepth=cv.CV_32F, kernel=maskY)
+        # The magnitude is rounded and saturated to the range of uint8
+        return cv.convertScaleAbs(cv.magnitude(gradientX, gradientY))
 
-    for y in range(height):
-        for x in range(width):
-            ret_image[y][x] = (gradientX[y][x]**2 + gradientY[y][x]**2)**(1/2)
+    ret_image = _filter_extended(image, gradient_magnitude, 1, 1, bordertype_code, border_param)
     return ret_image
 
 
@@ -180,6 +198,7 @@ def edgedetection_Canny_operator(image, tshd1, tshd2, bordertype_code, border_pa
     Returns:
         Array: Image array.
     '''
+    # Hysteresis links edges across the whole image, so Canny's operator cannot be split into stripes
     image = _prepare_border(image, bordertype_code, 1, border_param)
     ret_image = cv.Canny(image, threshold1=tshd1, threshold2=tshd2, L2gradient=True)
     ret_image = _remove_border(ret_image, bordertype_code, 1, border_param)
@@ -191,7 +210,7 @@ def _filter2d_extended(image, kernel, bordertype_code, border_param):
     Convolves an image with the kernel. Margins are handled according to the specified method.
 
     Args:
-        image (Array): Array representing image.
+        image (Array/RowBand): Array representing image or a band of rows of the image.
         kernel (Array): Array representing kernel.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
@@ -199,9 +218,8 @@ def _filter2d_extended(image, kernel, bordertype_code, border_param):
     Returns:
         Array: Image array.
     '''
-    ret_image = _prepare_border(image, bordertype_code, 1, border_param)
-    ret_image = cv.filter2D(ret_image, ddepth=-1, kernel=kernel)
-    ret_image = _remove_border(ret_image, bordertype_code, 1, border_param)
+    ret_image = _filter_extended(image, lambda frame: cv.filter2D(frame, ddepth=-1, kernel=kernel), 1, 1, 
+                                bordertype_code, border_param)
     return ret_image
 
 
@@ -210,7 +228,7 @@ def morph_erode(image, struct_elem_type, bordertype_code, border_param):
     Performs a morphology erode operation on the image.
 
     Args:
-        image (Array): Array representing binary image.
+        image (Array/RowBand): Array representing binary image or a band of rows of the image.
         struct_elem_type (int): Shape code of the structuring element. See _morph_operation() for the available types.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
@@ -226,7 +244,7 @@ def morph_dilate(image, struct_elem_type, bordertype_code, border_param):
     Performs a morphology dilate operation on the image.
 
     Args:
-        image (Array): Array representing binary image.
+        image (Array/RowBand): Array representing binary image or a band of rows of the image.
         struct_elem_type (int): Shape code of the structuring element. See _morph_operation() for the available types.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
@@ -242,7 +260,7 @@ def morph_open(image, struct_elem_type, bordertype_code, border_param):
     Performs a morphological opening operation on the image.
 
     Args:
-        image (Array): Array representing binary image.
+        image (Array/RowBand): Array representing binary image or a band of rows of the image.
         struct_elem_type (int): Shape code of the structuring element. See _morph_operation() for the available types.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
@@ -258,7 +276,7 @@ def morph_close(image, struct_elem_type, bordertype_code, border_param):
     Performs a morphological closing operation on the image.
 
     Args:
-        image (Array): Array representing binary image.
+        image (Array/RowBand): Array representing binary image or a band of rows of the image.
         struct_elem_type (int): Shape code of the structuring element. See _morph_operation() for the available types.
         bordertype_code (str): String representing border type. See _prepare_border() for the available types.
         border_param (int): Parameter value for border types requiring parameter.
@@ -274,7 +292,7 @@ def _morph_operation(image, operation, struct_elem_type, bordertype_code, border
     Performs a morphology operation on the image.
 
     Args:
-        image (Array): Array representing binary image.
+        image (Array/RowBand): Array representing binary image or a band of rows of the image.
         operation (int): Morphology operation code.
         struct_elem_type (int): Shape code of the structuring element.
             0: Cross
@@ -287,9 +305,80 @@ def _morph_operation(image, operation, struct_elem_type, bordertype_code, border
     '''
     structuring_elem_shape = cv.MORPH_RECT if struct_elem_type else cv.MORPH_CROSS
     structuring_elem = cv.getStructuringElement(structuring_elem_shape, (3,3))
-    ret_image = _prepare_border(image, bordertype_code, 1, border_param)
-    ret_image = cv.morphologyEx(ret_image, operation, structuring_elem)
-    ret_image = _remove_border(ret_image, bordertype_code, 1, border_param)
+    # Opening and closing apply two 3x3 operations, so every output pixel depends on the pixels up to 2 rows away
+    ret_image = _filter_extended(image, lambda frame: cv.morphologyEx(frame, operation, structuring_elem), 1, 2, 
+                                bordertype_code, border_param)
+    return ret_image
+
+
+def _filter_extended(image, function, size, halo, bordertype_code, border_param):
+    '''
+    Applies the neighbourhood operation to the image. Margins are handled according to the specified method.
+
+    Args:
+        image (Array/RowBand): Array representing image or a band of rows of the image.
+        function (function(Array)): Operation applied to the image with margins. See _apply_tiled().
+        size (int): Border size.
+        halo (int): Maximum distance in rows between an output pixel and the input pixels it depends on.
+        bordertype_code (str): String representing border type. See _prepare_border() for the available types.
+        border_param (int): Parameter value for border types requiring parameter.
+
+    Returns:
+        Array: Image array. For a band of rows only the rows of the band are returned.
+    '''
+    if isinstance(image, RowBand):
+        frame, frame_start = _prepare_band_border(image, bordertype_code, size, halo, border_param)
+        ret_image = _apply_tiled(function, frame, halo)
+        first_row = image.start + size - frame_start
+        ret_image = ret_image[first_row:first_row + (image.stop - image.start)]
+        return _remove_band_border(ret_image, image, bordertype_code, size, border_param)
+    ret_image = _prepare_border(image, bordertype_code, size, border_param)
+    ret_image = _apply_tiled(function, ret_image, halo)
+    ret_image = _remove_border(ret_image, bordertype_code, size, border_param)
+    return ret_image
+
+
+def _apply_tiled(function, image, halo):
+    '''
+    Applies the neighbourhood operation to the image split into horizontal stripes processed on a pool of threads.
+    OpenCV releases the GIL, so the stripes are processed in parallel.
+
+    Every stripe is extended by halo rows of its neighbours and only its own rows are kept from the result, so they are
+    computed from the same pixels as in a single call over the whole image. Stripes are not extended beyond the image,
+    so the edges of the image are handled by OpenCV in the same way. The result is identical to function(image).
+
+    Args:
+        function (function(Array)): Operation returning an array of the same height as its argument. Every output pixel
+        can depend only on the input pixels at most halo rows away.
+        image (Array): Array representing image, usually with margins added by _prepare_border().
+        halo (int): Number of rows added to each side of the stripes.
+
+    Returns:
+        Array: Image array.
+    '''
+    rows = image.shape[0]
+    workers = cv.getNumThreads()
+    # Stripes much thinner than the halo would mostly process the rows of their neighbours
+    stripe_rows = max(-(-rows // max(workers, 1)), 4 * halo, 1)
+    if workers < 2 or image.shape[0] * image.shape[1] < TILING_MIN_PIXELS or stripe_rows >= rows:
+        return function(image)
+
+    stripes = [(start, min(start + stripe_rows, rows)) for start in range(0, rows, stripe_rows)]
+
+    def process_stripe(stripe):
+        start, stop = stripe
+        halo_start = max(start - halo, 0)
+        halo_stop = min(stop + halo, rows)
+        result = function(image[halo_start:halo_stop])
+        return result[start - halo_start:stop - halo_start]
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(stripes))) as executor:
+        results = executor.map(process_stripe, stripes)
+        ret_image = None
+        for (start, stop), result in zip(stripes, results):
+            if ret_image is None:
+                ret_image = np.empty((rows,) + result.shape[1:], dtype=result.dtype)
+            ret_image[start:stop] = result
     return ret_image
 
 
@@ -310,17 +399,86 @@ def _prepare_border(image, typecode, size, param):
     Returns:
         Array: Image array.
     '''
-    if typecode == "const":
-        ret_image = cv.copyMakeBorder(image, size, size, size, size, borderType=cv.BORDER_CONSTANT, value=param)
-    elif typecode == "reflect":
-        ret_image = cv.copyMakeBorder(image, size, size, size, size, borderType=cv.BORDER_REFLECT)
-    elif typecode == "wrap":
-        ret_image = cv.copyMakeBorder(image, size, size, size, size, borderType=cv.BORDER_WRAP)
+    bordertype = _get_bordertype(typecode)
+    if bordertype == cv.BORDER_CONSTANT:
+        ret_image = cv.copyMakeBorder(image, size, size, size, size, borderType=bordertype, value=param)
     else:
-        ret_image = cv.copyMakeBorder(image, size, size, size, size, borderType=cv.BORDER_DEFAULT)
+        ret_image = cv.copyMakeBorder(image, size, size, size, size, borderType=bordertype)
     return ret_image
 
 
+def _prepare_band_border(band, typecode, size, halo, param):
+    '''
+    Builds the part of the image with margins needed to compute the rows of the band. It contains the rows of the band,
+    the halo rows around them and the margin rows at the edges of the image, which are read from the rows of the image
+    according to the border type. The result equals the same rows of _prepare_border() applied to the whole image.
+
+    Args:
+        band (RowBand): Band of image rows.
+        typecode (str): String representing border (margin) type. See _prepare_border() for the available types.
+        size (int): Border size.
+        halo (int): Number of rows added to each side of the band.
+        param (int): Parameter value for border types requiring parameter.
+
+    Returns:
+        tuple(Array, int): Image array and the index of its first row in the image with margins.
+    '''
+    bordertype = _get_bordertype(typecode)
+    # Rows needed to compute the band, in the coordinates of the image with margins
+    frame_start = max(band.start + size - halo, 0)
+    frame_stop = min(band.stop + size + halo, band.height + 2*size)
+    inner_start = max(frame_start - size, 0)
+    inner_stop = min(frame_stop - size, band.height)
+    parts = []
+    for row in range(frame_start - size, min(0, frame_stop - size)):
+        parts.append(_read_border_row(band, row, bordertype, param))
+    if inner_start < inner_stop:
+        parts.append(band.read_rows(inner_start, inner_stop))
+    for row in range(max(band.height, frame_start - size), frame_stop - size):
+        parts.append(_read_border_row(band, row, bordertype, param))
+    frame = np.concatenate(parts) if len(parts) > 1 else parts[0]
+    # Margins on the left and right side depend only on the row itself
+    if bordertype == cv.BORDER_CONSTANT:
+        frame = cv.copyMakeBorder(frame, 0, 0, size, size, borderType=bordertype, value=param)
+    else:
+        frame = cv.copyMakeBorder(frame, 0, 0, size, size, borderType=bordertype)
+    return (frame, frame_start)
+
+
+def _read_border_row(band, row, bordertype, param):
+    '''
+    Reads the margin row lying outside of the image according to the border type.
+
+    Args:
+        band (RowBand): Band of image rows.
+        row (int): Index of the row. It is negative or not less than the image height.
+        bordertype (int): OpenCV border type.
+        param (int): Parameter value for border types requiring parameter.
+
+    Returns:
+        Array: Image array with one row.
+    '''
+    src_row = cv.borderInterpolate(row, band.height, bordertype)
+    if src_row < 0:
+        # The constant row is made by OpenCV, so the value is assigned to the channels as in _prepare_border()
+        return cv.copyMakeBorder(band.read_rows(0, 1), 1, 0, 0, 0, borderType=bordertype, value=param)[:1]
+    return band.read_rows(src_row, src_row + 1)
+
+
+def _get_bordertype(typecode):
+    '''
+    Returns the OpenCV border type for the border type code.
+
+    Args:
+        typecode (str): String representing border (margin) type. See _prepare_border() for the available types.
+
+    Returns:
+        int: OpenCV border type.
+    '''
+    bordertypes = {"const": cv.BORDER_CONSTANT, "reflect": cv.BORDER_REFLECT, "wrap": cv.BORDER_WRAP}
+    return bordertypes.get(typecode, cv.BORDER_DEFAULT)
+
+
 def _remove_border(image, typecode, size, param):
     '''
     Removes margins from the image. Completes image margin processing if the border type requires it.
@@ -340,6 +498,30 @@ def _remove_border(image, typecode, size, param):
     return ret_image
 
 
+def _remove_band_border(image, band, typecode, size, param):
+    '''
+    Removes the left and right margins from the band of rows. Completes margin processing if the border type requires 
+    it, filling only the rows that lie at the edges of the whole image.
+
+    Args:
+        image (Array): Array representing the rows of the band with the left and right margins.
+        band (RowBand): Band of image rows.
+        typecode (str): String representing border (margin) type. See _prepare_border() for the available types.
+        size (int): Border size.
+        param (int): Parameter value for border types requiring parameter.
+
+    Returns:
+        Array: Image array.
+    '''
+    ret_image = image[:, size:(-1)*size]
+    if typecode == "const_result":
+        ret_image[:max(size - band.start, 0)] = param
+        ret_image[max(band.height - size - band.start, 0):] = param
+        ret_image[:, 0:size] = param
+        ret_image[:, (-1)*size:] = param
+    return ret_image
+
+
 def _add_const_border(image, size, value):
     '''
     Adds a border to the image. The pixels at the edges of the image are filled with the specified value.
@@ -1,12 +1,16 @@
-from PIL import Image, ImageTk
+from PIL import Image
 import numpy as np
 import cv2 as cv
 import apoconv_morph as cm
+from apoio import open_memmap
+from apopyramid import (PYRAMID_CACHE, is_pyramid_factor, get_pyramid_source_factor, get_resized_size, resize_array,
+                        resample_region)
 
 
 def getimage(path):
     '''
-    Opens the image located at the given path and returns the image as an object.
+    Opens the image located at the given path and returns the image as an object. NPY files, raw files with a sidecar 
+    header and uncompressed images are memory-mapped, see open_memmap() in module apoio.
 
     Args:
         path (str): Image file path.
@@ -14,6 +18,14 @@ def getimage(path):
     Returns:
         ImageRGB/ImageGrayscale: Image wrapper object.
     '''
+    # Uncompressed files are memory-mapped instead of being decoded, so only the accessed rows are read from the disk
+    source = open_memmap(path)
+    if source is not None:
+        array, mode = source
+        if mode == "RGB":
+            return ImageRGB(array, path)
+        return ImageGrayscale(array, path)
+
     try:
         image = Image.open(path)
     except:
@@ -28,12 +40,63 @@ def getimage(path):
         return None
 
 
-# Dictionary containing values for conversion from RGB to Grayscale image
-RGB2GRAY_CONVERSION_LUT = {"red":[0] * 256, "green":[0] * 256, "blue":[0] * 256}
-for i in range(1, 256):
-    RGB2GRAY_CONVERSION_LUT["red"][i] = 0.31 * i 
-    RGB2GRAY_CONVERSION_LUT["green"][i] = 0.52 * i
-    RGB2GRAY_CONVERSION_LUT["blue"][i] = 0.17 * i
+# Names of the features calculated by ImageGrayscale.analyze(), in the order of its arguments
+ANALYSIS_FEATURES = ["Area", "Circuit", "Shape factor W1", "Shape factor W2", "Shape factor W3", "Shape factor W9", 
+                    "Solidity (W10)", "Equivalent Diameter (W11)", "Moment M1", "Moment M2", "Moment M3"]
+
+
+# Dictionary containing weights of the red, green and blue channel for conversion from RGB to Grayscale image
+RGB2GRAY_WEIGHTS = {"default": (0.31, 0.52, 0.17),
+                    "bt601": (0.299, 0.587, 0.114),
+                    "bt709": (0.2126, 0.7152, 0.0722)}
+
+# Dictionary containing values for conversion from RGB to Grayscale image. Every weighting has an array of the shape 
+# (3, 256) with the values for the red, green and blue channel.
+RGB2GRAY_CONVERSION_LUT = {weighting: np.outer(weights, np.arange(256)) for weighting, weights in RGB2GRAY_WEIGHTS.items()}
+
+
+def compute_histogram_range(histogram, cutoff=0):
+    '''
+    Returns the range of pixel values of all channels of the histogram. The given fraction of pixels is cut off from both 
+    sides of the histogram when calculating the range.
+
+    Args:
+        histogram (Array): Histogram as the array of the shape (number of channels, M).
+        cutoff (float): Fraction of pixels which will be cut off from both sides. With 0 the range is from 
+        the minimum to the maximum pixel value.
+
+    Returns:
+        tuple[(int, int)]: Tuple of (minval, maxval) pairs, one pair for each channel.
+    '''
+    lower_sums = np.cumsum(histogram, axis=1)
+    upper_sums = np.cumsum(histogram[:, ::-1], axis=1)
+    val_treshold = round(int(lower_sums[0, -1]) * cutoff)
+    minvals = np.argmax(lower_sums > val_treshold, axis=1)
+    maxvals = (histogram.shape[1] - 1) - np.argmax(upper_sums > val_treshold, axis=1)
+    return tuple((int(minval), int(maxval)) for minval, maxval in zip(minvals, maxvals))
+
+
+def treshold_range(pixels, tshd1, tshd2, out=None):
+    '''
+    Performs thresholding with two thresholds on the 8-bit image in a single pass. Pixels with values from the first to 
+    the second threshold (inclusive) take the value 255 and other pixels take the value 0.
+
+    Args:
+        pixels (Array): Image array of the uint8 type.
+        tshd1 (int): Value of the first threshold.
+        tshd2 (int): Value of the second threshold.
+        out (Array): Array of the uint8 type and the image shape in which the result is stored. It allows reusing one 
+        buffer for repeated thresholding, e.g. in previews. A new array is created by default.
+
+    Returns:
+        Array: Image array. It is the out array if it is given.
+    '''
+    if out is None:
+        return cv.inRange(pixels, tshd1, tshd2)
+    if out.dtype != np.uint8 or out.shape != pixels.shape[:2] or not out.flags.c_contiguous or not out.flags.writeable:
+        raise ValueError("Output array must be a writable uint8 array of the image shape")
+    cv.inRange(pixels, tshd1, tshd2, dst=out)
+    return out
 
 
 #////////////////////////////
@@ -41,44 +104,96 @@ for i in range(1, 256):
 #//////////////////////////// 
 class ImageBase:
     '''
-    A base class for an image wrapper classes
+    A base class for an image wrapper classes. The image can be given either as a Pillow image object or as a numpy array.
     '''
     def __init__(self, image, filename=None):
-        # Pillow image  object
-        self.__image = image
-        # Image size - (width, height)
-        self.size = image.size
+        if isinstance(image, np.ndarray):
+            # Numpy array with the image pixels. If it is given, it is the primary representation of the image. Strided
+            # arrays (e.g. memory-mapped bottom-up or BGR rows) are kept as they are, so the pixels are not read until used.
+            # Only the view of the array is made read-only, the array of the caller stays writable
+            self.__array = image.view()
+            self.__array.flags.writeable = False
+            # Pillow image object. It is created from the array when it is needed
+            self.__image = None
+            # Image size - (width, height)
+            self.size = (image.shape[1], image.shape[0])
+        else:
+            self.__array = None
+            self.__image = image
+            self.size = image.size
         # Image file name
         if filename is None:
-            self.filename = image.filename
+            self.filename = getattr(image, "filename", "")
         else:
             self.filename = filename
+        # Key of the pyramid levels of the image in PYRAMID_CACHE
+        self.__pyramid_key = PYRAMID_CACHE.new_owner_key()
+        # Cache of data (image array, histograms) computed for the image object stored as the cache key
+        self.__cache = {}
+        self.__cache_key = None
     # Image mode given by Pillow
     @property
     def internalmode(self):
-        return self.__image.mode
-    # Image as the numpy array
+        if self.__array is None:
+            return self.__image.mode
+        elif self.__array.dtype == np.bool_:
+            return "1"
+        return "L" if self.__array.ndim == 2 else "RGB"
+    # Image as the read-only numpy array. The array is created once and shared until the image changes
+    @property
+    def imageview(self):
+        if self.__array is not None:
+            return self.__array
+        return self.__cached("array", lambda: np.asarray(self.__image))
+    # Image as the read-only numpy array ready for display (8-bit grayscale or RGB). Binary images are converted once and 
+    # the result is shared until the image changes
+    @property
+    def displayview(self):
+        array = self.imageview
+        if array.dtype != np.bool_:
+            return array
+        return self.__cached("display", lambda: np.where(array, np.uint8(255), np.uint8(0)))
+    # Image as the writable numpy array. Every access returns a new copy of the image
     @property
     def imagearray(self):
-        return np.array(self.__image)
+        return self.imageview.copy()
+    # Image as the Pillow image object. For the images stored as the numpy array it is created on the first use
+    @property
+    def __pillowimage(self):
+        if self.__image is None:
+            self.__image = Image.fromarray(self.__array)
+        return self.__image
 
-    def getphotoimage(self):
+    def getphotoimage(self, box=None, factor=1):
         '''
-        Converts the image to a PhotoImage object.
+        Converts the image or its region to a PhotoImage object. The display buffer is passed to Tk as PGM/PPM data, 
+        which Tk reads directly, without the conversion of Pillow images pixel by pixel.
+
+        Args:
+            box (tuple(int, int, int, int)): Region of the resized image - (left, upper, right, lower). The whole image is 
+            converted by default.
+            factor (float): Resize factor. Only the region is resampled, see zoom_region().
 
         Returns:
             PhotoImage: Image converted to PhotoImage object.
         '''
-        return ImageTk.PhotoImage(self.__image)
+        # PhotoImage is imported here, so the module can be used without tkinter
+        from tkinter import PhotoImage
+        if box is None:
+            box = (0, 0) + get_resized_size(self.size, factor)
+        pixels = self.zoom_region(factor, box)
+        magic = b"P5" if pixels.ndim == 2 else b"P6"
+        header = b"%s\n%d %d\n255\n" % (magic, pixels.shape[1], pixels.shape[0])
+        return PhotoImage(data=header + np.ascontiguousarray(pixels).tobytes(), format="PPM")
     
     def duplicate(self):
         '''
         Duplicates the image.
 
         Returns:
-            Image: Image duplicate as Pillow image object.
+            Array: Image duplicate as the numpy array.
         '''
-        return Image.fromarray(self.imagearray)
+        return self.imagearray
 
     def resize(self, factor):
         '''
@@ -90,7 +205,167 @@ class ImageBase:
         Returns:
             Image: Resized image as a Pillow image object.
         '''
-        return self.__image.resize((round(self.size[0]*factor), round(self.size[1]*factor)))
+        return self.__pillowimage.resize((round(self.size[0]*factor), round(self.size[1]*factor)))
+
+    def zoom(self, factor):
+        '''
+        Resizes the image for display. Results are served from the pyramid of the image: levels for the powers of two 
+        and for the zoom factors are built lazily, every level from the next larger one, and kept in PYRAMID_CACHE. Other 
+        factors take one resampling of the nearest larger level. Levels are built from the display buffer (see 
+        displayview), so they are ready for display and binary images are given in 8-bit grayscale.
+
+        Args:
+            factor (float): Resize factor.
+
+        Returns:
+            Array: Read-only resized display array.
+        '''
+        size = get_resized_size(self.size, factor)
+        if size == self.size:
+            return self.displayview
+        if is_pyramid_factor(factor):
+            return self.__pyramid_level(factor)
+        return resize_array(self.__pyramid_level(get_pyramid_source_factor(factor)), size)
+
+    def zoom_region(self, factor, box):
+        '''
+        Resizes the region of the image for display. Only the pixels of the region are resampled, so displaying an enlarged
+        image tile by tile never holds the whole enlarged image. Regions of the reductions to the pyramid levels are cut
+        from the cached levels (see zoom()). For other factors the nearest level not smaller than the factor, or the image
+        itself for enlargements, is interpolated linearly.
+
+        Args:
+            factor (float): Resize factor.
+            box (tuple(int, int, int, int)): Region of the resized image - (left, upper, right, lower).
+
+        Returns:
+            Array: Read-only display array of the region.
+        '''
+        left, upper, right, lower = box
+        size = get_resized_size(self.size, factor)
+        if size == self.size:
+            return self.displayview[upper:lower, left:right]
+        if is_pyramid_factor(factor):
+            return self.__pyramid_level(factor)[upper:lower, left:right]
+        return resample_region(self.__pyramid_level(get_pyramid_source_factor(factor)), size, box)
+
+    def histogram_array(self):
+        '''
+        Returns the histograms of all image channels. The result is computed once and cached until the image changes.
+        histogram() of the subclasses returns the same values as lists.
+
+        Returns:
+            Array: Read-only histogram as the int64 array of the shape (number of channels, M).
+        '''
+        return self.__cached("histogram", self.__compute_histogram)
+
+    def histogram_cdf(self):
+        '''
+        Returns the cumulative histograms of all image channels. The result is cached until the image changes.
+
+        Returns:
+            Array: Read-only cumulative histogram as the int64 array of the shape (number of channels, M).
+        '''
+        return self.__cached("cdf", lambda: np.cumsum(self.histogram_array(), axis=1))
+
+    def histogram_range(self, cutoff=0):
+        '''
+        Returns the range of pixel values of all image channels. The given fraction of pixels is cut off from both sides 
+        of the histogram when calculating the range. The result is cached until the image changes.
+
+        Args:
+            cutoff (float): Fraction of pixels which will be cut off from both sides. With 0 the range is from 
+            the minimum to the maximum pixel value.
+
+        Returns:
+            tuple[(int, int)]: Tuple of (minval, maxval) pairs, one pair for each channel.
+        '''
+        return self.__cached(("range", cutoff), lambda: compute_histogram_range(self.histogram_array(), cutoff))
+
+    def histogram_extremes(self):
+        '''
+        Returns the smallest and the largest count in the histograms of all image channels. The result is cached until 
+        the image changes.
+
+        Returns:
+            tuple[(int, int)]: Tuple of (mincount, maxcount) pairs, one pair for each channel.
+        '''
+        return self.__cached("extremes", lambda: tuple((int(channel_hist.min()), int(channel_hist.max())) 
+                                                        for channel_hist in self.histogram_array()))
+
+    def invalidate_cache(self):
+        '''
+        Drops the cached data (image array, histograms and pyramid levels). It should be called whenever the image buffer 
+        changes.
+        '''
+        self.__cache = {}
+        self.__cache_key = None
+        PYRAMID_CACHE.discard(self.__pyramid_key)
+
+    def __pyramid_level(self, factor):
+        '''
+        Returns the level of the image pyramid. The level is resampled from the next larger level if it is not cached.
+
+        Args:
+            factor (float): Resize factor of the level. 1 means the image itself.
+
+        Returns:
+            Array: Read-only level array.
+        '''
+        if factor == 1:
+            return self.displayview
+        level = PYRAMID_CACHE.get(self.__pyramid_key, factor)
+        if level is None:
+            source = self.__pyramid_level(get_pyramid_source_factor(factor))
+            level = resize_array(source, get_resized_size(self.size, factor))
+            PYRAMID_CACHE.put(self.__pyramid_key, factor, level)
+        return level
+
+    def __cached(self, key, compute):
+        '''
+        Returns the cached value for the given key. The value is computed and stored if it is not in the cache. 
+        The cache is dropped if the image object (the numpy array or the Pillow image) has been replaced.
+
+        Args:
+            key (str/tuple): Cache key.
+            compute (function()): Function that computes the value.
+
+        Returns:
+            Cached value. Arrays are returned as read-only.
+        '''
+        image_key = id(self.__array if self.__array is not None else self.__image)
+        if self.__cache_key != image_key:
+            self.invalidate_cache()
+            self.__cache_key = image_key
+        if key not in self.__cache:
+            value = compute()
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            self.__cache[key] = value
+        return self.__cache[key]
+
+    def __compute_histogram(self):
+        '''
+        Computes the histograms of all image channels. The image is counted band by band, so the temporary memory 
+        (e.g. binary pixels converted to integers) is bounded by the size of one band.
+
+        Returns:
+            Array: Histogram as the int64 array of the shape (number of channels, M).
+        '''
+        pixels_array = self.imageview
+        width, height = self.size
+        channels = 1 if pixels_array.ndim == 2 else pixels_array.shape[2]
+        histogram = np.zeros((channels, self.M), dtype=np.int64)
+        # cv.calcHist counts in float32, so the bands are small enough to keep the counts exact
+        band_height = max(1, 2**24 // width)
+        for band_start in range(0, height, band_height):
+            band = pixels_array[band_start:band_start+band_height]
+            if band.dtype == np.bool_:
+                band = band.astype(np.uint8)
+            for channel in range(channels):
+                band_hist = cv.calcHist([band], [channel], None, [self.M], [0, self.M])
+                histogram[channel] += band_hist.ravel().astype(np.int64)
+        return histogram
     
     def save(self, filename):
         '''
@@ -100,18 +375,42 @@ class ImageBase:
             filename (str): Image file full name (path).
         '''
         if filename == self.filename:
-            img_tmp = self.__image.copy()
-            self.__image.close()
-            img_tmp.save(filename)
-            self.__image = img_tmp
+            if self.__array is not None:
+                # The array can be memory-mapped from the file, so it is loaded into memory before the file is replaced
+                self.__array = np.array(self.__array)
+                self.__array.flags.writeable = False
+                if self.__image is not None:
+                    self.__image.close()
+                    self.__image = None
+                self.__write(filename)
+            else:
+                img_tmp = self.__pillowimage.copy()
+                self.__image.close()
+                img_tmp.save(filename)
+                self.__image = img_tmp
+            self.invalidate_cache()
         else: 
-            self.__image.save(filename)
+            self.__write(filename)
+
+    def __write(self, filename):
+        '''
+        Writes the image to the file. NPY files are written by numpy and other formats by Pillow.
+
+        Args:
+            filename (str): Image file full name (path).
+        '''
+        if filename.lower().endswith(".npy"):
+            np.save(filename, self.imageview)
+        else:
+            self.__pillowimage.save(filename)
 
     def close(self):
         '''
         Closes the image.
         '''
-        self.__image.close()
+        if self.__image is not None:
+            self.__image.close()
+        self.invalidate_cache()
 
         
 #////////////////////////////
@@ -160,35 +459,49 @@ class ImageRGB(ImageBase):
         '''
         return ImageRGB(super().resize(factor), self.filename)
 
-    def convert(self, trg_mode):
+    def zoom(self, factor):
+        '''
+        Resizes the image for display using the pyramid of the image. See ImageBase.zoom().
+
+        Args:
+            factor (float): Resize factor.
+        
+        Returns:
+            ImageRGB: Resized image for display. Its pixels are shared with the cached pyramid level.
+        '''
+        return ImageRGB(super().zoom(factor), self.filename)
+
+    def convert(self, trg_mode, weighting="default"):
         '''
         Converts the image to the given image mode.
 
         Args:
             trg_mode (str): String representing the image mode.
+            weighting (str): Channel weighting used for conversion to grayscale. See RGB2GRAY_WEIGHTS for the available weightings.
         
         Returns:
             image object of the given type
         '''
-        if trg_mode == "GS": return self.convert_rgb2gray()
+        if trg_mode == "GS": return self.convert_rgb2gray(weighting)
     
-    def convert_rgb2gray(self):
+    def convert_rgb2gray(self, weighting="default"):
         '''
         Converts the RGB image to the grayscale image.
 
+        Args:
+            weighting (str): Channel weighting. See RGB2GRAY_WEIGHTS for the available weightings.
+
         Returns:
             ImageGrayscale: The image in grayscale representation.
         '''
-        pixels_array = self.imagearray
-        width, height = self.size
-        new_array = np.zeros((height, width), dtype=np.uint8)
-        for y in range(height):
-            for x in range(width):
-                red, green, blue = pixels_array[y][x]
-                new_array[y][x] = round(RGB2GRAY_CONVERSION_LUT["red"][red] + 
-                                        RGB2GRAY_CONVERSION_LUT["green"][green] + 
-                                        RGB2GRAY_CONVERSION_LUT["blue"][blue])
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        red_lut, green_lut, blue_lut = RGB2GRAY_CONVERSION_LUT[weighting]
+        pixels_array = self.imageview
+        new_array = red_lut[pixels_array[:, :, 0]]
+        new_array += green_lut[pixels_array[:, :, 1]]
+        new_array += blue_lut[pixels_array[:, :, 2]]
+        # np.rint rounds half to even as the built-in round() does
+        np.rint(new_array, out=new_array)
+        return ImageGrayscale(new_array.astype(np.uint8), self.filename)
 
     def histogram(self):
         '''
@@ -197,19 +510,7 @@ class ImageRGB(ImageBase):
         Returns:
             list[[int] [int] [int]]: Histogram.
         '''
-        pixels_array = self.imagearray
-        width, height = self.size
-        r_hist = [0] * self.M
-        g_hist = [0] * self.M
-        b_hist = [0] * self.M
-        histogram = (r_hist, g_hist, b_hist) 
-
-        for y in range(height):
-            for x in range(width):
-                pixel = pixels_array[y][x]
-                for hist, value in zip(histogram, pixel):
-                    hist[value] += 1
-        return histogram
+        return tuple(channel_hist.tolist() for channel_hist in self.histogram_array())
 
     #///////// Convolution operations /////////
     def smooth_avarage(self, bordertype_code, border_param=0):
@@ -224,8 +525,8 @@ class ImageRGB(ImageBase):
         Returns:
             ImageRGB: Result image of applying the operation.
         '''
-        ret_image = cm.smooth_avarage(self.imagearray, bordertype_code, (border_param)*3)
-        return ImageRGB(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.smooth_avarage(self.imageview, bordertype_code, (border_param)*3)
+        return ImageRGB(ret_image, self.filename)
     
     def smooth_weighted_avarage(self, param_k, bordertype_code, border_param=0):
         '''
@@ -240,8 +541,8 @@ class ImageRGB(ImageBase):
         Returns:
             ImageRGB: Result image of applying the operation.
         '''
-        ret_image = cm.smooth_weighted_avarage(self.imagearray, param_k, bordertype_code, (border_param)*3)
-        return ImageRGB(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.smooth_weighted_avarage(self.imageview, param_k, bordertype_code, (border_param)*3)
+        return ImageRGB(ret_image, self.filename)
     
     def smooth_gaussian(self, bordertype_code, border_param=0):
         '''
@@ -255,8 +556,8 @@ class ImageRGB(ImageBase):
         Returns:
             ImageRGB: Result image of applying the operation.
         '''
-        ret_image = cm.smooth_gaussian(self.imagearray, bordertype_code, (border_param)*3)
-        return ImageRGB(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.smooth_gaussian(self.imageview, bordertype_code, (border_param)*3)
+        return ImageRGB(ret_image, self.filename)
 
     def median_blur(self, mask_size, bordertype_code, border_param=0):
         '''
@@ -271,8 +572,8 @@ class ImageRGB(ImageBase):
         Returns:
             ImageRGB: Result image of applying the operation.
         '''
-        ret_image = cm.median_blur(self.imagearray, mask_size, bordertype_code, (border_param)*3)
-        return ImageRGB(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.median_blur(self.imageview, mask_size, bordertype_code, (border_param)*3)
+        return ImageRGB(ret_image, self.filename)
     
     def sharpen_laplacian(self, mask_index, bordertype_code, border_param=0):
         '''
@@ -287,8 +588,8 @@ class ImageRGB(ImageBase):
         Returns:
             ImageRGB: Result image of applying the operation.
         '''
-        ret_image = cm.sharpen_laplacian(self.imagearray, mask_index, bordertype_code, (border_param)*3)
-        return ImageRGB(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.sharpen_laplacian(self.imageview, mask_index, bordertype_code, (border_param)*3)
+        return ImageRGB(ret_image, self.filename)
 
     def edgedetection_Sobel_mask(self, mask_code, bordertype_code, border_param=0):
         '''
@@ -303,9 +604,9 @@ class ImageRGB(ImageBase):
         Returns:
             ImageRGB: Result image of applying the operation.
         '''
-        image = cv.cvtColor(self.imagearray, cv.COLOR_RGB2GRAY)
+        image = cv.cvtColor(self.imageview, cv.COLOR_RGB2GRAY)
         ret_image = cm.edgedetection_Sobel_mask(image, mask_code, bordertype_code, (border_param)*3)
-        return ImageRGB(Image.fromarray(cv.cvtColor(ret_image, cv.COLOR_GRAY2RGB)), self.filename)
+        return ImageRGB(cv.cvtColor(ret_image, cv.COLOR_GRAY2RGB), self.filename)
 
     def edgedetection_Sobel_operator(self, bordertype_code, border_param=0):
         '''
@@ -319,9 +620,9 @@ class ImageRGB(ImageBase):
         Returns:
             ImageRGB: Result image of applying the operation.
         '''
-        image = cv.cvtColor(self.imagearray, cv.COLOR_RGB2GRAY)
+        image = cv.cvtColor(self.imageview, cv.COLOR_RGB2GRAY)
         ret_image = cm.edgedetection_Sobel_operator(image, bordertype_code, (border_param)*3)
-        return ImageRGB(Image.fromarray(cv.cvtColor(ret_image, cv.COLOR_GRAY2RGB)), self.filename)
+        return ImageRGB(cv.cvtColor(ret_image, cv.COLOR_GRAY2RGB), self.filename)
 
     def edgedetection_Prewitt_operator(self, bordertype_code, border_param=0):
         '''
@@ -335,9 +636,9 @@ class ImageRGB(ImageBase):
         Returns:
             ImageRGB: Result image of applying the operation.
         '''
-        image = cv.cvtColor(self.imagearray, cv.COLOR_RGB2GRAY)
+        image = cv.cvtColor(self.imageview, cv.COLOR_RGB2GRAY)
         ret_image = cm.edgedetection_Prewitt_operator(image, bordertype_code, (border_param)*3)
-        return ImageRGB(Image.fromarray(cv.cvtColor(ret_image, cv.COLOR_GRAY2RGB)), self.filename)
+        return ImageRGB(cv.cvtColor(ret_image, cv.COLOR_GRAY2RGB), self.filename)
 
     def edgedetection_Canny_operator(self, tshd1, tshd2, bordertype_code, border_param=0):
         '''
@@ -353,9 +654,9 @@ class ImageRGB(ImageBase):
         Returns:
             ImageRGB: Result image of applying the operation.
         '''
-        image = cv.cvtColor(self.imagearray, cv.COLOR_RGB2GRAY)
+        image = cv.cvtColor(self.imageview, cv.COLOR_RGB2GRAY)
         ret_image = cm.edgedetection_Canny_operator(image, tshd1, tshd2, bordertype_code, (border_param)*3)
-        return ImageRGB(Image.fromarray(cv.cvtColor(ret_image, cv.COLOR_GRAY2RGB)), self.filename)
+        return ImageRGB(cv.cvtColor(ret_image, cv.COLOR_GRAY2RGB), self.filename)
 
 
 #////////////////////////////
@@ -422,6 +723,19 @@ class ImageGrayscale(ImageBase):
         '''
         return ImageGrayscale(super().resize(factor), self.filename)
 
+    def zoom(self, factor):
+        '''
+        Resizes the image for display using the pyramid of the image. See ImageBase.zoom().
+
+        Args:
+            factor (float): Resize factor.
+        
+        Returns:
+            ImageGrayscale: Resized image for display. Binary images are given in 8-bit grayscale. Its pixels are shared 
+            with the cached pyramid level.
+        '''
+        return ImageGrayscale(super().zoom(factor), self.filename)
+
     def convert(self, trg_mode):
         '''
         Converts the image to the given image mode.
@@ -443,14 +757,9 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: The image in 8-bit grayscale representation.
         '''
-        pixels_array = self.imagearray
-        width, height = self.size
-        new_array = np.zeros((height, width), dtype=np.uint8)
-        lut = [0, 255]
-        for y in range(height):
-            for x in range(width):
-                new_array[y][x] = lut[pixels_array[y][x]]
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        lut = np.array([0, 255], dtype=np.uint8)
+        new_array = lut[self.imageview.astype(np.uint8, copy=False)]
+        return ImageGrayscale(new_array, self.filename)
     
     def convert_gray2bin(self):
         '''
@@ -468,15 +777,36 @@ class ImageGrayscale(ImageBase):
         Returns:
             list[int]: Histogram.
         '''
-        pixels_array = self.imagearray
-        width, height = self.size
-        histogram = [0] * self.M
+        return self.histogram_array()[0].tolist()
 
-        for y in range(height):
-            for x in range(width):
-                pixel = pixels_array[y][x]
-                histogram[pixel] += 1
-        return histogram
+    def point_operation_lut(self, operation):
+        '''
+        Calculates the Look-Up Table of the point operation by applying the operation to the image containing every pixel 
+        value once. The LUT allows applying the operation to other images cheaply, e.g. to previews, see apply_lut().
+
+        Args:
+            operation (function(ImageGrayscale)): Point operation that takes the image and returns the result image or None.
+
+        Returns:
+            Array: Look-Up Table as the array of result pixel values. None is returned if the operation returns None.
+        '''
+        values = np.arange(self.M).astype(self.imageview.dtype)
+        ret_image = operation(ImageGrayscale(values[np.newaxis, :]))
+        if ret_image is None:
+            return None
+        return ret_image.imageview[0]
+
+    def apply_lut(self, lut):
+        '''
+        Applies the Look-Up Table to the image.
+
+        Args:
+            lut (Array): Look-Up Table as the array of result pixel values. See point_operation_lut().
+
+        Returns:
+            ImageGrayscale: Image after applying the LUT.
+        '''
+        return ImageGrayscale(lut[self.imageview.astype(np.uint8, copy=False)], self.filename)
 
     def negate(self):
         '''
@@ -486,7 +816,7 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Negated image.
         '''
         new_array = self.__point_operation_onearg(self.__get_lut(lambda pixel: self.Lmax - pixel))
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
 
     #///////// Thresholding /////////
     def treshold_binary(self, treshold):
@@ -501,7 +831,7 @@ class ImageGrayscale(ImageBase):
         '''
         lut = [0] * (treshold+1) + [1] * (self.M - treshold-1)
         new_array = self.__point_operation_onearg(lut)
-        return ImageGrayscale(Image.fromarray(new_array.astype(np.bool_)), self.filename)
+        return ImageGrayscale(new_array.astype(np.bool_), self.filename)
 
     def treshold_grayscale(self, treshold):
         '''
@@ -515,25 +845,30 @@ class ImageGrayscale(ImageBase):
         '''
         lut = [self.Lmin] * (treshold+1) + [v for v in range(treshold+1, self.M)]
         new_array = self.__point_operation_onearg(lut)
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
 
-    def treshold_two(self, tshd1, tshd2):
+    def treshold_two(self, tshd1, tshd2, out=None):
         '''
         Performs thresholding with two thresholds on the image.
 
         Args:
             tshd1 (int): Value of the first threshold.
             tshd2 (int): Value of the second threshold.
+            out (Array): Buffer for the result of the grayscale image, see treshold_range(). The returned image shares 
+            the buffer, so the buffer should not be reused while the image is in use.
 
         Returns:
             ImageGrayscale: Grayscale image.
         '''
-        lut = [self.Lmin] * (tshd1) + [self.Lmax] * (tshd2 - tshd1 + 1) + [self.Lmin] * (self.M - tshd2 - 1)
-        new_array = self.__point_operation_onearg(lut)
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        if self.mode == "GS":
+            new_array = treshold_range(self.imageview, tshd1, tshd2, out)
+        else:
+            lut = [self.Lmin] * (tshd1) + [self.Lmax] * (tshd2 - tshd1 + 1) + [self.Lmin] * (self.M - tshd2 - 1)
+            new_array = self.__point_operation_onearg(lut)
+        return ImageGrayscale(new_array, self.filename)
 
     #///////// Segmentation /////////
-    def segmentation_threshold(self, code, *args, adaptivemode=0):
+    def segmentation_threshold(self, code, *args, adaptivemode=0, out=None):
         '''
         Performs the segmentation by thresholding on the image.
 
@@ -548,6 +883,8 @@ class ImageGrayscale(ImageBase):
                 0: mean
                 1: gaussian
             *args: Values of thresholds. Number of threshold values should match the selected thresholding method.
+            out (Array): Buffer for the result of thresholding with two thresholds, see treshold_range(). The returned 
+            image shares the buffer, so the buffer should not be reused while the image is in use.
 
         Returns:
             ImageGrayscale: Segmented image.
@@ -555,22 +892,21 @@ class ImageGrayscale(ImageBase):
         ret_image = None
         treshold = -1
         if code == "bin":
-            treshold, tmp_image = cv.threshold(self.imagearray, args[0], 1, cv.THRESH_BINARY)
+            treshold, tmp_image = cv.threshold(self.imageview, args[0], 1, cv.THRESH_BINARY)
             ret_image = tmp_image.astype(np.bool_)
         elif code == "gray":
-            treshold, ret_image = cv.threshold(self.imagearray, args[0], 0, cv.THRESH_TOZERO)
+            treshold, ret_image = cv.threshold(self.imageview, args[0], 0, cv.THRESH_TOZERO)
         elif code == "2th":
-            treshold, tmp_image1 = cv.threshold(self.imagearray, args[0]-1, 1, cv.THRESH_BINARY)
-            treshold, tmp_image2 = cv.threshold(self.imagearray, args[1], 1, cv.THRESH_BINARY_INV)
-            ret_image = ((tmp_image1 + tmp_image2) - 1) * self.Lmax
+            treshold = float(args[1])
+            ret_image = treshold_range(self.imageview, args[0], args[1], out)
         elif code == "adapt":
             if adaptivemode == 0:
-                ret_image = cv.adaptiveThreshold(self.imagearray, self.Lmax, cv.ADAPTIVE_THRESH_MEAN_C , cv.THRESH_BINARY, 7, 0)
+                ret_image = cv.adaptiveThreshold(self.imageview, self.Lmax, cv.ADAPTIVE_THRESH_MEAN_C , cv.THRESH_BINARY, 7, 0)
             elif adaptivemode == 1:
-                ret_image = cv.adaptiveThreshold(self.imagearray, self.Lmax, cv.ADAPTIVE_THRESH_GAUSSIAN_C , cv.THRESH_BINARY, 7, 0)
+                ret_image = cv.adaptiveThreshold(self.imageview, self.Lmax, cv.ADAPTIVE_THRESH_GAUSSIAN_C , cv.THRESH_BINARY, 7, 0)
         elif code == "otsu":
-            treshold, ret_image = cv.threshold(self.imagearray, 0, self.Lmax, cv.THRESH_BINARY+cv.THRESH_OTSU)
-        return (treshold, ImageGrayscale(Image.fromarray(ret_image), self.filename))
+            treshold, ret_image = cv.threshold(self.imageview, 0, self.Lmax, cv.THRESH_BINARY+cv.THRESH_OTSU)
+        return (treshold, ImageGrayscale(ret_image, self.filename))
 
     #///////// Arithmetic operations with constant integer /////////
     def add_int(self, number, oversaturation=True):
@@ -585,7 +921,7 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Image after applying operation.
         '''
         new_array = self.__arithmetic_int(lambda pixel: pixel + number, oversaturation)
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
 
     def multiply_int(self, number, oversaturation=True):
         '''
@@ -599,7 +935,7 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Image after applying operation.
         '''
         new_array = self.__arithmetic_int(lambda pixel: pixel * number, oversaturation)
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
 
     def divide_int(self, number, oversaturation=True):
         '''
@@ -613,7 +949,7 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Image after applying operation.
         '''
         new_array = self.__arithmetic_int(lambda pixel: pixel / number, oversaturation)
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
     
     #///////// Arithmetic operations between images /////////
     def add_images(self, image, oversaturation):
@@ -628,12 +964,11 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Image after applying operation.
         '''
         if oversaturation:
-            new_array = self.__point_operation_twoargs(image, lambda px1, px2: self.__oversaturation(px1 + px2))
+            new_array = self.__point_operation_twoargs(image, lambda px1, px2: np.clip(px1 + px2, self.Lmin, self.Lmax))
         else:
-            new_array = self.__point_operation_twoargs(image, lambda px1, px2: 
-                                                self.__normalize_pixel(px1, self.Lmin, self.Lmax, trg_uprange=(self.Lmax-self.Lmin)//2) +
-                                                self.__normalize_pixel(px2, self.Lmin, self.Lmax, trg_uprange=(self.Lmax-self.Lmin)//2))
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+            lut = self.__get_lut(lambda pixel: self.__normalize_pixel(pixel, self.Lmin, self.Lmax, trg_uprange=(self.Lmax-self.Lmin)//2))
+            new_array = self.__point_operation_twoargs(image, lambda px1, px2: lut[px1] + lut[px2])
+        return ImageGrayscale(new_array, self.filename)
 
     def subtract_images(self, image):
         '''
@@ -645,8 +980,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Image after applying operation.
         '''
-        new_array = self.__point_operation_twoargs(image, lambda px1, px2: abs(px1 - px2))
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        new_array = self.__point_operation_twoargs(image, lambda px1, px2: np.abs(px1 - px2))
+        return ImageGrayscale(new_array, self.filename)
 
     #///////// Logic operations between images /////////
     def logic_not(self):
@@ -657,7 +992,7 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Image after applying operation.
         '''   
         new_array = self.__point_operation_onearg(self.__get_lut(lambda pixel: self.Lmax ^ pixel))
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
 
     def logic_and(self, mask):
         '''
@@ -670,7 +1005,7 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Image after applying operation.
         '''
         new_array = self.__point_operation_twoargs(mask, lambda px1, px2: px1 & px2)
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
 
     def logic_or(self, mask):
         '''
@@ -683,7 +1018,7 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Image after applying operation.
         '''
         new_array = self.__point_operation_twoargs(mask, lambda px1, px2: px1 | px2)
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
 
     def logic_xor(self, mask):
         '''
@@ -696,7 +1031,7 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Image after applying operation.
         '''
         new_array = self.__point_operation_twoargs(mask, lambda px1, px2: px1 ^ px2)
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
     
     #///////// Histogram stretching /////////
     def hist_linear_stretch(self, rangevalues=None, cutoff=False):
@@ -710,27 +1045,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Image after applying operation.
         '''
-        hist = self.histogram()
-        minval, maxval = (0,0)
-
         if rangevalues is None:
-            if cutoff:
-                val_treshold = round(self.size[0] * self.size[1] * 0.05)
-                sum = 0
-                for minval in range(self.M):
-                    sum += hist[minval]
-                    if sum  > val_treshold:
-                        break
-                sum = 0
-                for maxval in range(self.Lmax, self.Lmin-1, -1):
-                    sum += hist[maxval]
-                    if sum > val_treshold:
-                        break
-            else:
-                for minval in range(self.M):
-                    if hist[minval] > 0: break
-                for maxval in range(self.Lmax, self.Lmin-1, -1):
-                    if hist[maxval] > 0: break
+            minval, maxval = self.histogram_range(0.05 if cutoff else 0)[0]
         else:
             minval, maxval = rangevalues
 
@@ -739,7 +1055,7 @@ class ImageGrayscale(ImageBase):
         
         lut = self.__get_lut(lambda px: self.__normalize_pixel(px, minval, maxval) if minval <= px <= maxval else self.__oversaturation(px, minval, maxval))
         new_array = self.__point_operation_onearg(lut)
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
 
     def hist_gamma_stretch(self, gamma):
         '''
@@ -752,22 +1068,25 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Image after applying operation.
         '''
         new_array = self.__point_operation_onearg(self.__get_lut(lambda pixel: round(self.Lmax * (pixel / self.Lmax)**(1/gamma))))
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
 
-    def hist_equalization(self):
+    def hist_equalization(self, histogram=None):
         '''
         Performs equalization of histogram.
 
+        Args:
+            histogram (list[int]/Array): Histogram used to calculate the LUT. The histogram of the image is used by default.
+            It allows equalizing a part of a larger image according to the histogram of the whole image.
+
         Returns:
             ImageGrayscale: Image after applying operation.
         '''
-        hist = self.histogram()
-        sum_px = self.size[0] * self.size[1]
-
-        for val in range(1, len(hist)):
-            hist[val] += hist[val-1]
-        for val in range(len(hist)):
-            hist[val] /= sum_px
+        if histogram is None:
+            cdf = self.histogram_cdf()[0]
+        else:
+            cdf = np.cumsum(histogram)
+        sum_px = int(cdf[-1])
+        hist = (cdf / sum_px).tolist()
         
         for dst_min in hist:
             if dst_min > 0:
@@ -776,11 +1095,9 @@ class ImageGrayscale(ImageBase):
         if dst_min == 1:
             return self.duplicate(self.filename)
 
-        lut = [0] * self.M
-        for val in range(self.M):
-            lut[val] = self.__normalize_pixel(hist[val], dst_min, 1)
+        lut = self.__get_lut(lambda val: self.__normalize_pixel(hist[val], dst_min, 1))
         new_array = self.__point_operation_onearg(lut)
-        return ImageGrayscale(Image.fromarray(new_array), self.filename)
+        return ImageGrayscale(new_array, self.filename)
 
     #///////// Convolution operations /////////
     def smooth_avarage(self, bordertype_code, border_param=0):
@@ -795,8 +1112,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Result image of applying the operation.
         '''
-        ret_image = cm.smooth_avarage(self.imagearray, bordertype_code, border_param)
-        return ImageGrayscale(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.smooth_avarage(self.imageview, bordertype_code, border_param)
+        return ImageGrayscale(ret_image, self.filename)
     
     def smooth_weighted_avarage(self, param_k, bordertype_code, border_param=0):
         '''
@@ -811,8 +1128,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Result image of applying the operation.
         '''
-        ret_image = cm.smooth_weighted_avarage(self.imagearray, param_k, bordertype_code, border_param)
-        return ImageGrayscale(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.smooth_weighted_avarage(self.imageview, param_k, bordertype_code, border_param)
+        return ImageGrayscale(ret_image, self.filename)
     
     def smooth_gaussian(self, bordertype_code, border_param=0):
         '''
@@ -826,8 +1143,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Result image of applying the operation.
         '''
-        ret_image = cm.smooth_gaussian(self.imagearray, bordertype_code, border_param)
-        return ImageGrayscale(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.smooth_gaussian(self.imageview, bordertype_code, border_param)
+        return ImageGrayscale(ret_image, self.filename)
 
     def median_blur(self, mask_size, bordertype_code, border_param=0):
         '''
@@ -842,8 +1159,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Result image of applying the operation.
         '''
-        ret_image = cm.median_blur(self.imagearray, mask_size, bordertype_code, border_param)
-        return ImageGrayscale(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.median_blur(self.imageview, mask_size, bordertype_code, border_param)
+        return ImageGrayscale(ret_image, self.filename)
     
     def sharpen_laplacian(self, mask_index, bordertype_code, border_param=0):
         '''
@@ -858,8 +1175,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Result image of applying the operation.
         '''
-        ret_image = cm.sharpen_laplacian(self.imagearray, mask_index, bordertype_code, border_param)
-        return ImageGrayscale(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.sharpen_laplacian(self.imageview, mask_index, bordertype_code, border_param)
+        return ImageGrayscale(ret_image, self.filename)
 
     def edgedetection_Sobel_mask(self, mask_code, bordertype_code, border_param=0):
         '''
@@ -874,8 +1191,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Result image of applying the operation.
         '''
-        ret_image = cm.edgedetection_Sobel_mask(self.imagearray, mask_code, bordertype_code, border_param)
-        return ImageGrayscale(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.edgedetection_Sobel_mask(self.imageview, mask_code, bordertype_code, border_param)
+        return ImageGrayscale(ret_image, self.filename)
 
     def edgedetection_Sobel_operator(self, bordertype_code, border_param=0):
         '''
@@ -889,8 +1206,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Result image of applying the operation.
         '''
-        ret_image = cm.edgedetection_Sobel_operator(self.imagearray, bordertype_code, border_param)
-        return ImageGrayscale(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.edgedetection_Sobel_operator(self.imageview, bordertype_code, border_param)
+        return ImageGrayscale(ret_image, self.filename)
 
     def edgedetection_Prewitt_operator(self, bordertype_code, border_param=0):
         '''
@@ -904,8 +1221,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Result image of applying the operation.
         '''
-        ret_image = cm.edgedetection_Prewitt_operator(self.imagearray, bordertype_code, border_param)
-        return ImageGrayscale(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.edgedetection_Prewitt_operator(self.imageview, bordertype_code, border_param)
+        return ImageGrayscale(ret_image, self.filename)
 
     def edgedetection_Canny_operator(self, tshd1, tshd2, bordertype_code, border_param=0):
         '''
@@ -921,8 +1238,8 @@ class ImageGrayscale(ImageBase):
         Returns:
             ImageGrayscale: Result image of applying the operation.
         '''
-        ret_image = cm.edgedetection_Canny_operator(self.imagearray, tshd1, tshd2, bordertype_code, border_param)
-        return ImageGrayscale(Image.fromarray(ret_image), self.filename)
+        ret_image = cm.edgedetection_Canny_operator(self.imageview, tshd1, tshd2, bordertype_code, border_param)
+        return ImageGrayscale(ret_image, self.filename)
 
     #///////// Morphology operations /////////
     def morph_erode(self, struct_code, bordertype_code, border_param=0):
@@ -1013,9 +1330,9 @@ class ImageGrayscale(ImageBase):
             a row of csv file.
             
         '''
-        image = self.imagearray
+        image = self.imageview
         if self.mode != "GS":
-            image = self.convert("GS").imagearray
+            image = self.convert("GS").imageview
         object_contours = cv.findContours(image, cv.RETR_LIST, cv.CHAIN_APPROX_NONE)[0]
         ret_list = []
         for obj_cntr in object_contours:
@@ -1111,29 +1428,28 @@ class ImageGrayscale(ImageBase):
             operation (function(int)): Function that takes one integer argument and returns a value for the LUT.
         
         Returns:
-            list[int]: Look-Up Table.
+            Array: Look-Up Table as the uint8 array. Values are saturated to the range of pixel values.
         '''
-        lut = [0] * self.M
-        for val in range(self.M):
-            lut[val] = operation(val)
-        return lut
+        lut = [operation(val) for val in range(self.M)]
+        return np.clip(lut, self.Lmin, self.Lmax).astype(np.uint8)
 
     def __point_operation_onearg(self, lut):
         '''
         Performs an unary point operation using the LUT.
 
+        The LUT is applied to the whole image at once by indexing the LUT array with the image array.
+
         Args:
-            lut (list[int]): Image Look-Up Table for operation.
+            lut (list[int]/Array): Image Look-Up Table for operation.
 
         Returns:
             Array: Image array.
         '''
-        pixels_array = self.imagearray
-        width, height = self.size
-        for y in range(height):
-            for x in range(width):
-                pixels_array[y][x] = lut[pixels_array[y][x]]
-        return pixels_array
+        pixels_array = self.imageview
+        lut = np.asarray(lut, dtype=np.uint8)
+        # Binary images are stored as boolean arrays, so they are converted to integers for indexing
+        new_array = lut[pixels_array.astype(np.uint8, copy=False)]
+        return new_array.astype(pixels_array.dtype, copy=False)
 
     def __arithmetic_int(self, operation, oversaturation):
         '''
@@ -1146,35 +1462,31 @@ class ImageGrayscale(ImageBase):
         Returns:
             Array: Image array.
         '''
-        lut = [0] * self.M
         if oversaturation: 
-            for val in range(self.M):
-                lut[val] = self.__oversaturation(operation(val))
+            lut = self.__get_lut(lambda val: self.__oversaturation(operation(val)))
         else:
             minval, maxval = operation(self.Lmin), operation(self.Lmax) 
-            for val in range(self.M):
-                lut[val] = self.__normalize_pixel(operation(val), minval, maxval) 
+            lut = self.__get_lut(lambda val: self.__normalize_pixel(operation(val), minval, maxval))
         return self.__point_operation_onearg(lut)
 
     def __point_operation_twoargs(self, other_image, operation):
         '''
         Performs a two arguments point operation on the actual image and the given image.
 
+        The operation is evaluated once for the whole images. Pixel values are passed as int16 arrays, so intermediate 
+        results can exceed the range of pixel values without wrapping around.
+
         Args:
             other_image (ImageGrayscale): Second image.
-            operation (function(int, int)): Function that takes two integer arguments and returns a new pixel value.
+            operation (function(Array, Array)): Function that takes two integer arrays and returns an array of new pixel values.
 
         Returns:
             Array: Image array.
         '''
-        pixels_array_1 = self.imagearray
-        pixels_array_2 = other_image.imagearray
-        pixels_array_ret = np.zeros_like(pixels_array_1)
-        width, height = self.size
-        for y in range(height):
-            for x in range(width):
-                pixels_array_ret[y][x] = operation(int(pixels_array_1[y][x]), int(pixels_array_2[y][x]))
-        return pixels_array_ret
+        pixels_array_1 = self.imageview
+        pixels_array_2 = other_image.imageview
+        new_array = operation(pixels_array_1.astype(np.int16), pixels_array_2.astype(np.int16))
+        return new_array.astype(pixels_array_1.dtype)
 
     def __morphology_operation(self, morph_func, struct_code, bordertype_code, border_param):
         '''
@@ -1192,6 +1504,6 @@ class ImageGrayscale(ImageBase):
             ImageGrayscale: Resulting image.
         '''
         image = self.convert("GS")
-        ret_image = morph_func(image.imagearray, struct_code, bordertype_code, border_param*image.Lmax)
-        return ImageGrayscale(Image.fromarray(ret_image), self.filename).convert("B")
+        ret_image = morph_func(image.imageview, struct_code, bordertype_code, border_param*image.Lmax)
+        return ImageGrayscale(ret_image, self.filename).convert("B")
 
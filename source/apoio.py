@@ -0,0 +1,264 @@
+import json
+import os
+import numpy as np
+from PIL import Image
+
+
+# Extension of the sidecar header of raw files, added to the full name of the raw file
+RAW_HEADER_EXTENSION = ".json"
+
+# Data type and number of channels of the pixels of raw files for every image mode
+RAW_MODES = {"RGB": (np.uint8, 3), "L": (np.uint8, 1), "1": (np.bool_, 1)}
+
+# Number of channels of the raw pixel formats that can be memory-mapped, for Pillow raw modes
+MEMMAP_RAWMODES = {"L": 1, "RGB": 3, "BGR": 3}
+
+
+def open_array(path):
+    '''
+    Opens the image file as the array of pixels. The file is memory-mapped if possible, see open_memmap(). Other files
+    are decoded as a whole by Pillow.
+
+    Args:
+        path (str): Image file path.
+
+    Returns:
+        tuple(Array, str): Image array and the image mode given by Pillow ("RGB", "L" or "1"). None is returned if
+        the file does not exist or has unsupported format.
+    '''
+    source = open_memmap(path)
+    if source is not None:
+        return source
+    try:
+        with Image.open(path) as image:
+            array = np.asarray(image)
+    except Exception:
+        return None
+
+    mode = get_array_mode(array)
+    if mode is None:
+        return None
+    return (array, mode)
+
+
+def open_memmap(path):
+    '''
+    Memory-maps the pixels of the image file, so opening the file is immediate and only the accessed pages are read 
+    from the disk. Supported are NPY files, raw files (.raw) described by a sidecar header and images stored uncompressed 
+    in one block of the file (PGM/PPM, BMP and uncompressed TIFF).
+
+    The sidecar header of the raw file is a JSON file with the name of the raw file followed by .json, e.g. 
+    image.raw.json. It contains the keys "width", "height", "mode" ("RGB", "L" or "1") and optionally "offset" - the 
+    number of bytes preceding the pixels. Pixels are stored row by row with one byte per channel; binary pixels are 
+    stored as bytes 0 and 1.
+
+    Args:
+        path (str): Image file path.
+
+    Returns:
+        tuple(Array, str): Read-only memory-mapped image array and the image mode given by Pillow ("RGB", "L" or "1").
+        None is returned if the file cannot be memory-mapped.
+    '''
+    try:
+        if path.lower().endswith(".npy"):
+            array = np.load(path, mmap_mode="r")
+        elif path.lower().endswith(".raw"):
+            array = _memmap_raw(path)
+        else:
+            with Image.open(path) as image:
+                array = _memmap_pillow_image(path, image)
+    except Exception:
+        return None
+
+    if array is None:
+        return None
+    mode = get_array_mode(array)
+    if mode is None:
+        return None
+    return (array, mode)
+
+
+def get_array_mode(array):
+    '''
+    Returns the image mode of the array of pixels.
+
+    Args:
+        array (Array): Image array.
+
+    Returns:
+        str: Image mode given by Pillow ("RGB", "L" or "1"). None is returned if the array does not represent a supported
+        image.
+    '''
+    if array.dtype == np.bool_ and array.ndim == 2:
+        return "1"
+    elif array.dtype == np.uint8 and array.ndim == 2:
+        return "L"
+    elif array.dtype == np.uint8 and array.ndim == 3 and array.shape[2] == 3:
+        return "RGB"
+    return None
+
+
+def _memmap_raw(path):
+    '''
+    Memory-maps the pixels of the raw file described by its sidecar header. See open_memmap() for the header format.
+
+    Args:
+        path (str): Raw file path.
+
+    Returns:
+        Array: Read-only memory-mapped image array.
+    '''
+    with open(path + RAW_HEADER_EXTENSION) as headerfile:
+        header = json.load(headerfile)
+    width, height, mode = int(header["width"]), int(header["height"]), header["mode"]
+    dtype, channels = RAW_MODES[mode]
+    shape = (height, width, channels) if channels > 1 else (height, width)
+    return np.memmap(path, dtype=dtype, mode="r", offset=int(header.get("offset", 0)), shape=shape)
+
+
+def _memmap_pillow_image(path, image):
+    '''
+    Memory-maps the pixels of the image opened by Pillow if they are stored uncompressed in one block of the file.
+
+    Args:
+        path (str): Image file path.
+        image (Image): Pillow image object opened from the file.
+
+    Returns:
+        Array: Read-only memory-mapped image array. None is returned if the image cannot be memory-mapped.
+    '''
+    width, height = image.size
+    if image.mode not in ("L", "RGB") or not image.tile:
+        return None
+
+    # Pillow describes the pixel data as tiles. Strips of a TIFF file are mapped if they directly follow each other.
+    first_tile = image.tile[0]
+    rawmode, stride, orientation = _get_raw_args(first_tile.args)
+    channels = MEMMAP_RAWMODES.get(rawmode)
+    if first_tile.codec_name != "raw" or channels is None or (channels == 1) != (image.mode == "L"):
+        return None
+    stride = stride or width * channels
+    row = 0
+    for tile in image.tile:
+        x0, y0, x1, y1 = tile.extents
+        if (tile.codec_name != "raw" or _get_raw_args(tile.args) != _get_raw_args(first_tile.args)
+                or (x0, x1, y0) != (0, width, row) or tile.offset != first_tile.offset + row * stride):
+            return None
+        row = y1
+    if row != height or first_tile.offset + height * stride > os.path.getsize(path):
+        return None
+
+    array = np.memmap(path, dtype=np.uint8, mode="r", offset=first_tile.offset, shape=(height, stride))
+    array = array[:, :width * channels].reshape(height, width, channels) if channels > 1 else array[:, :width]
+    # Rows of BMP files are stored from the bottom to the top
+    if orientation < 0:
+        array = array[::-1]
+    if rawmode == "BGR":
+        array = array[:, :, ::-1]
+    return array
+
+
+def _get_raw_args(args):
+    '''
+    Returns the arguments of the Pillow raw decoder in the full form.
+
+    Args:
+        args (str/tuple): Raw decoder arguments given by Pillow: the raw mode alone or the tuple of the raw mode,
+        the stride and the orientation.
+
+    Returns:
+        tuple(str, int, int): Raw mode, stride in bytes (0 if rows are not padded) and orientation of rows.
+    '''
+    if isinstance(args, str):
+        return (args, 0, 1)
+    args = tuple(args) + (0, 1)[len(args) - 1:]
+    return args[:3]
+
+
+class BandWriter:
+    '''
+    A class that writes the image to a file band by band, so the whole image never has to be held in memory. The format
+    is chosen by the file extension: NPY (.npy) or PBM/PGM/PPM (.pbm, .pgm, .ppm, .pnm). Binary images are written as PBM
+    and other images as PGM or PPM, regardless of which of the PNM extensions is used.
+    '''
+    def __init__(self, path, height):
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in (".npy", ".pbm", ".pgm", ".ppm", ".pnm"):
+            raise ValueError(f"Unsupported format of streamed output: {extension}")
+        # Output file path
+        self.path = path
+        # Image height
+        self.height = height
+        # Number of rows written so far
+        self.rows = 0
+        # Output file object or memory-mapped NPY array. It is opened when the first band is written
+        self.__file = None
+        self.__array = None
+        # Flag set when the output file has been created
+        self.__created = False
+
+    def write(self, band):
+        '''
+        Writes the next band of rows to the file.
+
+        Args:
+            band (Array): Image array with the rows of the band.
+        '''
+        if self.rows + band.shape[0] > self.height:
+            raise ValueError("Band exceeds the image height")
+        if self.__file is None and self.__array is None:
+            self.__open(band)
+        if self.__array is not None:
+            self.__array[self.rows:self.rows + band.shape[0]] = band
+        elif band.dtype == np.bool_:
+            # Black pixels are stored as 1 in PBM files
+            self.__file.write(np.packbits(~band, axis=1).tobytes())
+        else:
+            self.__file.write(np.ascontiguousarray(band).tobytes())
+        self.rows += band.shape[0]
+
+    def close(self):
+        '''
+        Closes the file. Raises ValueError if fewer rows than the image height have been written.
+        '''
+        if self.__array is not None:
+            self.__array.flush()
+            self.__array = None
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+        if self.rows != self.height:
+            raise ValueError(f"Only {self.rows} of {self.height} rows have been written")
+
+    def abort(self):
+        '''
+        Closes the file without checking the number of written rows and removes it. It is used when writing has failed.
+        '''
+        self.__array = None
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+        if self.__created and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __open(self, band):
+        '''
+        Creates the file for the image of the type and the width of the first band.
+
+        Args:
+            band (Array): Image array with the rows of the first band.
+        '''
+        shape = (self.height,) + band.shape[1:]
+        if get_array_mode(band) is None:
+            raise ValueError("Band is not an image array")
+        self.__created = True
+        if self.path.lower().endswith(".npy"):
+            self.__array = np.lib.format.open_memmap(self.path, mode="w+", dtype=band.dtype, shape=shape)
+            return
+        if band.dtype == np.bool_:
+            magic = "P4"
+        else:
+            magic = "P5" if band.ndim == 2 else "P6"
+        header = f"{magic}\n{band.shape[1]} {self.height}\n" + ("" if magic == "P4" else "255\n")
+        self.__file = open(self.path, "wb")
+        self.__file.write(header.encode("ascii"))
@@ -0,0 +1,128 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Delay in milliseconds between the checks of the running jobs
+POLL_DELAY = 20
+
+
+class JobRunner:
+    '''
+    A class that runs long operations on a pool of worker threads, so the Tk main loop stays responsive. NumPy and OpenCV
+    release the GIL while processing images, so the operations run in parallel with the GUI without copying the images
+    to other processes. Tkinter widgets can be used only from the main loop thread, so the results are passed to
+    the callbacks in the main loop. The running jobs are checked with root.after().
+    '''
+    def __init__(self, root, workers=None):
+        # Tk root window running the main loop
+        self.root = root
+        # Pool of worker threads
+        self.__executor = ThreadPoolExecutor(max_workers=workers or min(2, os.cpu_count() or 1))
+        # Jobs that have not been finished yet
+        self.__jobs = []
+        # Identifier of the scheduled check of the jobs
+        self.__poll_id = None
+
+    def submit(self, function, on_done, on_error=None):
+        '''
+        Runs the function on a worker thread.
+
+        Args:
+            function (function()): Function to run. It must not use tkinter.
+            on_done (function(result)): Function called in the main loop with the result of the function.
+            on_error (function(Exception)): Function called in the main loop with the exception raised by the function.
+            The exception is reported by Tk if it is None.
+
+        Returns:
+            Job: Submitted job.
+        '''
+        job = Job(self.__executor.submit(function), on_done, on_error)
+        self.__jobs.append(job)
+        if self.__poll_id is None:
+            self.__poll_id = self.root.after(POLL_DELAY, self.__poll)
+        return job
+
+    def shutdown(self):
+        '''
+        Cancels the waiting jobs and releases the worker threads. Callbacks of the jobs are not called any more.
+        '''
+        if self.__poll_id is not None:
+            self.root.after_cancel(self.__poll_id)
+            self.__poll_id = None
+        for job in self.__jobs:
+            job.cancel()
+        self.__jobs = []
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def __poll(self):
+        '''
+        Calls the callbacks of the finished jobs and schedules the next check if any job is still running.
+        '''
+        # One snapshot of the finished jobs, so a job finishing during the check is handled in the next check
+        finished = [job for job in self.__jobs if job.future.done()]
+        self.__jobs = [job for job in self.__jobs if job not in finished]
+        self.__poll_id = self.root.after(POLL_DELAY, self.__poll) if self.__jobs else None
+        # An error of one job does not prevent finishing the other jobs
+        for job in finished:
+            try:
+                job.finish()
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+
+
+class Job:
+    '''
+    A class that represents an operation submitted to JobRunner.
+    '''
+    def __init__(self, future, on_done, on_error):
+        # Future of the operation running on the worker thread
+        self.future = future
+        # Flag set when the job is cancelled. The result of the cancelled job is dropped
+        self.cancelled = False
+        # Flag set when the job has been finished and its callbacks have been called
+        self.finished = False
+        self.__on_done = on_done
+        self.__on_error = on_error
+        self.__finish_callbacks = []
+
+    def cancel(self):
+        '''
+        Cancels the job. A waiting job is not started. The running operation cannot be interrupted, so it is completed
+        on the worker thread, but its result is dropped. Finish callbacks are still called when the operation ends.
+        '''
+        self.cancelled = True
+        self.future.cancel()
+
+    def add_finish_callback(self, function):
+        '''
+        Adds the function called in the main loop when the job ends, after the result has been handled. It is called also
+        for cancelled and failed jobs, so it can release the resources used by the operation. The function is called
+        immediately if the job has already been finished.
+
+        Args:
+            function (function()): Function to call.
+        '''
+        if self.finished:
+            function()
+        else:
+            self.__finish_callbacks.append(function)
+
+    def finish(self):
+        '''
+        Handles the result of the operation and calls the finish callbacks. It is called by JobRunner in the main loop.
+        '''
+        self.finished = True
+        try:
+            if not self.cancelled and not self.future.cancelled():
+                error = self.future.exception()
+                if error is None:
+                    self.__on_done(self.future.result())
+                elif self.__on_error is not None:
+                    self.__on_error(error)
+                else:
+                    raise error
+        finally:
+            for function in self.__finish_callbacks:
+                function()
+            self.__finish_callbacks = []
@@ -0,0 +1,126 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import cv2 as cv
+
+
+def imap_ordered(function, items, workers=None, max_inflight=None):
+    '''
+    Applies the function to every item on a pool of worker processes and generates the results in the order of the items.
+
+    At most max_inflight items are submitted to the pool at the same time, so items are read lazily and the memory used
+    by the pending work is bounded. An exception raised for an item is returned in place of its result and the remaining
+    items are still processed. If a worker process dies, the pool is replaced with a new one. The dead worker may have run
+    any of the items pending in the broken pool, so each of them is run again alone in a separate one-process pool: only
+    the item which breaks that pool as well is reported as failed with BrokenProcessPool.
+
+    Args:
+        function (function(item)): Function to apply. It must be picklable (defined at the top level of a module).
+        items (iterable): Items to process.
+        workers (int): Number of worker processes. The number of CPUs is used if it is None or 0. With 1 the items are
+        processed in the calling process.
+        max_inflight (int): Maximum number of submitted items waiting for collection. It is twice the number of workers
+        by default.
+
+    Yields:
+        tuple(item, result, Exception): Item, result of the function and the exception raised by the function. Either
+        result or exception is None.
+    '''
+    if workers == 1:
+        for item in items:
+            try:
+                yield (item, function(item), None)
+            except Exception as error:
+                yield (item, None, error)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_inflight = max_inflight or 2 * workers
+    executor = _create_executor(workers)
+    # Queue of (item, future, executor) in the order of submission
+    pending = deque()
+    # One-process pool running the items of broken pools again, created when the first pool breaks
+    retry_executor = None
+
+    def submit(item):
+        nonlocal executor
+        try:
+            future = executor.submit(function, item)
+        except BrokenProcessPool:
+            executor = _restart_executor(executor, workers)
+            future = executor.submit(function, item)
+        pending.append((item, future, executor))
+
+    def collect():
+        nonlocal executor
+        item, future, item_executor = pending.popleft()
+        try:
+            return (item, future.result(), None)
+        except BrokenProcessPool:
+            # All pending items of the broken pool fail, but only the first of them restarts the pool
+            if item_executor is executor:
+                executor = _restart_executor(executor, workers)
+            return retry(item)
+        except Exception as error:
+            return (item, None, error)
+
+    def retry(item):
+        nonlocal retry_executor
+        if retry_executor is None:
+            retry_executor = _create_executor(1)
+        try:
+            return (item, retry_executor.submit(function, item).result(), None)
+        except BrokenProcessPool as error:
+            # The item has broken the pool on its own
+            retry_executor = _restart_executor(retry_executor, 1)
+            return (item, None, error)
+        except Exception as error:
+            return (item, None, error)
+
+    try:
+        for item in items:
+            submit(item)
+            while len(pending) >= max_inflight:
+                yield collect()
+        while pending:
+            yield collect()
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if retry_executor is not None:
+            retry_executor.shutdown(cancel_futures=True)
+
+
+def _create_executor(workers):
+    '''
+    Creates the pool of worker processes.
+
+    Args:
+        workers (int): Number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: Process pool.
+    '''
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def _restart_executor(executor, workers):
+    '''
+    Shuts down the broken pool and creates a new one.
+
+    Args:
+        executor (ProcessPoolExecutor): Broken process pool.
+        workers (int): Number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: New process pool.
+    '''
+    executor.shutdown(wait=False, cancel_futures=True)
+    return _create_executor(workers)
+
+
+def _init_worker():
+    '''
+    Initializes the worker process. OpenCV is limited to one thread, because the pool already uses all the cores.
+    '''
+    cv.setNumThreads(1)
@@ -1,9 +1,124 @@
 import tkinter as tk
+import numpy as np
 from matplotlib import pyplot as plt
+from matplotlib.collections import LineCollection
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from aposample import sample_profile
 
 
-def plot_profile(points, image, rootwindow):
+class ProfileViewer:
+    '''
+    A class that displays profile graphs in one window. The figure, the canvas and the toolbar are created once, and every 
+    next profile only replaces the data of the existing lines. Lines are animated artists: the static part of the graph 
+    (axes, ticks and grid) is rendered once and stored, so a profile with the same axis limits is redrawn by blitting 
+    the lines over the stored background. The whole figure is rendered again only when the axis limits change.
+    '''
+    def __init__(self, rootwindow):
+        #Root window of the graph
+        self.rootwindow = rootwindow
+        #Flag set when the window is closed
+        self.closed = False
+        self.figure, self.axes = plt.subplots()
+        #Profile lines, one for every image channel
+        self.__lines = []
+        #Dashed vertical lines at the breakpoints, drawn as one collection spanning the height of the axes
+        self.__break_lines = LineCollection([], colors="#e64552", linestyles="dashed", linewidths=1, 
+                                            transform=self.axes.get_xaxis_transform(), animated=True)
+        self.axes.add_collection(self.__break_lines)
+        #Rendered figure without the animated artists
+        self.__background = None
+
+        #Sets labels, grid and layout of the graph
+        self.axes.set_xlabel("Distance (pixels)")
+        self.axes.set_ylabel("Pixel Value")
+        self.axes.grid()
+        self.figure.tight_layout()
+
+        #Integrates the graph with the root window
+        self.canvas = FigureCanvasTkAgg(self.figure, master=rootwindow)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, rootwindow)
+        self.toolbar.update()
+        self.toolbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        #Every full rendering (resize, zoom, pan) stores the new background and draws the lines over it
+        self.canvas.mpl_connect("draw_event", self.__on_draw)
+        rootwindow.protocol("WM_DELETE_WINDOW", self.close)
+
+    def plot(self, points, image, interpolation="nearest", width=1):
+        '''
+        Samples the profile and displays it in place of the previous one.
+
+        Args:
+            points (list): List of profile breakpoints. The elements in the list should be of the form (x, y).
+            image (ImageRGB/ImageGrayscale): Source image.
+            interpolation (str): Interpolation of the pixel values, see sample_profile().
+            width (int): Width of the profile line in pixels, see sample_profile().
+        '''
+        #Gets the pixel values as the array of the shape (number of points, number of channels)
+        profile, line_break_points = sample_profile(image, points, interpolation, width)
+        profile = profile.reshape(len(profile), -1)
+        x_axis_data = np.arange(len(profile))
+
+        #Keeps one line for every channel of the image
+        while len(self.__lines) > profile.shape[1]:
+            self.__lines.pop().remove()
+        while len(self.__lines) < profile.shape[1]:
+            self.__lines.extend(self.axes.plot([], [], animated=True))
+        for idx, line in enumerate(self.__lines):
+            line.set_data(x_axis_data, profile[:, idx])
+            line.set_color(image.guicolor_repr[idx])
+        self.__break_lines.set_segments([[(pnt, 0), (pnt, 1)] for pnt in line_break_points])
+
+        #Fits the axes to the new profile
+        limits = (self.axes.get_xlim(), self.axes.get_ylim())
+        self.axes.relim()
+        self.axes.autoscale_view()
+        if self.__background is None or limits != (self.axes.get_xlim(), self.axes.get_ylim()):
+            #The toolbar home view becomes the new limits
+            self.toolbar.update()
+            self.canvas.draw_idle()
+        else:
+            self.__blit()
+
+    def close(self):
+        '''
+        Closes the graph window and releases the figure.
+        '''
+        self.closed = True
+        self.rootwindow.destroy()
+        plt.close(self.figure)
+
+    def __on_draw(self, event):
+        '''
+        Stores the rendered background and draws the animated artists over it.
+
+        Args:
+            event (DrawEvent): Matplotlib draw event.
+        '''
+        #Saving the figure renders it on another canvas (e.g. PDF or SVG), which has no background to copy
+        if event.canvas is not self.canvas or self.canvas.is_saving():
+            return
+        self.__background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.__draw_animated()
+
+    def __blit(self):
+        '''
+        Redraws the animated artists over the stored background.
+        '''
+        self.canvas.restore_region(self.__background)
+        self.__draw_animated()
+        self.canvas.blit(self.figure.bbox)
+
+    def __draw_animated(self):
+        '''
+        Draws the breakpoint lines and the profile lines on the canvas renderer.
+        '''
+        self.axes.draw_artist(self.__break_lines)
+        for line in self.__lines:
+            self.axes.draw_artist(line)
+
+
+def plot_profile(points, image, rootwindow, interpolation="nearest", width=1):
     '''
     Draws a profile graph based on the given breakpoint list and displays the graph window.
 
@@ -11,93 +126,15 @@ def plot_profile(points, image, rootwindow):
         points (list): List of profile breakpoints. The elements in the list should be of the form (x, y).
         image (ImageRGB/ImageGrayscale): Source image.
         rootwindow (Toplevel/Tk): Root window for the profile graph.
+        interpolation (str): Interpolation of the pixel values, see sample_profile().
+        width (int): Width of the profile line in pixels, see sample_profile().
+
+    Returns:
+        ProfileViewer: Viewer of the graph. Next profiles can be displayed in the same window with ProfileViewer.plot().
     '''
-    #A list containing each profile point
-    profile_points = []
-    #A list of the x coordinates of the breakpoints as distance from the origin
-    line_break_points = [0]
-    #Line start point - (x1, y1)
-    #Line end point - (x2, y2)
-    x1, y1 = points[0]
-    for x2, y2 in points[1:]:  #Do for each line in profile...
-        #Temporary list for points of the processed line  
-        line_points = []
-        #Executes if the line is a vertical line
-        if x1 == x2:
-            line_points = [(x1, y) for y in range(y1, y2, (y2-y1)//abs(y2-y1))] 
-        #Executes if the line is a horizontal line
-        elif y1 == y2:
-            line_points = [(x, y1) for x in range(x1, x2, (x2-x1)//abs(x2-x1))]
-        #Executed if the line is neither vertical nor horizontal
-        else:
-            #Formula for a linear function -> y = a*x + b
-            a = (y2 - y1) / (x2 - x1)  #Parameter a
-            b = y2 - a * x2  #Parameter b
-            #If the condition is true, treat the y coordinate as an argument
-            if abs(a) > 1:
-                for y in range(y1, y2, (y2-y1)//abs(y2-y1)):
-                    x = round((y - b) / a)
-                    line_points.append((x, y))
-            #Otherwise, treat the x coordinate as an argument
-            else:
-                for x in range(x1, x2, (x2-x1)//abs(x2-x1)):
-                    y = round(a * x + b)
-                    line_points.append((x, y))
-        #Adds the points of processed line to the result list
-        profile_points += line_points
-        #Computes and adds profile breakpoint to the list
-        line_break_points.append(len(profile_points))
-        x1, y1 = x2, y2
-    #Adds the last point to the result list
-    profile_points.append((x2, y2))
-
-    #A list containing values corresponding to the each profile point
-    profile = []
-    #The image as a two-dimensional array
-    image_array = image.imagearray
-    #Image height
-    image_height = image.size[1]
-    #Gets the pixel values
-    for x, y in profile_points:
-        profile.append(image_array[image_height - y - 1][x])
-
-    #Initializes the profile graph objects
-    fig, ax = plt.subplots()
-    #Draws dashed vertical lines at the breakpoints
-    for pnt in line_break_points:
-        ax.axvline(x=pnt, color='#e64552', linestyle="dashed", linewidth=1)
-    #Prepares the list of values for x-axis of the graph
-    x_axis_data = range(0, len(profile))
-    #If the image has one channel, the pixel values are integers 
-    # and can be plotted directly on the graph
-    if len(image.channels) == 1:
-        ax.plot(x_axis_data, profile, color=image.guicolor_repr[0])
-    #If the image has more than one channel, the pixel values are tuples of several integer 
-    # and need to be unpacked and then plotted as a separate profile lines for each channel
-    else:
-        for idx in range(len(image.channels)):
-            y_axis_data = [pixel[idx] for pixel in profile]
-            ax.plot(x_axis_data, y_axis_data, color=image.guicolor_repr[idx])
-    #Sets labels, grid and layout of the graph
-    ax.set_xlabel("Distance (pixels)")
-    ax.set_ylabel("Pixel Value")
-    ax.grid()
-    plt.tight_layout()
-
-    #Integrates the graph with the root window
-    fig_canvas = FigureCanvasTkAgg(fig, master=rootwindow)
-    fig_canvas.draw()
-    toolbar = NavigationToolbar2Tk(fig_canvas, rootwindow)
-    toolbar.update()
-
-    toolbar.pack(side=tk.BOTTOM, fill=tk.X)
-    fig_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-
-    #Function to proper close of the graph window
-    def close_profile():
-        rootwindow.destroy()
-        plt.close(fig.number)
-    rootwindow.protocol("WM_DELETE_WINDOW", close_profile)
+    viewer = ProfileViewer(rootwindow)
+    viewer.plot(points, image, interpolation, width)
+    return viewer
 
 
 def close_profiles():
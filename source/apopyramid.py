@@ -0,0 +1,199 @@
+import itertools
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+import cv2 as cv
+
+
+# Zoom factors of the View menu and of the image window. Pyramid levels are kept for the reductions among them, so they
+# are served without resampling
+ZOOM_FACTORS = (0.1, 0.2, 0.25, 0.5, 1.5, 2)
+
+# Maximum number of bytes of the pyramid levels cached for all images together
+PYRAMID_CACHE_BYTES = 2**28
+
+
+class LevelCache:
+    '''
+    A class that stores pyramid levels of images with the least recently used eviction. Levels of all images share
+    one memory limit, so zooming many large images never holds more than max_bytes of resized copies.
+    '''
+    def __init__(self, max_bytes):
+        # Maximum number of bytes of the stored levels
+        self.max_bytes = max_bytes
+        # Number of bytes of the stored levels
+        self.nbytes = 0
+        # Levels by (owner key, factor) in the order of use; the most recently used is the last
+        self.__levels = OrderedDict()
+        # Levels are used by the GUI and by the worker threads
+        self.__lock = threading.Lock()
+        # Generator of owner keys. Keys are never reused, so levels of a dropped image cannot be served for another image
+        self.__owner_keys = itertools.count()
+
+    def new_owner_key(self):
+        '''
+        Returns a new key identifying the image which owns the levels.
+
+        Returns:
+            int: Owner key.
+        '''
+        return next(self.__owner_keys)
+
+    def get(self, owner_key, factor):
+        '''
+        Returns the stored level and marks it as the most recently used.
+
+        Args:
+            owner_key (int): Owner key.
+            factor (float): Resize factor of the level.
+
+        Returns:
+            Array: Level array or None if the level is not stored.
+        '''
+        with self.__lock:
+            level = self.__levels.get((owner_key, factor))
+            if level is not None:
+                self.__levels.move_to_end((owner_key, factor))
+            return level
+
+    def put(self, owner_key, factor, level):
+        '''
+        Stores the level and evicts the least recently used levels above the memory limit. Levels larger than the limit
+        are not stored.
+
+        Args:
+            owner_key (int): Owner key.
+            factor (float): Resize factor of the level.
+            level (Array): Read-only level array.
+        '''
+        if level.nbytes > self.max_bytes:
+            return
+        with self.__lock:
+            previous = self.__levels.pop((owner_key, factor), None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+            self.__levels[(owner_key, factor)] = level
+            self.nbytes += level.nbytes
+            while self.nbytes > self.max_bytes:
+                evicted = self.__levels.popitem(last=False)[1]
+                self.nbytes -= evicted.nbytes
+
+    def discard(self, owner_key):
+        '''
+        Removes all levels of the image.
+
+        Args:
+            owner_key (int): Owner key.
+        '''
+        with self.__lock:
+            for key in [key for key in self.__levels if key[0] == owner_key]:
+                self.nbytes -= self.__levels.pop(key).nbytes
+
+
+# Cache of the pyramid levels of all images
+PYRAMID_CACHE = LevelCache(PYRAMID_CACHE_BYTES)
+
+
+def is_pyramid_factor(factor):
+    '''
+    Checks if the image resized by the factor is kept as a pyramid level: reductions by the zoom factors and by the powers
+    of two. Enlargements are never kept, because they are larger than the image.
+
+    Args:
+        factor (float): Resize factor.
+
+    Returns:
+        bool: True if the factor is a factor of a pyramid level.
+    '''
+    return factor < 1 and (factor in ZOOM_FACTORS or math.log2(factor).is_integer())
+
+
+def get_pyramid_source_factor(factor):
+    '''
+    Returns the factor of the pyramid level from which the image of the given factor is resampled. It is the smallest
+    level not smaller than the factor: a power of two or a zoom factor. Enlargements are resampled from the image itself.
+
+    Args:
+        factor (float): Resize factor.
+
+    Returns:
+        float: Resize factor of the source level. 1 means the image itself.
+    '''
+    if factor >= 1:
+        return 1
+    # Largest power of two not smaller than the factor; for a power of two it is the next larger one
+    power_factor = 2.0 ** math.floor(math.log2(factor))
+    power_factor = power_factor * 2 if power_factor <= factor else power_factor
+    candidates = [power_factor] + [zoom_factor for zoom_factor in ZOOM_FACTORS if factor < zoom_factor < power_factor]
+    return min(candidates)
+
+
+def get_resized_size(size, factor):
+    '''
+    Returns the size of the image resized by the given factor.
+
+    Args:
+        size (tuple(int, int)): Image size - (width, height).
+        factor (float): Resize factor.
+
+    Returns:
+        tuple(int, int): Resized image size - (width, height).
+    '''
+    return (max(1, round(size[0] * factor)), max(1, round(size[1] * factor)))
+
+
+def resize_array(array, size):
+    '''
+    Resamples the image array to the given size. Reductions average the pixels (area interpolation) and enlargements
+    interpolate them linearly. Binary images are resampled with the nearest neighbour, so they stay binary.
+
+    Args:
+        array (Array): Image array.
+        size (tuple(int, int)): Target size - (width, height).
+
+    Returns:
+        Array: Read-only resampled image array.
+    '''
+    if array.dtype == np.bool_:
+        resized = cv.resize(array.astype(np.uint8), size, interpolation=cv.INTER_NEAREST).astype(np.bool_)
+    elif size[0] < array.shape[1] or size[1] < array.shape[0]:
+        resized = cv.resize(array, size, interpolation=cv.INTER_AREA)
+    else:
+        resized = cv.resize(array, size, interpolation=cv.INTER_LINEAR)
+    resized.flags.writeable = False
+    return resized
+
+
+def resample_region(array, size, box):
+    '''
+    Resamples the region of the image array resized to the given size. Only the source pixels of the region are read
+    and interpolated linearly. Pixels are mapped as by cv.resize() and every pixel is computed from its position in
+    the whole resized image, so regions resampled separately fit together exactly and the result never holds more than
+    the region.
+
+    Args:
+        array (Array): Image array.
+        size (tuple(int, int)): Size of the whole resized image - (width, height).
+        box (tuple(int, int, int, int)): Region of the resized image - (left, upper, right, lower).
+
+    Returns:
+        Array: Read-only resampled region.
+    '''
+    height, width = array.shape[:2]
+    left, upper, right, lower = box
+    # Source coordinates of the pixel centres of the region. The edges of the image are replicated, as in cv.resize()
+    xs = (np.arange(left, right) + 0.5) * (width / size[0]) - 0.5
+    ys = (np.arange(upper, lower) + 0.5) * (height / size[1]) - 0.5
+    x0, y0 = np.floor(xs), np.floor(ys)
+    fx, fy = (xs - x0).astype(np.float32), (ys - y0).astype(np.float32)[:, np.newaxis]
+    columns = (np.clip(x0, 0, width - 1).astype(np.intp), np.clip(x0 + 1, 0, width - 1).astype(np.intp))
+    rows = (np.clip(y0, 0, height - 1).astype(np.intp), np.clip(y0 + 1, 0, height - 1).astype(np.intp))
+    if array.ndim == 3:
+        fx, fy = fx[:, np.newaxis], fy[..., np.newaxis]
+    pixels = lambda row, column: array[np.ix_(rows[row], columns[column])].astype(np.float32)
+    region = ((1 - fy) * ((1 - fx) * pixels(0, 0) + fx * pixels(0, 1))
+                + fy * ((1 - fx) * pixels(1, 0) + fx * pixels(1, 1)))
+    region = np.rint(region).astype(array.dtype)
+    region.flags.writeable = False
+    return region
@@ -0,0 +1,212 @@
+import numpy as np
+
+
+def get_profile_coordinates(points):
+    '''
+    Computes the coordinates of the pixels along the polyline. Every segment is rasterized along its major axis: one pixel
+    per step of the longer coordinate, with the other coordinate rounded to the nearest pixel, so the result is the same
+    as of the Bresenham algorithm. The end point of every segment is the start of the next one.
+
+    Args:
+        points (list): List of profile breakpoints. The elements in the list should be of the form (x, y).
+
+    Returns:
+        tuple(Array, Array, list[int]): The x and y coordinates of the profile points (float64) and the positions of
+        the breakpoints in the profile.
+    '''
+    #Lists of the coordinates of the segments
+    x_parts, y_parts = [], []
+    #A list of the x coordinates of the breakpoints as distance from the origin
+    line_break_points = [0]
+    for (x1, y1), (x2, y2) in zip(points[:-1], points[1:]):
+        dx, dy = x2 - x1, y2 - y1
+        steps = np.arange(max(abs(dx), abs(dy)), dtype=np.float64)
+        #Executes if the line is vertical or closer to vertical - the y coordinate is the argument
+        if abs(dy) > abs(dx):
+            ys = y1 + np.sign(dy) * steps
+            xs = np.full_like(ys, x1) if dx == 0 else np.rint((ys - (y2 - dy / dx * x2)) / (dy / dx))
+        #Otherwise, the x coordinate is the argument
+        else:
+            xs = x1 + np.sign(dx) * steps
+            ys = np.full_like(xs, y1) if dy == 0 else np.rint(dy / dx * xs + (y2 - dy / dx * x2))
+        x_parts.append(xs)
+        y_parts.append(ys)
+        line_break_points.append(line_break_points[-1] + len(steps))
+    #Adds the last point
+    x_parts.append(np.array([points[-1][0]], dtype=np.float64))
+    y_parts.append(np.array([points[-1][1]], dtype=np.float64))
+    return (np.concatenate(x_parts), np.concatenate(y_parts), line_break_points)
+
+
+def sample_profile(image, points, interpolation="nearest", width=1):
+    '''
+    Samples the pixel values along the polyline. The profile points are computed for all segments at once and the values
+    are gathered from the image buffer without copying it.
+
+    Args:
+        image (ImageRGB/ImageGrayscale): Source image.
+        points (list): List of profile breakpoints. The elements in the list should be of the form (x, y), with the y axis
+        directed upwards from the bottom row of the image.
+        interpolation (str): "nearest" takes the pixels computed by get_profile_coordinates(). "bilinear" takes points
+        evenly spaced along every segment and interpolates the values of 4 neighbouring pixels.
+        width (int): Width of the profile line in pixels. With the width greater than 1 the values are averaged across
+        the line, along the normal of every segment. Points outside the image take the values of the nearest edge pixels.
+
+    Returns:
+        tuple(Array, list[int]): Profile values of the shape (number of points,) or (number of points, number of channels)
+        and the positions of the breakpoints in the profile. Values keep the image type for the nearest interpolation
+        and the width 1; otherwise they are float64.
+    '''
+    return sample_profiles(image, [points], interpolation, width)[0]
+
+
+def sample_profiles(image, polylines, interpolation="nearest", width=1):
+    '''
+    Samples the pixel values along many polylines. Points of all polylines are gathered from the image buffer in one pass,
+    so extracting hundreds of profiles costs about as much as extracting one long profile. See sample_profile().
+
+    Args:
+        image (ImageRGB/ImageGrayscale): Source image.
+        polylines (list[list]): List of polylines. Every polyline is a list of at least 2 breakpoints of the form (x, y).
+        interpolation (str): "nearest" or "bilinear", see sample_profile().
+        width (int): Width of the profile lines in pixels, see sample_profile().
+
+    Returns:
+        list[tuple(Array, list[int])]: Profile values and the positions of the breakpoints for every polyline.
+    '''
+    if interpolation not in ("nearest", "bilinear"):
+        raise ValueError(f"Unknown interpolation: {interpolation}")
+    if width < 1:
+        raise ValueError("Profile line width must be at least 1")
+    image_array = image.imageview
+    image_height, image_width = image_array.shape[:2]
+
+    positions = []
+    for points in polylines:
+        if len(points) < 2:
+            raise ValueError("Profile needs at least two points")
+        positions.append(_get_sample_positions(points, image_height, interpolation, width))
+    xs = np.concatenate([xs for xs, rows, line_break_points in positions], axis=1)
+    rows = np.concatenate([rows for xs, rows, line_break_points in positions], axis=1)
+
+    if interpolation == "nearest":
+        columns = np.clip(np.rint(xs), 0, image_width - 1).astype(np.intp)
+        rows = np.clip(np.rint(rows), 0, image_height - 1).astype(np.intp)
+        values = image_array[rows, columns]
+    else:
+        xs = np.clip(xs, 0, image_width - 1)
+        rows = np.clip(rows, 0, image_height - 1)
+        x0, row0 = np.floor(xs).astype(np.intp), np.floor(rows).astype(np.intp)
+        x1, row1 = np.minimum(x0 + 1, image_width - 1), np.minimum(row0 + 1, image_height - 1)
+        fx, frow = xs - x0, rows - row0
+        if image_array.ndim == 3:
+            fx, frow = fx[..., np.newaxis], frow[..., np.newaxis]
+        pixels = lambda r, c: image_array[r, c].astype(np.float64)
+        values = ((1 - frow) * ((1 - fx) * pixels(row0, x0) + fx * pixels(row0, x1))
+                    + frow * ((1 - fx) * pixels(row1, x0) + fx * pixels(row1, x1)))
+    values = values.astype(np.float64).mean(axis=0) if width > 1 else values[0]
+
+    profiles = []
+    start = 0
+    for profile_xs, profile_rows, line_break_points in positions:
+        stop = start + profile_xs.shape[1]
+        profiles.append((values[start:stop], line_break_points))
+        start = stop
+    return profiles
+
+
+def _get_sample_positions(points, image_height, interpolation, width):
+    '''
+    Computes the positions in the image array of the samples of the profile.
+
+    Args:
+        points (list): List of profile breakpoints of the form (x, y).
+        image_height (int): Image height.
+        interpolation (str): "nearest" or "bilinear", see sample_profile().
+        width (int): Width of the profile line in pixels.
+
+    Returns:
+        tuple(Array, Array, list[int]): Columns and rows (float64) of the shape (width, number of points) and the positions
+        of the breakpoints in the profile.
+    '''
+    xs, ys, line_break_points = get_profile_coordinates(points)
+    rows = image_height - 1 - ys
+    if interpolation == "nearest" and width == 1:
+        return (xs[np.newaxis, :], rows[np.newaxis, :], line_break_points)
+
+    #Segment index of every profile point (the last point ends the last segment)
+    segments = np.searchsorted(line_break_points[1:], np.arange(len(xs)), side="right")
+    segments = np.minimum(segments, len(points) - 2)
+    starts, ends = np.array(points[:-1], dtype=np.float64), np.array(points[1:], dtype=np.float64)
+    deltas = ends - starts
+    if interpolation == "bilinear":
+        #Points are evenly spaced between the breakpoints
+        lengths = np.diff(line_break_points)
+        params = (np.arange(len(xs)) - np.array(line_break_points[:-1])[segments]) / np.maximum(lengths[segments], 1)
+        xs = starts[segments, 0] + deltas[segments, 0] * params
+        rows = image_height - 1 - (starts[segments, 1] + deltas[segments, 1] * params)
+    #Unit normals of the segments in the image array coordinates
+    norms = np.maximum(np.hypot(deltas[:, 0], deltas[:, 1]), 1e-12)
+    normals_x, normals_row = (deltas[:, 1] / norms)[segments], (deltas[:, 0] / norms)[segments]
+    offsets = (np.arange(width) - (width - 1) / 2)[:, np.newaxis]
+    return (xs[np.newaxis, :] + offsets * normals_x, rows[np.newaxis, :] + offsets * normals_row, line_break_points)
+
+
+def load_polylines(path):
+    '''
+    Reads the polylines from the text file. The file should contain one polyline per line as a sequence of integer
+    coordinates x1 y1 x2 y2 ..., separated by spaces or commas. Empty lines and lines starting with # are skipped.
+
+    Args:
+        path (str): Polylines file path.
+
+    Returns:
+        list[list[tuple(int, int)]]: List of polylines.
+    '''
+    polylines = []
+    with open(path) as polylines_file:
+        for line_number, line in enumerate(polylines_file, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                coordinates = [int(value) for value in line.replace(",", " ").split()]
+            except ValueError:
+                raise ValueError(f"Invalid coordinate in line {line_number} of {path}")
+            if len(coordinates) < 4 or len(coordinates) % 2:
+                raise ValueError(f"Line {line_number} of {path} must contain at least two (x, y) points")
+            polylines.append(list(zip(coordinates[0::2], coordinates[1::2])))
+    return polylines
+
+
+def write_profiles(filename, profiles, channel_names=None):
+    '''
+    Writes the profiles as one table with a row for every profile point. The columns are the profile index, the position
+    of the point in the profile, the breakpoint flag (1 for the breakpoints) and the values of all channels. The format
+    is chosen by the file extension: NPY (.npy) stores the table as a float64 array, other files are written as csv
+    with a header.
+
+    Args:
+        filename (str): Output file name.
+        profiles (list[tuple(Array, list[int])]): Profiles returned by sample_profiles().
+        channel_names (list[str]): Names of the value columns. They are "Value" or "Channel 1", "Channel 2"... by default.
+    '''
+    channels = 1 if profiles[0][0].ndim == 1 else profiles[0][0].shape[1]
+    if channel_names is None:
+        channel_names = ["Value"] if channels == 1 else [f"Channel {index+1}" for index in range(channels)]
+    table = np.empty((sum(len(values) for values, line_break_points in profiles), 3 + channels))
+    start = 0
+    for index, (values, line_break_points) in enumerate(profiles):
+        stop = start + len(values)
+        table[start:stop, 0] = index
+        table[start:stop, 1] = np.arange(len(values))
+        table[start:stop, 2] = 0
+        table[start + np.array(line_break_points), 2] = 1
+        table[start:stop, 3:] = values.reshape(len(values), channels)
+        start = stop
+
+    if filename.lower().endswith(".npy"):
+        np.save(filename, table)
+    else:
+        header = ",".join(["Profile", "Position", "Breakpoint"] + list(channel_names))
+        np.savetxt(filename, table, fmt="%.10g", delimiter=",", header=header, comments="")
@@ -0,0 +1,179 @@
+import inspect
+import numpy as np
+import cv2 as cv
+import apoconv_morph as cm
+from apoimage import ImageRGB, ImageGrayscale, compute_histogram_range
+from apoio import open_array, BandWriter
+
+
+# Image methods computing every pixel from the pixel at the same position. They are streamed band by band.
+POINT_OPERATIONS = ("convert", "negate", "treshold_binary", "treshold_grayscale", "treshold_two",
+                    "add_int", "multiply_int", "divide_int", "logic_not",
+                    "hist_linear_stretch", "hist_gamma_stretch", "hist_equalization")
+
+# Image methods computing every pixel from its neighbourhood. They are streamed band by band with the halo rows.
+NEIGHBOURHOOD_OPERATIONS = ("smooth_avarage", "smooth_weighted_avarage", "smooth_gaussian", "median_blur",
+                            "sharpen_laplacian", "edgedetection_Sobel_mask", "edgedetection_Sobel_operator",
+                            "edgedetection_Prewitt_operator", "morph_erode", "morph_dilate", "morph_open", "morph_close")
+
+# Approximate size of the band in bytes used when the number of rows in a band is not given
+BAND_BYTES = 2**26
+
+
+def stream_operation(src_path, dst_path, name, *args, band_rows=None, **kwargs):
+    '''
+    Applies the image operation to the image file and writes the result to the output file band by band. Only a band of
+    rows with the rows around it is held in memory, so images larger than the memory can be processed. The result is
+    the same as the result of the image method with the given name.
+
+    The source is read without decoding the whole image if it is memory-mapped, see open_array() in module apoio.
+    Operations using the histogram read the source twice: the histogram of the whole image is calculated first.
+
+    Args:
+        src_path (str): Source image file path.
+        dst_path (str): Output file path. See BandWriter in module apoio for the available formats.
+        name (str): Name of the image method. See POINT_OPERATIONS and NEIGHBOURHOOD_OPERATIONS.
+        band_rows (int): Number of rows processed at once. It is chosen to give bands of about BAND_BYTES by default.
+        *args: Arguments of the image method.
+        **kwargs: Keyword arguments of the image method.
+    '''
+    source = open_array(src_path)
+    if source is None:
+        raise ValueError("File does not exist or has unsupported format")
+    array, mode = source
+    image_class = ImageRGB if mode == "RGB" else ImageGrayscale
+    if not hasattr(image_class, name) or name not in POINT_OPERATIONS + NEIGHBOURHOOD_OPERATIONS:
+        raise ValueError(f"Operation {name} cannot be streamed for image mode {mode}")
+    # Morphology is defined only for binary images and binary images support only morphology
+    if name in NEIGHBOURHOOD_OPERATIONS and name.startswith("morph") != (mode == "1"):
+        raise ValueError(f"Operation {name} cannot be streamed for image mode {mode}")
+
+    height = array.shape[0]
+    if band_rows is None:
+        band_rows = max(1, BAND_BYTES // max(1, array[:1].nbytes))
+    bands = [(start, min(start + band_rows, height)) for start in range(0, height, band_rows)]
+    writer = BandWriter(dst_path, height)
+    try:
+        if name in POINT_OPERATIONS:
+            _stream_point_operation(array, mode, bands, writer, name, args, kwargs)
+        else:
+            _stream_neighbourhood_operation(array, mode, bands, writer, name, args, kwargs)
+    except BaseException:
+        # The partial output is removed and the error of the operation is raised instead of the error of the row count
+        writer.abort()
+        raise
+    writer.close()
+
+
+def _stream_point_operation(array, mode, bands, writer, name, args, kwargs):
+    '''
+    Applies the point operation to the bands of the image and writes the results.
+
+    Args:
+        array (Array): Image array, usually memory-mapped.
+        mode (str): Image mode given by Pillow.
+        bands (list[tuple(int, int)]): List of the first and the following last row of every band.
+        writer (BandWriter): Output writer.
+        name (str): Name of the image method.
+        args (tuple): Arguments of the image method.
+        kwargs (dict): Keyword arguments of the image method.
+    '''
+    # Operations depending on the histogram are given the histogram of the whole image instead of the histogram of a band
+    if name == "hist_linear_stretch":
+        signature = inspect.signature(ImageGrayscale.hist_linear_stretch).bind(None, *args, **kwargs)
+        signature.apply_defaults()
+        if signature.arguments["rangevalues"] is None:
+            histogram = _stream_histogram(array, mode, bands)
+            rangevalues = compute_histogram_range(histogram, 0.05 if signature.arguments["cutoff"] else 0)[0]
+            args, kwargs = (), {"rangevalues": rangevalues}
+    elif name == "hist_equalization":
+        args, kwargs = (), {"histogram": _stream_histogram(array, mode, bands)[0]}
+
+    for start, stop in bands:
+        image = _get_band_image(array[start:stop], mode)
+        if name == "convert" and args and args[0] == image.mode:
+            ret_image = image
+        else:
+            ret_image = getattr(image, name)(*args, **kwargs)
+        writer.write(ret_image.imageview)
+
+
+def _stream_neighbourhood_operation(array, mode, bands, writer, name, args, kwargs):
+    '''
+    Applies the neighbourhood operation to the bands of the image and writes the results. The conversions and
+    the border parameter are handled as in the image methods, so the results are the same.
+
+    Args:
+        array (Array): Image array, usually memory-mapped.
+        mode (str): Image mode given by Pillow.
+        bands (list[tuple(int, int)]): List of the first and the following last row of every band.
+        writer (BandWriter): Output writer.
+        name (str): Name of the image method.
+        args (tuple): Arguments of the image method.
+        kwargs (dict): Keyword arguments of the image method.
+    '''
+    # Conversions of the rows before and after the operation and the multiplier of the border parameter
+    if mode == "RGB" and name.startswith("edgedetection"):
+        pre_conversion = lambda rows: cv.cvtColor(rows, cv.COLOR_RGB2GRAY)
+        post_conversion = lambda rows: cv.cvtColor(rows, cv.COLOR_GRAY2RGB)
+        border_factor = 3
+    elif mode == "RGB":
+        pre_conversion = post_conversion = None
+        border_factor = 3
+    elif mode == "1":
+        pre_conversion = lambda rows: ImageGrayscale(rows).convert("GS").imageview
+        post_conversion = lambda rows: ImageGrayscale(rows).convert("B").imageview
+        border_factor = 255
+    else:
+        pre_conversion = post_conversion = None
+        border_factor = 1
+
+    image_class = ImageRGB if mode == "RGB" else ImageGrayscale
+    signature = inspect.signature(getattr(image_class, name)).bind(None, *args, **kwargs)
+    signature.apply_defaults()
+    operation_args = list(signature.arguments.values())[1:]
+    operation_args[-1] = operation_args[-1] * border_factor
+
+    def read_rows(start, stop):
+        rows = np.ascontiguousarray(array[start:stop])
+        return rows if pre_conversion is None else pre_conversion(rows)
+
+    height = array.shape[0]
+    for start, stop in bands:
+        ret_rows = getattr(cm, name)(cm.RowBand(read_rows, height, start, stop), *operation_args)
+        writer.write(ret_rows if post_conversion is None else post_conversion(ret_rows))
+
+
+def _stream_histogram(array, mode, bands):
+    '''
+    Calculates the histogram of the whole image band by band.
+
+    Args:
+        array (Array): Image array, usually memory-mapped.
+        mode (str): Image mode given by Pillow.
+        bands (list[tuple(int, int)]): List of the first and the following last row of every band.
+
+    Returns:
+        Array: Histogram as the int64 array of the shape (number of channels, M).
+    '''
+    histogram = None
+    for start, stop in bands:
+        band_histogram = _get_band_image(array[start:stop], mode).histogram_array()
+        histogram = band_histogram.copy() if histogram is None else histogram + band_histogram
+    return histogram
+
+
+def _get_band_image(band, mode):
+    '''
+    Wraps the band of rows in the image object of the given mode.
+
+    Args:
+        band (Array): Image array with the rows of the band.
+        mode (str): Image mode given by Pillow.
+
+    Returns:
+        ImageRGB/ImageGrayscale: Image wrapper object.
+    '''
+    if mode == "RGB":
+        return ImageRGB(band)
+    return ImageGrayscale(band)
@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from math import ceil
+from apopyramid import get_resized_size
+
+
+# Size of the square display tiles in pixels
+TILE_SIZE = 256
+
+# Number of tiles rendered around the visible region in every direction, so short scrolls show ready tiles
+PREFETCH_TILES = 1
+
+# Tag of the canvas items of the tiles
+TILE_TAG = "viewport_tile"
+
+
+class TileViewport:
+    '''
+    A class that displays the image on a scrollable canvas as a grid of tiles. Only the tiles in the visible region and
+    around it are converted to PhotoImage objects, so the memory used by the display depends on the screen size instead
+    of the image size. Tiles are kept in the LRU cache and the newly exposed tiles are rendered when the view scrolls.
+    Zoomed images are resampled tile by tile, so the zoomed image as a whole is never created.
+    '''
+    def __init__(self, canvas):
+        # Canvas on which the image is displayed
+        self.canvas = canvas
+        # Displayed image
+        self.image = None
+        # Resize factor of the displayed image
+        self.factor = 1
+        # Tiles by (column, row) in the order of use; every tile is a pair of the PhotoImage and the canvas item
+        self.__tiles = OrderedDict()
+        # Identifier of the scheduled rendering
+        self.__render_id = None
+        # Maximum number of cached tiles - the tiles covering the screen twice, including the prefetched tiles
+        screen_columns = ceil(canvas.winfo_screenwidth() / TILE_SIZE) + 2 * PREFETCH_TILES + 1
+        screen_rows = ceil(canvas.winfo_screenheight() / TILE_SIZE) + 2 * PREFETCH_TILES + 1
+        self.max_tiles = 2 * screen_columns * screen_rows
+
+        # The canvas reports every change of the view to the scrollbars, so the same commands trigger the rendering
+        self.__scrollcommands = (canvas.cget("xscrollcommand"), canvas.cget("yscrollcommand"))
+        canvas.configure(xscrollcommand=lambda first, last: self.__on_scroll(0, first, last),
+                        yscrollcommand=lambda first, last: self.__on_scroll(1, first, last))
+        # Replaces the binding fitting the scroll region to the items, because tiles cover only a part of the image
+        canvas.bind("<Configure>", lambda event: self.__schedule_render())
+
+    def set_image(self, image, factor=1):
+        '''
+        Displays the image resized by the factor. The canvas is sized to the resized image, as far as the window allows it.
+
+        Args:
+            image (ImageRGB/ImageGrayscale): Image to display.
+            factor (float): Resize factor.
+        '''
+        self.clear()
+        self.image = image
+        self.factor = factor
+        width, height = get_resized_size(image.size, factor)
+        self.canvas.config(width=width, height=height, scrollregion=(0, 0, width, height))
+        self.__render()
+        self.__schedule_render()
+
+    def clear(self):
+        '''
+        Removes the displayed image and releases the tiles.
+        '''
+        self.canvas.delete(TILE_TAG)
+        self.__tiles.clear()
+        self.image = None
+
+    def __on_scroll(self, axis, first, last):
+        '''
+        Passes the view change to the scrollbar and schedules the rendering of the newly exposed tiles.
+
+        Args:
+            axis (int): 0 for the horizontal and 1 for the vertical view.
+            first (str): Start of the visible fraction of the scroll region.
+            last (str): End of the visible fraction of the scroll region.
+        '''
+        command = self.__scrollcommands[axis]
+        if command:
+            self.canvas.tk.call(*self.canvas.tk.splitlist(command), first, last)
+        self.__schedule_render()
+
+    def __schedule_render(self):
+        '''
+        Schedules the rendering when Tk is idle, so a sequence of view changes is rendered once.
+        '''
+        if self.__render_id is None:
+            self.__render_id = self.canvas.after_idle(self.__render)
+
+    def __render(self):
+        '''
+        Creates the missing tiles of the visible region and the prefetch margin and evicts the least recently used tiles
+        above the cache limit.
+        '''
+        if self.__render_id is not None:
+            self.canvas.after_cancel(self.__render_id)
+            self.__render_id = None
+        if self.image is None or not self.canvas.winfo_exists():
+            return
+
+        width, height = get_resized_size(self.image.size, self.factor)
+        left, top = int(self.canvas.canvasx(0)), int(self.canvas.canvasy(0))
+        right, bottom = left + self.canvas.winfo_width(), top + self.canvas.winfo_height()
+        columns = range(max(0, left // TILE_SIZE - PREFETCH_TILES), min(ceil(width / TILE_SIZE), right // TILE_SIZE + 1 + PREFETCH_TILES))
+        rows = range(max(0, top // TILE_SIZE - PREFETCH_TILES), min(ceil(height / TILE_SIZE), bottom // TILE_SIZE + 1 + PREFETCH_TILES))
+
+        for row in rows:
+            for column in columns:
+                if (column, row) in self.__tiles:
+                    self.__tiles.move_to_end((column, row))
+                    continue
+                x, y = column * TILE_SIZE, row * TILE_SIZE
+                photo = self.image.getphotoimage((x, y, min(x + TILE_SIZE, width), min(y + TILE_SIZE, height)), self.factor)
+                item = self.canvas.create_image((x, y), image=photo, anchor="nw", tags=TILE_TAG)
+                self.canvas.tag_lower(item)
+                self.__tiles[(column, row)] = (photo, item)
+
+        # The tiles of the current region are never evicted, even if the window is larger than the screen
+        max_tiles = max(self.max_tiles, len(rows) * len(columns))
+        while len(self.__tiles) > max_tiles:
+            photo, item = self.__tiles.popitem(last=False)[1]
+            self.canvas.delete(item)
@@ -0,0 +1,24 @@
+import os
+import sys
+import numpy as np
+
+# The modules of the program are imported from the source directory, as the program itself does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source"))
+
+from apoimage import ImageRGB, ImageGrayscale
+
+
+def random_array(mode, shape=(83, 121)):
+    # Pixels of the given mode: "RGB", "L" or "GS" for 8-bit grayscale, any other mode for binary
+    rng = np.random.default_rng(0)
+    if mode == "RGB":
+        return rng.integers(0, 256, shape + (3,), dtype=np.uint8)
+    elif mode in ("L", "GS"):
+        return rng.integers(0, 256, shape, dtype=np.uint8)
+    return rng.random(shape) > 0.5
+
+
+def random_image(mode, shape=(83, 121)):
+    if mode == "RGB":
+        return ImageRGB(random_array(mode, shape))
+    return ImageGrayscale(random_array(mode, shape))
@@ -0,0 +1,130 @@
+import csv
+import numpy as np
+import pytest
+from PIL import Image
+from apoimage import getimage
+from aposample import sample_profiles
+from apobatch import (parse_operation, load_pipeline, iter_image_paths, apply_operations, get_output_path, main,
+                        write_error_report)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    rng = np.random.default_rng(0)
+    source_dir = tmp_path / "in"
+    (source_dir / "sub").mkdir(parents=True)
+    Image.fromarray(rng.integers(0, 256, (40, 30, 3), dtype=np.uint8)).save(source_dir / "a.png")
+    Image.fromarray(rng.integers(0, 256, (40, 30), dtype=np.uint8)).save(source_dir / "sub" / "b.png")
+    (source_dir / "notes.txt").write_text("not an image")
+    return source_dir
+
+
+def test_parse_operation():
+    assert parse_operation("convert(GS)") == ("convert", ["GS"], {})
+    assert parse_operation("median_blur(5, reflect)") == ("median_blur", [5, "reflect"], {})
+    assert parse_operation("hist_linear_stretch(cutoff=True)") == ("hist_linear_stretch", [], {"cutoff": True})
+    assert parse_operation(" negate ") == ("negate", [], {})
+    with pytest.raises(ValueError, match="Unknown operation"):
+        parse_operation("close()")
+    with pytest.raises(ValueError):
+        parse_operation("median_blur(5")
+    with pytest.raises(ValueError):
+        parse_operation("median_blur(len(x))")
+
+
+def test_load_pipeline(tmp_path):
+    path = tmp_path / "pipeline.txt"
+    path.write_text("# Pipeline\nconvert(GS)\n\nmedian_blur(3, wrap)\n")
+    assert load_pipeline(str(path)) == [("convert", ["GS"], {}), ("median_blur", [3, "wrap"], {})]
+
+
+def test_iter_image_paths(sources):
+    assert [relpath for path, relpath in iter_image_paths([str(sources)])] == ["a.png"]
+    assert [relpath for path, relpath in iter_image_paths([str(sources)], recursive=True)] == ["a.png", "sub/b.png"]
+    assert [relpath for path, relpath in iter_image_paths([str(sources) + "/**/*.png"])] == ["a.png", "sub/b.png"]
+
+
+def test_apply_operations_matches_image_methods(sources):
+    image = getimage(str(sources / "a.png"))
+    operations = [parse_operation(opstring) for opstring in ("convert(GS)", "median_blur(3, reflect)",
+                                                            "treshold_binary(127)", "morph_open(1, reflect)")]
+    result, analysis_lines = apply_operations(image, operations)
+    expected = image.convert("GS").median_blur(3, "reflect").treshold_binary(127).morph_open(1, "reflect")
+    np.testing.assert_array_equal(result.imageview, expected.imageview)
+    assert analysis_lines is None
+
+
+def test_analyze_operation(tmp_path):
+    array = np.zeros((40, 30), dtype=np.uint8)
+    array[10:30, 5:20] = 255
+    Image.fromarray(array).save(tmp_path / "blob.png")
+    image = getimage(str(tmp_path / "blob.png"))
+    result, analysis_lines = apply_operations(image, [parse_operation("convert(B)"), parse_operation("analyze(True, True)")])
+    assert analysis_lines[0] == "Area,Circuit\n"
+    assert len(analysis_lines) == 2
+
+
+def test_unsupported_operation_for_mode(sources):
+    image = getimage(str(sources / "a.png"))
+    with pytest.raises(ValueError, match="not supported"):
+        apply_operations(image, [parse_operation("morph_erode(1, reflect)")])
+
+
+def test_get_output_path():
+    assert get_output_path("sub/b.png", "out", "_x") == "out/sub/b_x.png"
+    assert get_output_path("a.png", "out", extension="bmp") == "out/a.bmp"
+
+
+def test_write_error_report(tmp_path):
+    report = tmp_path / "errors.csv"
+    write_error_report(str(report), [("a.png", ValueError("invalid image")), ("b.png", OSError("no file"))])
+    with open(report, newline="") as reportfile:
+        rows = list(csv.reader(reportfile))
+    assert rows == [["Path", "Error"], ["a.png", "ValueError: invalid image"], ["b.png", "OSError: no file"]]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_main_writes_results_and_error_report(sources, tmp_path, workers):
+    outdir = tmp_path / "out"
+    report = tmp_path / "errors.csv"
+    exit_code = main([str(sources), str(sources / "notes.txt"), "-r", "-o", str(outdir), "-s", "_neg", "-f", "bmp",
+                        "-op", "convert(GS)", "-op", "negate", "-j", str(workers), "-e", str(report)])
+    assert exit_code == 1
+    negated = getimage(str(outdir / "sub" / "b_neg.bmp"))
+    np.testing.assert_array_equal(negated.imageview, 255 - np.asarray(Image.open(sources / "sub" / "b.png")))
+    assert (outdir / "a_neg.bmp").exists()
+    with open(report, newline="") as reportfile:
+        rows = list(csv.reader(reportfile))
+    assert [row[0] for row in rows] == ["Path", str(sources / "notes.txt")]
+
+
+def test_main_requires_operations(sources, tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(sources), "-o", str(tmp_path / "out")])
+
+
+@pytest.mark.parametrize("profile_format", ["csv", "npy"])
+def test_main_writes_profiles(sources, tmp_path, profile_format):
+    polylines_path = tmp_path / "polylines.txt"
+    polylines_path.write_text("0 0 29 39\n5 5 20 5 20 30\n")
+    outdir = tmp_path / "out"
+    exit_code = main([str(sources / "a.png"), "-o", str(outdir), "--profiles", str(polylines_path),
+                        "--profile-format", profile_format, "--profile-width", "3", "-op", "convert(GS)"])
+    assert exit_code == 0
+    converted = getimage(str(sources / "a.png")).convert("GS")
+    profiles = sample_profiles(converted, [[(0, 0), (29, 39)], [(5, 5), (20, 5), (20, 30)]], "nearest", 3)
+    expected = np.concatenate([values for values, line_break_points in profiles])
+    if profile_format == "npy":
+        table = np.load(outdir / "a_profiles.npy")
+    else:
+        table = np.loadtxt(outdir / "a_profiles.csv", delimiter=",", skiprows=1)
+    np.testing.assert_allclose(table[:, 3], expected, rtol=1e-9)
+    assert (outdir / "a.png").exists()
+
+
+def test_main_profiles_without_operations(sources, tmp_path):
+    polylines_path = tmp_path / "polylines.txt"
+    polylines_path.write_text("0 0 10 10\n")
+    outdir = tmp_path / "out"
+    assert main([str(sources / "a.png"), "-o", str(outdir), "--profiles", str(polylines_path)]) == 0
+    assert sorted(path.name for path in outdir.iterdir()) == ["a_profiles.csv"]
@@ -0,0 +1,68 @@
+import numpy as np
+import cv2 as cv
+import pytest
+import apoconv_morph as cm
+
+
+BORDERS = [("reflect", 0), ("wrap", 0), ("const", 40), ("const_result", 7)]
+
+FILTERS = [(cm.smooth_avarage, ()), (cm.smooth_weighted_avarage, (3,)), (cm.smooth_gaussian, ()),
+            (cm.median_blur, (5,)), (cm.median_blur, (7,)), (cm.sharpen_laplacian, (1,)),
+            (cm.edgedetection_Sobel_mask, ("NW",)), (cm.edgedetection_Sobel_operator, ()),
+            (cm.edgedetection_Prewitt_operator, ())]
+
+# Binary images take the border value 0 or 1
+BINARY_BORDERS = [("reflect", 0), ("wrap", 0), ("const", 1), ("const_result", 0), ("const_result", 1)]
+
+MORPHOLOGY = [cm.morph_erode, cm.morph_dilate, cm.morph_open, cm.morph_close]
+
+
+@pytest.fixture
+def tiled(monkeypatch):
+    '''
+    Returns the function computing the result of the operation with and without stripes.
+    '''
+    threads = cv.getNumThreads()
+
+    def compute(function, *args):
+        monkeypatch.setattr(cm, "TILING_MIN_PIXELS", 0)
+        cv.setNumThreads(1)
+        untiled_result = function(*args)
+        cv.setNumThreads(4)
+        tiled_result = function(*args)
+        return (tiled_result, untiled_result)
+    yield compute
+    cv.setNumThreads(threads)
+
+
+@pytest.mark.parametrize("shape", [(97, 61), (97, 61, 3), (13, 40)])
+@pytest.mark.parametrize("bordertype_code, border_param", BORDERS)
+def test_tiled_filters_are_identical(tiled, shape, bordertype_code, border_param):
+    array = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    for function, args in FILTERS:
+        if len(shape) == 3 and function.__name__.startswith("edgedetection"):
+            continue
+        tiled_result, untiled_result = tiled(function, array, *args, bordertype_code, border_param)
+        np.testing.assert_array_equal(tiled_result, untiled_result, err_msg=function.__name__)
+
+
+@pytest.mark.parametrize("struct_elem_type", [0, 1])
+@pytest.mark.parametrize("bordertype_code, border_param", BINARY_BORDERS)
+def test_tiled_morphology_is_identical(tiled, struct_elem_type, bordertype_code, border_param):
+    array = np.where(np.random.default_rng(1).random((89, 57)) > 0.5, np.uint8(255), np.uint8(0))
+    for function in MORPHOLOGY:
+        tiled_result, untiled_result = tiled(function, array, struct_elem_type, bordertype_code, border_param * 255)
+        np.testing.assert_array_equal(tiled_result, untiled_result, err_msg=function.__name__)
+
+
+def test_stripes_use_halo_rows(monkeypatch):
+    monkeypatch.setattr(cm, "TILING_MIN_PIXELS", 0)
+    threads = cv.getNumThreads()
+    cv.setNumThreads(4)
+    try:
+        array = np.arange(40 * 5, dtype=np.float64).reshape(40, 5)
+        # Every output row is the sum of its neighbours up to 2 rows away
+        function = lambda image: cv.boxFilter(image, -1, (1, 5), normalize=False, borderType=cv.BORDER_REFLECT)
+        np.testing.assert_array_equal(cm._apply_tiled(function, array, 2), function(array))
+    finally:
+        cv.setNumThreads(threads)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from apoimage import ImageGrayscale, treshold_range
+
+
+def test_threshold_buffer_is_reused():
+    array = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    buffer = np.empty(array.shape, dtype=np.uint8)
+    first = ImageGrayscale(treshold_range(array, 10, 100, out=buffer))
+    assert not first.imageview.flags.writeable
+    assert treshold_range(array, 20, 200, out=buffer) is buffer
+    np.testing.assert_array_equal(buffer, np.where((array >= 20) & (array <= 200), 255, 0))
+
+
+@pytest.mark.parametrize("threshold", [lambda image, out: image.treshold_two(30, 90, out=out),
+                                        lambda image, out: image.segmentation_threshold("2th", 30, 90, out=out)[1]])
+def test_two_thresholds_write_to_buffer(threshold):
+    image = ImageGrayscale(np.arange(256, dtype=np.uint8).reshape(16, 16))
+    buffer = np.empty((16, 16), dtype=np.uint8)
+    first = threshold(image, buffer)
+    np.testing.assert_array_equal(first.imageview, np.where((image.imageview >= 30) & (image.imageview <= 90), 255, 0))
+    assert np.shares_memory(first.imageview, buffer)
+    # The buffer stays writable after the previous result was wrapped
+    threshold(image, buffer)
+
+
+def test_wrapped_array_stays_writable():
+    array = np.zeros((4, 4), dtype=np.uint8)
+    image = ImageGrayscale(array)
+    assert array.flags.writeable
+    assert not image.imageview.flags.writeable
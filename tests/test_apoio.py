@@ -0,0 +1,86 @@
+import json
+import numpy as np
+import pytest
+from PIL import Image
+from apoimage import getimage
+from apoio import open_memmap
+from conftest import random_array
+
+
+def assert_mapped(image, expected):
+    # The image wraps the memory map itself, so no pixel is read when the image is opened
+    assert isinstance(image.imageview, np.memmap)
+    np.testing.assert_array_equal(image.imageview, expected)
+
+
+@pytest.mark.parametrize("mode", ["RGB", "L", "1"])
+@pytest.mark.parametrize("fortran_order", [False, True])
+def test_npy_is_mapped(tmp_path, mode, fortran_order):
+    array = random_array(mode)
+    path = str(tmp_path / "image.npy")
+    np.save(path, np.asfortranarray(array) if fortran_order else array)
+    image = getimage(path)
+    assert_mapped(image, array)
+    image.close()
+
+
+@pytest.mark.parametrize("mode", ["RGB", "L", "1"])
+def test_raw_is_mapped(tmp_path, mode):
+    array = random_array(mode)
+    path = str(tmp_path / "image.raw")
+    with open(path, "wb") as rawfile:
+        rawfile.write(b"header")
+        rawfile.write(array.astype(np.uint8).tobytes())
+    with open(path + ".json", "w") as headerfile:
+        json.dump({"width": array.shape[1], "height": array.shape[0], "mode": mode, "offset": 6}, headerfile)
+    image = getimage(path)
+    assert_mapped(image, array)
+    image.close()
+
+
+@pytest.mark.parametrize("mode", ["RGB", "L"])
+@pytest.mark.parametrize("extension", [".bmp", ".tif", ".ppm"])
+def test_uncompressed_image_is_mapped(tmp_path, mode, extension):
+    # Odd width gives padded rows in BMP files, which are also stored bottom-up and in BGR order
+    array = random_array(mode)
+    path = str(tmp_path / ("image" + extension))
+    Image.fromarray(array).save(path)
+    image = getimage(path)
+    assert_mapped(image, array)
+    image.close()
+
+
+@pytest.mark.parametrize("mode", ["RGB", "L", "1"])
+@pytest.mark.parametrize("extension", [".npy", ".bmp", ".png"])
+def test_save_round_trip(tmp_path, mode, extension):
+    array = random_array(mode)
+    source = str(tmp_path / "source.npy")
+    np.save(source, array)
+    image = getimage(source)
+    path = str(tmp_path / ("image" + extension))
+    image.save(path)
+    saved = getimage(path)
+    np.testing.assert_array_equal(saved.imageview, array)
+    saved.close()
+    image.close()
+
+
+def test_save_over_mapped_file(tmp_path):
+    array = random_array("L")
+    path = str(tmp_path / "image.npy")
+    np.save(path, array)
+    image = getimage(path)
+    negated = image.negate()
+    image.close()
+    negated.save(path)
+    np.testing.assert_array_equal(np.load(path), 255 - array)
+    image = getimage(path)
+    image.save(path)
+    np.testing.assert_array_equal(np.load(path), 255 - array)
+    image.close()
+
+
+def test_compressed_image_is_not_mapped(tmp_path):
+    path = str(tmp_path / "image.png")
+    Image.fromarray(random_array("L")).save(path)
+    assert open_memmap(path) is None
@@ -0,0 +1,116 @@
+import threading
+import time
+from apojobs import JobRunner
+
+
+class FakeRoot:
+    '''
+    Stand-in for the Tk root window. Scheduled calls are run by run_pending() instead of the main loop.
+    '''
+    def __init__(self):
+        self.scheduled = {}
+        self.errors = []
+        self.next_id = 0
+
+    def after(self, delay, function):
+        self.next_id += 1
+        self.scheduled[self.next_id] = function
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.scheduled.pop(after_id, None)
+
+    def report_callback_exception(self, exc_type, value, traceback):
+        self.errors.append(value)
+
+    def run_pending(self):
+        scheduled, self.scheduled = self.scheduled, {}
+        for function in scheduled.values():
+            function()
+
+
+def run_until_idle(root, timeout=5):
+    end = time.monotonic() + timeout
+    while root.scheduled and time.monotonic() < end:
+        root.run_pending()
+        time.sleep(0.001)
+
+
+def test_results_and_errors_reach_callbacks():
+    root = FakeRoot()
+    runner = JobRunner(root, workers=2)
+    results, errors, finished = [], [], []
+    job = runner.submit(lambda: 6 * 7, results.append)
+    job.add_finish_callback(lambda: finished.append("done"))
+    failing = runner.submit(lambda: 1 / 0, results.append, errors.append)
+    failing.add_finish_callback(lambda: finished.append("failed"))
+    run_until_idle(root)
+    assert results == [42]
+    assert isinstance(errors[0], ZeroDivisionError)
+    assert sorted(finished) == ["done", "failed"]
+    runner.shutdown()
+
+
+def test_cancelled_job_runs_only_finish_callbacks():
+    root = FakeRoot()
+    runner = JobRunner(root, workers=1)
+    release = threading.Event()
+    results, finished = [], []
+    job = runner.submit(release.wait, results.append)
+    job.add_finish_callback(lambda: finished.append(True))
+    job.cancel()
+    release.set()
+    run_until_idle(root)
+    assert results == []
+    assert finished == [True]
+    runner.shutdown()
+
+
+def test_failing_callback_does_not_skip_other_jobs():
+    root = FakeRoot()
+    runner = JobRunner(root, workers=2)
+    finished = []
+
+    def fail(result):
+        raise RuntimeError("callback error")
+
+    jobs = [runner.submit(lambda: None, fail), runner.submit(lambda: None, fail), runner.submit(lambda: None, fail)]
+    for job in jobs:
+        job.add_finish_callback(lambda: finished.append(True))
+    # All jobs are finished before the first check
+    while not all(job.future.done() for job in jobs):
+        time.sleep(0.001)
+    run_until_idle(root)
+    assert len(finished) == 3
+    assert len(root.errors) == 3
+    assert all(job.finished for job in jobs)
+    runner.shutdown()
+
+
+class FinishingFuture:
+    '''
+    Future which finishes between the first and the second call of done().
+    '''
+    def __init__(self, future):
+        self.future = future
+        self.calls = 0
+
+    def done(self):
+        self.calls += 1
+        return self.calls > 1
+
+    def __getattr__(self, name):
+        return getattr(self.future, name)
+
+
+def test_job_finishing_during_check_is_not_lost():
+    root = FakeRoot()
+    runner = JobRunner(root, workers=1)
+    results = []
+    job = runner.submit(lambda: 42, results.append)
+    job.future.result()
+    job.future = FinishingFuture(job.future)
+    run_until_idle(root)
+    assert results == [42]
+    assert job.finished
+    runner.shutdown()
@@ -0,0 +1,43 @@
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+from apoparallel import imap_ordered
+
+
+def square_or_die(item):
+    # The worker process is killed for the item 5, as it would be by a crash in native code
+    if item == 5:
+        os.kill(os.getpid(), signal.SIGKILL)
+    return item * item
+
+
+def square_or_raise(item):
+    if item == 3:
+        raise ValueError("invalid item")
+    return item * item
+
+
+def test_results_are_ordered():
+    results = list(imap_ordered(square_or_raise, range(20), workers=3, max_inflight=4))
+    assert [item for item, result, error in results] == list(range(20))
+    assert [result for item, result, error in results if error is None] == [i * i for i in range(20) if i != 3]
+    assert isinstance(results[3][2], ValueError)
+
+
+def test_serial_processing():
+    results = list(imap_ordered(square_or_raise, range(5), workers=1))
+    assert [result for item, result, error in results] == [0, 1, 4, None, 16]
+
+
+def test_killed_worker_fails_only_its_item():
+    failures = []
+    results = {}
+    for item, result, error in imap_ordered(square_or_die, range(20), workers=3, max_inflight=6):
+        if error is not None:
+            failures.append((item, error))
+        else:
+            results[item] = result
+    assert [item for item, error in failures] == [5]
+    assert isinstance(failures[0][1], BrokenProcessPool)
+    assert results == {i: i * i for i in range(20) if i != 5}
+
@@ -0,0 +1,72 @@
+import numpy as np
+import cv2 as cv
+import pytest
+from apopyramid import LevelCache, get_pyramid_source_factor, get_resized_size, resample_region
+from conftest import random_image
+
+
+def assemble_tiles(image, factor, tile_size):
+    width, height = get_resized_size(image.size, factor)
+    tiles = [[image.zoom_region(factor, (x, y, min(x + tile_size, width), min(y + tile_size, height)))
+                for x in range(0, width, tile_size)] for y in range(0, height, tile_size)]
+    return np.vstack([np.hstack(row) for row in tiles])
+
+
+@pytest.mark.parametrize("mode", ["RGB", "GS", "B"])
+@pytest.mark.parametrize("factor", [0.1, 0.25, 0.3, 0.5, 0.77, 1, 1.5, 2, 3.3])
+def test_tiles_match_whole_region(mode, factor):
+    image = random_image(mode)
+    size = get_resized_size(image.size, factor)
+    whole = image.zoom_region(factor, (0, 0) + size)
+    assert whole.shape[:2] == (size[1], size[0])
+    np.testing.assert_array_equal(assemble_tiles(image, factor, 64), whole)
+    np.testing.assert_array_equal(assemble_tiles(image, factor, 37), whole)
+
+
+@pytest.mark.parametrize("factor", [1.5, 2, 3.3])
+def test_enlarged_region_matches_linear_resize(factor):
+    image = random_image("RGB")
+    size = get_resized_size(image.size, factor)
+    expected = cv.resize(image.imageview, size, interpolation=cv.INTER_LINEAR).astype(np.int16)
+    region = image.zoom_region(factor, (0, 0) + size).astype(np.int16)
+    # cv.warpAffine and cv.resize round the interpolation weights to a different precision
+    assert np.abs(region - expected).max() <= 1
+
+
+def test_pyramid_factor_region_is_cut_from_level():
+    image = random_image("GS")
+    np.testing.assert_array_equal(image.zoom_region(0.5, (10, 20, 60, 90)), image.zoom(0.5).imageview[20:90, 10:60])
+
+
+def test_region_reads_only_its_source_pixels():
+    array = np.zeros((100, 100), dtype=np.uint8)
+    array[:, 50:] = 255
+    # The left half of the enlarged image depends only on the left half of the source
+    region = resample_region(array, (200, 200), (0, 0, 96, 200))
+    assert not region.any()
+
+
+def test_source_factor():
+    assert get_pyramid_source_factor(2) == 1
+    assert get_pyramid_source_factor(0.5) == 1
+    assert get_pyramid_source_factor(0.3) == 0.5
+    assert get_pyramid_source_factor(0.1) == 0.125
+
+
+def test_level_cache_eviction():
+    cache = LevelCache(300)
+    key = cache.new_owner_key()
+    other_key = cache.new_owner_key()
+    cache.put(key, 0.5, np.zeros(100, dtype=np.uint8))
+    cache.put(other_key, 0.5, np.zeros(100, dtype=np.uint8))
+    cache.put(key, 0.25, np.zeros(100, dtype=np.uint8))
+    cache.get(key, 0.5)
+    cache.put(key, 0.125, np.zeros(100, dtype=np.uint8))
+    # The least recently used level is evicted
+    assert cache.get(other_key, 0.5) is None
+    assert cache.get(key, 0.5) is not None
+    cache.discard(key)
+    assert cache.nbytes == 0
+    # Levels larger than the limit are not stored
+    cache.put(key, 0.5, np.zeros(400, dtype=np.uint8))
+    assert cache.get(key, 0.5) is None
@@ -0,0 +1,165 @@
+import csv
+import numpy as np
+import pytest
+from apoimage import ImageGrayscale
+from aposample import get_profile_coordinates, sample_profile, sample_profiles, load_polylines, write_profiles
+from conftest import random_image
+
+
+def rasterize_reference(points):
+    # The rasterisation loop of the original plot_profile()
+    profile_points = []
+    line_break_points = [0]
+    x1, y1 = points[0]
+    for x2, y2 in points[1:]:
+        line_points = []
+        if x1 == x2:
+            line_points = [(x1, y) for y in range(y1, y2, (y2-y1)//abs(y2-y1))]
+        elif y1 == y2:
+            line_points = [(x, y1) for x in range(x1, x2, (x2-x1)//abs(x2-x1))]
+        else:
+            a = (y2 - y1) / (x2 - x1)
+            b = y2 - a * x2
+            if abs(a) > 1:
+                for y in range(y1, y2, (y2-y1)//abs(y2-y1)):
+                    line_points.append((round((y - b) / a), y))
+            else:
+                for x in range(x1, x2, (x2-x1)//abs(x2-x1)):
+                    line_points.append((x, round(a * x + b)))
+        profile_points += line_points
+        line_break_points.append(len(profile_points))
+        x1, y1 = x2, y2
+    profile_points.append((x2, y2))
+    return (profile_points, line_break_points)
+
+
+def random_polylines(count, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    polylines = []
+    while len(polylines) < count:
+        points = [tuple(int(value) for value in point)
+                    for point in rng.integers(0, (width, height), (rng.integers(2, 6), 2))]
+        # Consecutive points are distinct, as in the profile window
+        if all(p != q for p, q in zip(points[:-1], points[1:])):
+            polylines.append(points)
+    return polylines
+
+
+def test_coordinates_match_reference_rasterizer():
+    for points in random_polylines(2000, 121, 83):
+        xs, ys, line_break_points = get_profile_coordinates(points)
+        reference_points, reference_break_points = rasterize_reference(points)
+        assert list(zip(xs.astype(int).tolist(), ys.astype(int).tolist())) == reference_points
+        assert line_break_points == reference_break_points
+
+
+@pytest.mark.parametrize("mode", ["RGB", "GS", "B"])
+def test_nearest_values_match_reference(mode):
+    image = random_image(mode)
+    height = image.size[1]
+    for points in random_polylines(200, *image.size):
+        values, line_break_points = sample_profile(image, points)
+        reference_points, reference_break_points = rasterize_reference(points)
+        expected = np.array([image.imageview[height - y - 1][x] for x, y in reference_points])
+        np.testing.assert_array_equal(values, expected)
+        assert values.dtype == image.imageview.dtype
+        assert line_break_points == reference_break_points
+
+
+def test_bilinear_equals_nearest_on_axis_lines():
+    image = random_image("RGB")
+    points = [(3, 5), (90, 5), (90, 70), (10, 70)]
+    nearest, nearest_break_points = sample_profile(image, points)
+    bilinear, bilinear_break_points = sample_profile(image, points, "bilinear")
+    np.testing.assert_allclose(bilinear, nearest, atol=1e-9)
+    assert bilinear_break_points == nearest_break_points
+
+
+def test_wide_profile_averages_across_line():
+    array = np.zeros((50, 60), dtype=np.uint8)
+    # Horizontal line along the row 20 from the bottom, with rows 19 and 21 around it
+    array[50 - 1 - 19] = 30
+    array[50 - 1 - 20] = 60
+    array[50 - 1 - 21] = 90
+    values, line_break_points = sample_profile(ImageGrayscale(array), [(5, 20), (40, 20)], width=3)
+    np.testing.assert_allclose(values, 60)
+    values, line_break_points = sample_profile(ImageGrayscale(array), [(5, 20), (40, 20)], width=5)
+    np.testing.assert_allclose(values, 36)
+
+
+def test_points_outside_image_are_clamped():
+    image = random_image("GS")
+    values, line_break_points = sample_profile(image, [(0, 0), (0, 30)], "bilinear", width=7)
+    assert np.isfinite(values).all()
+    assert len(values) == 31
+
+
+def test_invalid_arguments():
+    image = random_image("GS")
+    with pytest.raises(ValueError):
+        sample_profile(image, [(0, 0), (5, 5)], "cubic")
+    with pytest.raises(ValueError):
+        sample_profile(image, [(0, 0), (5, 5)], width=0)
+    with pytest.raises(ValueError):
+        sample_profile(image, [(0, 0)])
+
+
+@pytest.mark.parametrize("interpolation", ["nearest", "bilinear"])
+@pytest.mark.parametrize("width", [1, 4])
+def test_many_profiles_match_single_profiles(interpolation, width):
+    image = random_image("RGB")
+    polylines = random_polylines(100, *image.size, seed=2)
+    profiles = sample_profiles(image, polylines, interpolation, width)
+    assert len(profiles) == len(polylines)
+    for points, (values, line_break_points) in zip(polylines, profiles):
+        single_values, single_break_points = sample_profile(image, points, interpolation, width)
+        np.testing.assert_array_equal(values, single_values)
+        assert line_break_points == single_break_points
+
+
+def test_load_polylines(tmp_path):
+    path = tmp_path / "polylines.txt"
+    path.write_text("# Profiles\n1 2 30 40\n\n5,6, 7,8 9 10\n")
+    assert load_polylines(str(path)) == [[(1, 2), (30, 40)], [(5, 6), (7, 8), (9, 10)]]
+    path.write_text("1 2 3\n")
+    with pytest.raises(ValueError, match="Line 1 "):
+        load_polylines(str(path))
+    path.write_text("1 2 3 4\nx y 3 4\n")
+    with pytest.raises(ValueError, match="line 2 "):
+        load_polylines(str(path))
+
+
+def expected_table(profiles):
+    rows = []
+    for index, (values, line_break_points) in enumerate(profiles):
+        for position, value in enumerate(values.reshape(len(values), -1)):
+            rows.append([index, position, int(position in line_break_points)] + value.tolist())
+    return np.array(rows, dtype=np.float64)
+
+
+@pytest.mark.parametrize("mode", ["RGB", "GS"])
+def test_write_profiles_npy(tmp_path, mode):
+    image = random_image(mode)
+    profiles = sample_profiles(image, random_polylines(20, *image.size), "bilinear", 3)
+    path = str(tmp_path / "profiles.npy")
+    write_profiles(path, profiles)
+    np.testing.assert_array_equal(np.load(path), expected_table(profiles))
+
+
+def test_write_profiles_csv(tmp_path):
+    image = random_image("RGB")
+    profiles = sample_profiles(image, random_polylines(20, *image.size), "bilinear")
+    path = str(tmp_path / "profiles.csv")
+    write_profiles(path, profiles, ["Red", "Green", "Blue"])
+    with open(path, newline="") as csvfile:
+        rows = list(csv.reader(csvfile))
+    assert rows[0] == ["Profile", "Position", "Breakpoint", "Red", "Green", "Blue"]
+    np.testing.assert_allclose(np.array(rows[1:], dtype=np.float64), expected_table(profiles), rtol=1e-9)
+
+
+def test_write_profiles_default_columns(tmp_path):
+    image = random_image("GS")
+    path = str(tmp_path / "profiles.csv")
+    write_profiles(path, sample_profiles(image, [[(0, 0), (10, 10)]]))
+    with open(path, newline="") as csvfile:
+        assert next(csv.reader(csvfile)) == ["Profile", "Position", "Breakpoint", "Value"]
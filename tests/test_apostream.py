@@ -0,0 +1,96 @@
+import os
+import numpy as np
+import pytest
+from apoimage import getimage
+from apostream import stream_operation
+
+
+POINT_CASES = [("convert", ("B",)), ("convert", ("GS",)), ("negate", ()), ("treshold_binary", (100,)),
+                ("treshold_grayscale", (100,)), ("treshold_two", (50, 150)), ("add_int", (30,)),
+                ("multiply_int", (2,)), ("multiply_int", (2, False)), ("divide_int", (3,)), ("logic_not", ()),
+                ("hist_linear_stretch", ()), ("hist_linear_stretch", (None, True)), ("hist_gamma_stretch", (0.5,)),
+                ("hist_equalization", ())]
+
+NEIGHBOURHOOD_CASES = [("smooth_avarage", ("reflect",)), ("smooth_weighted_avarage", (2, "wrap")),
+                        ("smooth_gaussian", ("const", 7)), ("median_blur", (5, "reflect")),
+                        ("median_blur", (7, "const_result", 3)), ("sharpen_laplacian", (1, "reflect")),
+                        ("edgedetection_Sobel_mask", ("NE", "wrap")), ("edgedetection_Sobel_operator", ("reflect",)),
+                        ("edgedetection_Prewitt_operator", ("const", 20))]
+
+# Target mode of the conversion for every source mode
+CONVERSIONS = {"RGB": "GS", "GS": "B"}
+
+MORPHOLOGY_CASES = [("morph_erode", (0, "reflect")), ("morph_dilate", (1, "const", 1)),
+                    ("morph_open", (1, "wrap")), ("morph_close", (0, "const_result", 0))]
+
+
+@pytest.fixture(params=["GS", "RGB", "B"])
+def source(request, tmp_path):
+    rng = np.random.default_rng(0)
+    if request.param == "RGB":
+        array = rng.integers(0, 256, (67, 53, 3), dtype=np.uint8)
+    elif request.param == "GS":
+        # Narrow range of values, so the histogram operations change the image
+        array = rng.integers(40, 180, (67, 53), dtype=np.uint8)
+    else:
+        array = rng.random((67, 53)) > 0.5
+    path = str(tmp_path / "source.npy")
+    np.save(path, array)
+    return path
+
+
+def get_cases(image):
+    if image.mode == "B":
+        cases = MORPHOLOGY_CASES
+    else:
+        cases = POINT_CASES + NEIGHBOURHOOD_CASES
+    for name, args in cases:
+        if not hasattr(image, name) or (name == "convert" and args[0] != CONVERSIONS[image.mode]):
+            continue
+        yield (name, args)
+
+
+@pytest.mark.parametrize("band_rows", [1, 16, 100])
+def test_stream_equals_in_memory(source, tmp_path, band_rows):
+    image = getimage(source)
+    cases = list(get_cases(image))
+    assert cases
+    for name, args in cases:
+        output = str(tmp_path / "output.npy")
+        stream_operation(source, output, name, *args, band_rows=band_rows)
+        expected = getattr(image, name)(*args)
+        expected = expected[-1] if isinstance(expected, tuple) else expected
+        np.testing.assert_array_equal(np.load(output), expected.imageview, err_msg=f"{name}{args}")
+    image.close()
+
+
+def test_pnm_output_equals_in_memory(source, tmp_path):
+    image = getimage(source)
+    for name, args in get_cases(image):
+        output = str(tmp_path / "output.pnm")
+        stream_operation(source, output, name, *args, band_rows=10)
+        expected = getattr(image, name)(*args)
+        streamed = getimage(output)
+        np.testing.assert_array_equal(streamed.imageview, expected.imageview, err_msg=f"{name}{args}")
+        streamed.close()
+    image.close()
+
+
+def test_operation_error_is_raised_and_output_removed(tmp_path):
+    source = str(tmp_path / "source.npy")
+    np.save(source, np.zeros((40, 30), dtype=np.uint8))
+    output = str(tmp_path / "output.npy")
+    # Even mask sizes are rejected by OpenCV
+    with pytest.raises(Exception) as error:
+        stream_operation(source, output, "median_blur", 4, "wrap", band_rows=8)
+    assert "rows have been written" not in str(error.value)
+    assert not os.path.exists(output)
+
+
+def test_morphology_of_grayscale_is_rejected(tmp_path):
+    source = str(tmp_path / "source.npy")
+    np.save(source, np.zeros((40, 30), dtype=np.uint8))
+    output = str(tmp_path / "output.npy")
+    with pytest.raises(ValueError, match="cannot be streamed"):
+        stream_operation(source, output, "morph_erode", 0, "reflect")
+    assert not os.path.exists(output)